@@ -0,0 +1,68 @@
+"""Data consistency benchmark.
+
+Measures rows/sec, peak RSS, query counts and the rows and bytes fetched by DataConsistencyTest.run() on synthetic
+collections that are served by local SQLite stand-in datastores. The counts are compared with the stored baselines;
+the program exits with a non-zero exit code when a count exceeds its baseline or when a scenario has no baseline.
+Rows/sec and peak RSS are only reported, they are not compared: a drop in throughput does not fail the benchmark.
+
+Usage:
+    python -m benchmarks.data_consistency --sizes 10k 1M --scenarios full merged
+    python -m benchmarks.data_consistency --sizes 10k --update-baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.data_consistency.run import (
+    SCENARIOS,
+    SIZES,
+    compare,
+    load_baseline,
+    run,
+    update_baseline,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+NOT_GATED = (
+    "Only the query counts and the rows and bytes fetched are compared with the baseline. "
+    "Rows/sec and peak RSS depend on the hardware, they are reported but not compared: "
+    "a throughput regression does not fail the benchmark."
+)
+
+
+def main() -> int:
+    """Run the benchmark, return the exit code."""
+    parser = argparse.ArgumentParser(description="Data consistency benchmark", epilog=NOT_GATED)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k"])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file with baseline results")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as new baseline")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    parser.add_argument("--workdir", help="Directory for the generated databases, default a temporary directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = run(args.scenarios, args.sizes, args.workdir or tmpdir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        update_baseline(args.baseline, results)
+        print(f"Baseline {args.baseline} updated")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(NOT_GATED)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
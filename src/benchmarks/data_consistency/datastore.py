@@ -0,0 +1,81 @@
+"""Local stand-in datastores for the data consistency benchmark.
+
+The stand-in datastores are backed by SQLite and implement the part of the GOB-Core Datastore interface
+that is used by DataConsistencyTest (connect, disconnect and query). The few PostgreSQL specific constructs
+in the queries of DataConsistencyTest are translated to their SQLite counterparts.
+"""
+
+import json
+import re
+import sqlite3
+from typing import Any, Iterator, Optional
+
+# Columns that are declared as JSON are returned as Python objects, like PostgreSQL jsonb columns
+sqlite3.register_converter("JSON", json.loads)
+
+
+class SQLiteDatastore:
+    """Stand-in for a GOB-Core Datastore that is backed by a SQLite database file."""
+
+    ST_ASTEXT = re.compile(r"^\s*SELECT ST_AsText\('(.*)'::geometry\)\s*$", re.DOTALL)
+
+    def __init__(self, connection_config: dict[str, Any], read_config: Optional[dict[str, Any]] = None):
+        self.database = connection_config["database"]
+        self.read_config = read_config or {}
+        self.connection: Optional[sqlite3.Connection] = None
+        self.queries = 0
+
+    def connect(self) -> None:
+        """Connect to the SQLite database, reconnect if already connected."""
+        self.disconnect()
+        self.connection = sqlite3.connect(self.database, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.connection.row_factory = sqlite3.Row
+
+    def disconnect(self) -> None:
+        """Disconnect from the SQLite database."""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def query(self, query: str, **kwargs: Any) -> Iterator[Any]:
+        """Execute query and return the resulting rows as dicts.
+
+        Geometries are stored as WKT, so ST_AsText returns the given geometry value.
+
+        :param query: PostgreSQL-style query as used by DataConsistencyTest
+        :param kwargs: Cursor arguments, only arraysize is used
+        :return:
+        """
+        assert self.connection, "Not connected"
+        self.queries += 1
+
+        if match := self.ST_ASTEXT.match(query):
+            return iter([(match.group(1).replace("''", "'"),)])
+
+        # Queries are escaped for the psycopg2 paramstyle, PostgreSQL names count(*) "count"
+        query = query.replace("%%", "%").replace("count(*)", "count(*) AS count")
+        cursor = self.connection.execute(query)
+        return self._fetch(cursor, kwargs.get("arraysize", 1_000))
+
+    @staticmethod
+    def _fetch(cursor: sqlite3.Cursor, arraysize: int) -> Iterator[dict[str, Any]]:
+        while rows := cursor.fetchmany(arraysize):
+            yield from (dict(row) for row in rows)
+
+
+class StandInDatastoreFactory:
+    """Stand-in for the GOB-Core DatastoreFactory, keeps track of the datastores it has created."""
+
+    def __init__(self) -> None:
+        self.datastores: list[SQLiteDatastore] = []
+
+    def get_datastore(self, connection_config: dict[str, Any], read_config: Optional[dict[str, Any]] = None):
+        """Return a SQLite stand-in datastore for the given connection config."""
+        datastore = SQLiteDatastore(connection_config, read_config)
+        self.datastores.append(datastore)
+        return datastore
+
+    @property
+    def queries(self) -> int:
+        """Return the total number of queries that have been executed on all datastores."""
+        return sum(datastore.queries for datastore in self.datastores)
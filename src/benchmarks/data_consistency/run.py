@@ -0,0 +1,154 @@
+"""Run the data consistency benchmark scenarios.
+
+Every scenario is generated into SQLite databases first and then measured in a fresh process, so the peak RSS
+that is reported is the peak RSS of DataConsistencyTest.run() and not of the data generation.
+
+The results are compared with the baseline on counters that are the same in every run on the same data: the
+number of queries and the rows and bytes fetched from the source. Rows/sec and peak RSS depend on the hardware,
+they are reported but not compared.
+"""
+
+import json
+import os
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks.data_consistency.datastore import StandInDatastoreFactory
+from benchmarks.data_consistency.synthetic import MERGE_APPLICATION, SyntheticCollection
+
+SIZES = {
+    "10k": 10_000,
+    "1M": 1_000_000,
+    "10M": 10_000_000,
+}
+
+SCENARIOS: dict[str, dict[str, Any]] = {
+    "plain": {"states": 0, "references": False, "json_attributes": False, "geometries": False},
+    "full": {"states": 2, "references": True, "json_attributes": True, "geometries": True},
+    "merged": {"states": 2, "references": True, "json_attributes": True, "geometries": True, "merge": True},
+}
+
+# Deterministic counters that are compared with the baseline, a higher count is a regression
+COUNTERS = ["queries", "rows_fetched", "bytes_fetched"]
+
+
+def _databases(workdir: str, name: str) -> dict[str, str]:
+    return {db: os.path.join(workdir, f"{name}.{db}.sqlite") for db in ["source", "gob", "merge"]}
+
+
+def generate(collection: SyntheticCollection, workdir: str, name: str) -> None:
+    """Generate the databases for a scenario."""
+    databases = _databases(workdir, name)
+    collection.populate(databases["source"], databases["gob"], databases["merge"])
+
+
+def measure(collection: SyntheticCollection, workdir: str, name: str) -> dict[str, Any]:
+    """Measure DataConsistencyTest.run() for a generated scenario.
+
+    The GOB model, import definitions and datastores are replaced by their synthetic and stand-in versions.
+    The bytes fetched from the source are counted, which adds a little overhead to the measured rows/sec.
+    """
+    # Imported here so that the GOB model is only loaded in the measuring process
+    from gobtest.data_consistency import data_consistency_test
+    from gobtest.data_consistency.data_consistency_test import GOB_DB, DataConsistencyTest
+
+    databases = _databases(workdir, name)
+    datastore_configs = {GOB_DB: {"database": databases["gob"]}, MERGE_APPLICATION: {"database": databases["merge"]}}
+    factory = StandInDatastoreFactory()
+
+    # The sample offset is random, seed it to get the same GOB lookups in every run
+    random.seed(collection.seed)
+
+    with patch.multiple(
+        data_consistency_test,
+        gob_model={collection.catalog: collection.model()},
+        get_import_definition=lambda *args: collection.import_definition(databases["source"]),
+        get_import_definition_by_filename=lambda *args: collection.merge_import_definition(),
+        get_datastore_config=datastore_configs.get,
+        DatastoreFactory=factory,
+        DATA_CONSISTENCY_TEST_COUNT_BYTES=True,
+    ):
+        start = time.perf_counter()
+        with DataConsistencyTest(collection.catalog, collection.collection) as tester:
+            tester.run()
+        seconds = time.perf_counter() - start
+
+    return {
+        "rows": collection.size,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(collection.size / seconds, 1),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "queries": factory.queries,
+        "rows_fetched": tester.metrics.counters.get("rows", 0),
+        "bytes_fetched": tester.metrics.counters.get("bytes_fetched", 0),
+        "metrics": tester.metrics.summary(),
+    }
+
+
+def run(scenarios: list[str], sizes: list[str], workdir: str) -> dict[str, dict[str, Any]]:
+    """Run the given scenarios for the given sizes, return the results by "<scenario>-<size>"."""
+    results = {}
+    for scenario in scenarios:
+        for size in sizes:
+            name = f"{scenario}-{size}"
+            collection = SyntheticCollection(SIZES[size], **SCENARIOS[scenario])
+
+            print(f"Generate {name}")
+            generate(collection, workdir, name)
+
+            print(f"Measure {name}")
+            # A fresh process for every measurement, spawned to not inherit the memory of this process
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                results[name] = executor.submit(measure, collection, workdir, name).result()
+
+            result = results[name]
+            print(
+                f"{name}: {result['rows_per_second']:,} rows/sec, "
+                f"peak RSS {result['peak_rss_mb']:,} MB, {result['queries']:,} queries, "
+                f"{result['bytes_fetched']:,} bytes fetched"
+            )
+    return results
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> list[str]:
+    """Compare the counters of the results with a baseline, return a description of every regression.
+
+    A scenario without a baseline is a regression, its baseline has to be recorded with --update-baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            regressions.append(f"{name}: no baseline, record it with --update-baseline")
+            continue
+
+        base = baseline[name]
+        regressions.extend(
+            f"{name}: {result[counter]:,} {counter.replace('_', ' ')}, baseline {base[counter]:,}"
+            for counter in COUNTERS
+            if result[counter] > base[counter]
+        )
+    return regressions
+
+
+def load_baseline(path: str) -> dict[str, dict[str, Any]]:
+    """Load baseline results, an empty baseline is returned if the file does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        baseline: dict[str, dict[str, Any]] = json.load(f)
+    return baseline
+
+
+def update_baseline(path: str, results: dict[str, dict[str, Any]]) -> None:
+    """Store the results as baseline, baselines of scenarios that have not been run are kept."""
+    baseline = load_baseline(path)
+    baseline.update({name: {counter: result[counter] for counter in COUNTERS} for name, result in results.items()})
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,235 @@
+"""Synthetic collections for the data consistency benchmark.
+
+A synthetic collection consists of a GOB model definition, an import definition, a source table and the
+corresponding GOB table. The data is generated from a fixed seed, so every run works on identical data.
+"""
+
+import json
+import random
+import sqlite3
+from itertools import islice
+from typing import Any, Iterator, Optional
+
+SOURCE_NAME = "benchmark"
+SOURCE_APPLICATION = "Benchmark"
+MERGE_APPLICATION = "BenchmarkMerge"
+MERGE_DATASET = "benchmark_merge.json"
+
+INSERT_BATCH_SIZE = 10_000
+
+# Attributes that are imported 1-1 from a source column with the same name
+SCALAR_ATTRIBUTES = ["identificatie", "naam", "aantal", "volgnummer", "geometrie"]
+
+PRIVATE_FIELDS = [
+    "_source",
+    "_application",
+    "_source_id",
+    "_last_event",
+    "_hash",
+    "_version",
+    "_date_created",
+    "_date_confirmed",
+    "_date_modified",
+    "_date_deleted",
+    "_gobid",
+    "_id",
+    "_tid",
+]
+
+
+class SyntheticCollection:
+    """Synthetic collection with configurable size, states, references, JSON attributes, geometries and merge."""
+
+    catalog = "benchmark"
+    collection = "entities"
+
+    def __init__(
+        self,
+        size: int,
+        states: int = 0,
+        references: bool = True,
+        json_attributes: bool = True,
+        geometries: bool = True,
+        merge: bool = False,
+        seed: int = 0,
+    ):
+        """Initialise SyntheticCollection.
+
+        :param size: Number of source rows
+        :param states: Number of states per entity, 0 for a collection without states
+        :param references: Include a single and a many reference
+        :param json_attributes: Include a JSON attribute
+        :param geometries: Include a point geometry
+        :param merge: Merge the collection with a second source (diva_into_dgdialog), requires states
+        :param seed: Seed for the generated values
+        """
+        assert not merge or states, "A merged collection requires states"
+        assert size >= max(states, 1), "The size should at least be the number of states"
+        self.size = size
+        self.states = states
+        self.references = references
+        self.json_attributes = json_attributes
+        self.geometries = geometries
+        self.merge = merge
+        self.seed = seed
+
+    @property
+    def table(self) -> str:
+        """Return the name of the GOB table."""
+        return f"{self.catalog}_{self.collection}"
+
+    def attributes(self) -> dict[str, dict[str, Any]]:
+        """Return the GOB model attributes of the collection."""
+        attributes: dict[str, dict[str, Any]] = {
+            "identificatie": {"type": "GOB.String"},
+            "naam": {"type": "GOB.String"},
+            "aantal": {"type": "GOB.Integer"},
+        }
+        if self.states:
+            attributes["volgnummer"] = {"type": "GOB.Integer"}
+        if self.geometries:
+            attributes["geometrie"] = {"type": "GOB.Geo.Point"}
+        if self.json_attributes:
+            attributes["kenmerken"] = {
+                "type": "GOB.JSON",
+                "attributes": {"soort": {"type": "GOB.String"}, "omschrijving": {"type": "GOB.String"}},
+            }
+        if self.references:
+            attributes["ligt_in"] = {"type": "GOB.Reference", "ref": f"{self.catalog}:{self.collection}"}
+            attributes["grenst_aan"] = {"type": "GOB.ManyReference", "ref": f"{self.catalog}:{self.collection}"}
+        return attributes
+
+    def model(self) -> dict[str, Any]:
+        """Return the GOB model of the synthetic catalog, as in GOBModel()[catalog]."""
+        attributes = self.attributes()
+        collection = {
+            "entity_id": "identificatie",
+            "has_states": bool(self.states),
+            "attributes": attributes,
+            "all_fields": {**attributes, **{field: {"type": "GOB.String"} for field in PRIVATE_FIELDS}},
+        }
+        return {"collections": {self.collection: collection}}
+
+    def import_definition(self, source_database: str) -> dict[str, Any]:
+        """Return the import definition that reads the source table from the given database."""
+        gob_mapping: dict[str, dict[str, Any]] = {attr: {"source_mapping": attr} for attr in SCALAR_ATTRIBUTES}
+        gob_mapping["kenmerken"] = {"source_mapping": {"soort": "kenmerk_soort", "omschrijving": "kenmerk_omschr"}}
+        gob_mapping["ligt_in"] = {"source_mapping": {"bronwaarde": "ligt_in"}}
+        gob_mapping["grenst_aan"] = {"source_mapping": {"bronwaarde": "grenst_aan"}}
+
+        source: dict[str, Any] = {
+            "name": SOURCE_NAME,
+            "application": SOURCE_APPLICATION,
+            "application_config": {"database": source_database},
+            "entity_id": "identificatie",
+            "query": ["SELECT *", "FROM source", "ORDER BY rowid"],
+        }
+        if self.merge:
+            source["merge"] = {"dataset": MERGE_DATASET, "id": "diva_into_dgdialog", "on": "identificatie"}
+
+        return {
+            "source": source,
+            "gob_mapping": {attr: mapping for attr, mapping in gob_mapping.items() if attr in self.attributes()},
+        }
+
+    def merge_import_definition(self) -> dict[str, Any]:
+        """Return the import definition of the merged source."""
+        return {
+            "source": {
+                "name": SOURCE_NAME,
+                "application": MERGE_APPLICATION,
+                "query": ["SELECT *", "FROM merge_source"],
+            }
+        }
+
+    def _source_rows(self) -> Iterator[dict[str, Any]]:
+        rnd = random.Random(self.seed)
+        n_entities = self.size // max(self.states, 1)
+        for i in range(self.size):
+            entity = i % n_entities
+            row: dict[str, Any] = {
+                "identificatie": f"id{entity}",
+                "naam": f"naam {rnd.randint(0, 1_000_000)}",
+                "aantal": rnd.randint(0, 10_000),
+            }
+            if self.states:
+                row["volgnummer"] = i // n_entities + 1
+            if self.geometries:
+                row["geometrie"] = f"POINT ({rnd.randint(110_000, 135_000)} {rnd.randint(475_000, 500_000)})"
+            if self.json_attributes:
+                row["kenmerk_soort"] = f"soort {rnd.randint(0, 10)}"
+                row["kenmerk_omschr"] = f"omschrijving {rnd.randint(0, 1_000)}"
+            if self.references:
+                refs = [f"id{rnd.randint(0, n_entities - 1)}" for _ in range(rnd.randint(0, 3))]
+                row["ligt_in"] = f"id{rnd.randint(0, n_entities - 1)}"
+                row["grenst_aan"] = ";".join(refs)
+            yield row
+
+    def _gob_row(self, source_row: dict[str, Any]) -> dict[str, Any]:
+        """Return the GOB row for the given source row, as it would have been imported by GOB-Import."""
+        source_id = source_row["identificatie"]
+        if self.states:
+            source_id = f"{source_id}.{source_row['volgnummer']}"
+
+        row = {
+            "_source": SOURCE_NAME,
+            "_application": SOURCE_APPLICATION,
+            "_source_id": source_id,
+            "_date_deleted": None,
+            **{attr: source_row[attr] for attr in SCALAR_ATTRIBUTES if attr in source_row},
+        }
+        if self.json_attributes:
+            row["kenmerken"] = json.dumps(
+                {"soort": source_row["kenmerk_soort"], "omschrijving": source_row["kenmerk_omschr"]}
+            )
+        if self.references:
+            row["ligt_in"] = json.dumps({"bronwaarde": source_row["ligt_in"]})
+            row["grenst_aan"] = json.dumps([{"bronwaarde": ref} for ref in source_row["grenst_aan"].split(";") if ref])
+        return row
+
+    def _merge_rows(self) -> Iterator[dict[str, Any]]:
+        """Yield the rows of the merged source, half of the entities are also present in the main source."""
+        for i in range(self.size // 10):
+            yield {"identificatie": f"id{i * 2}" if i % 2 else f"merged{i}"}
+
+    def _column_types(self) -> dict[str, str]:
+        json_columns = {"kenmerken", "ligt_in", "grenst_aan"}
+        return {
+            attr: "JSON" if attr in json_columns else "INTEGER" if type_info["type"] == "GOB.Integer" else "TEXT"
+            for attr, type_info in self.attributes().items()
+        }
+
+    def populate(self, source_database: str, gob_database: str, merge_database: Optional[str] = None) -> None:
+        """Create and fill the source, GOB and (optional) merge tables."""
+        source_rows = self._source_rows()
+        first_row = next(self._source_rows())
+        source_columns = {col: "INTEGER" if isinstance(value, int) else "TEXT" for col, value in first_row.items()}
+        gob_columns = {**{field: "TEXT" for field in PRIVATE_FIELDS}, **self._column_types()}
+
+        with sqlite3.connect(source_database) as source, sqlite3.connect(gob_database) as gob:
+            self._create_table(source, "source", source_columns)
+            self._create_table(gob, self.table, gob_columns)
+            gob.execute(f"CREATE INDEX {self.table}_source_id ON {self.table} (_source_id)")
+
+            while batch := list(islice(source_rows, INSERT_BATCH_SIZE)):
+                self._insert(source, "source", source_columns, batch)
+                self._insert(gob, self.table, gob_columns, [self._gob_row(row) for row in batch])
+
+        if self.merge:
+            assert merge_database, "A merged collection requires a merge database"
+            with sqlite3.connect(merge_database) as merge:
+                self._create_table(merge, "merge_source", {"identificatie": "TEXT"})
+                self._insert(merge, "merge_source", {"identificatie": "TEXT"}, list(self._merge_rows()))
+
+    @staticmethod
+    def _create_table(connection: sqlite3.Connection, table: str, columns: dict[str, str]) -> None:
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.execute(f"CREATE TABLE {table} ({', '.join(f'{c} {t}' for c, t in columns.items())})")
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, table: str, columns: dict[str, str], rows: list[dict[str, Any]]):
+        placeholders = ", ".join(f":{column}" for column in columns)
+        connection.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            ({column: row.get(column) for column in columns} for row in rows),
+        )
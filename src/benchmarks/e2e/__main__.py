@@ -0,0 +1,52 @@
+"""End-to-end test benchmark.
+
+Runs the end-to-end tests against a local stand-in for the GOB API and management API, with the workflows run in
+local threads instead of GOB-Workflow. Measures the overhead of the end-to-end tests themselves: building the
+workflows, waiting for the processes and comparing the output of the endpoints, without a running GOB.
+
+Usage:
+    python -m benchmarks.e2e --scenarios suites --latency 0.01 --job-duration 0.1
+    python -m benchmarks.e2e --scenarios wait --processes 40 --jobs 10
+    python -m benchmarks.e2e --scenarios check --rows 100000 --output results.json
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.e2e.run import SCENARIOS, run
+
+
+def main() -> int:
+    """Run the benchmark, return the exit code."""
+    parser = argparse.ArgumentParser(description="End-to-end test benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds that every request is delayed")
+    parser.add_argument("--job-duration", type=float, default=0.0, help="Seconds that every import or relate takes")
+    parser.add_argument("--suites", nargs="+", help="Selection of suites, eg relate relate_multiple_allowed:1-3")
+    parser.add_argument("--processes", type=int, default=40, help="Number of concurrent processes to wait for")
+    parser.add_argument("--jobs", type=int, default=10, help="Number of jobs per process to wait for")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of rows of the checked endpoint")
+    parser.add_argument("--checks", type=int, default=3, help="Number of checks of the endpoint")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(
+        args.scenarios,
+        args.latency,
+        args.job_duration,
+        suites=args.suites,
+        processes=args.processes,
+        jobs=args.jobs,
+        rows=args.rows,
+        checks=args.checks,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
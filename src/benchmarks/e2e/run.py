@@ -0,0 +1,221 @@
+"""Drive E2ETest against the stand-in GOB API and management API.
+
+E2ETest is pointed to the stand-in server and its workflows are run by LocalWorkflow instead of GOB-Workflow:
+every step of a workflow is a job of its process, imports and relates take the configured job duration. The
+output of a check step is served by the stand-in as the expected output, so the checks pass unless the
+comparison itself is broken.
+
+Scenarios:
+- suites: run the end-to-end test suites, measures the workflow building, waiting and checking
+- wait: wait for many concurrent processes, measures the polling overhead
+- check: check a large endpoint, measures the comparison throughput
+"""
+
+import math
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Optional
+from unittest.mock import patch
+
+from gobcore.message_broker.config import END_TO_END_CHECK, END_TO_END_EXECUTE, END_TO_END_WAIT
+
+from benchmarks.e2e.server import API_BASE, MANAGEMENT_API_BASE, StandInGOB, synthetic_ndjson
+from gobtest.e2e import e2etest
+from gobtest.e2e.e2etest import E2ETest
+from gobtest.e2e.expectations import ExpectationIndex, expect_filename, expectation_index
+from gobtest.e2e.notifications import process_notifications
+from gobtest.e2e.runs import run_registry
+
+SCENARIOS = ["suites", "wait", "check"]
+
+
+class CollectingLogger:
+    """Stand-in for the GOB logger, counts the messages per level."""
+
+    def __init__(self) -> None:
+        self.messages: dict[str, list[str]] = {"info": [], "warning": [], "error": []}
+
+    def info(self, message: str) -> None:
+        """Collect a message of level info."""
+        self.messages["info"].append(message)
+
+    def warning(self, message: str) -> None:
+        """Collect a message of level warning."""
+        self.messages["warning"].append(message)
+
+    def error(self, message: str) -> None:
+        """Collect a message of level error."""
+        self.messages["error"].append(message)
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of messages per level."""
+        return {level: len(messages) for level, messages in self.messages.items()}
+
+
+class LocalWorkflow:
+    """Run the dynamic workflows of the end-to-end tests in local threads, instead of GOB-Workflow."""
+
+    def __init__(self, gob: StandInGOB, job_duration: float):
+        """Initialise LocalWorkflow.
+
+        :param gob: The stand-in, every step of a workflow is registered as a job of its process
+        :param job_duration: Number of seconds that every import and relate takes
+        """
+        self.gob = gob
+        self.job_duration = job_duration
+        self.threads: list[threading.Thread] = []
+
+    def start_workflow(self, workflow: dict[str, Any], args: dict[str, Any]) -> None:
+        """Start a dynamic workflow in a new thread, replaces gobcore.workflow.start_workflow."""
+        header = args["header"]
+        thread = threading.Thread(target=self.run, args=(header["workflow"], header["process_id"]), daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def run(self, workflow: list[Any], process_id: str) -> None:
+        """Run the steps of :workflow: as jobs of :process_id:, the steps of a failed run are skipped."""
+        test = E2ETest(process_id)
+        for step in workflow:
+            job_id = self.gob.start_job(process_id)
+            status = "ended"
+            try:
+                if run_registry.failure(process_id) is None:
+                    self._step(test, step)
+            except Exception as e:
+                # Like a job in GOB, an exception fails the job and the process continues
+                print(f"Step {step.get('step_name', step.get('workflow'))} of {process_id} failed: {str(e)}")
+                status = "failed"
+            self.gob.end_job(process_id, job_id, status)
+            # The events notification of the job
+            process_notifications.notify(process_id)
+
+    def _step(self, test: E2ETest, step: dict[str, Any]) -> None:
+        header = step["header"]
+        if step["type"] == "workflow":
+            # Import or relate
+            time.sleep(self.job_duration)
+        elif step["step_name"] == END_TO_END_EXECUTE:
+            test.execute_workflow(header["execute"], header["execute_process_id"])
+        elif step["step_name"] == END_TO_END_WAIT:
+            test.wait(header["wait_for_process_id"], header["seconds"])
+        elif step["step_name"] == END_TO_END_CHECK:
+            expectation = expectation_index.get(header["expect"])
+            self.gob.set_response(header["endpoint"], "".join(f"{line}\n" for line in expectation.lines))
+            if header.get("wait_for_process_id"):
+                test.converge(
+                    header["endpoint"],
+                    header["expect"],
+                    header["description"],
+                    header["wait_for_process_id"],
+                    header["seconds"],
+                )
+            else:
+                test.check(header["endpoint"], header["expect"], header["description"])
+
+    def join(self) -> None:
+        """Wait for all workflows to finish."""
+        while self.threads:
+            self.threads.pop().join()
+
+
+class Harness:
+    """Point E2ETest to a running stand-in, with its workflows run by LocalWorkflow."""
+
+    def __init__(self, latency: float = 0.0, job_duration: float = 0.0):
+        self.gob = StandInGOB(latency)
+        self.workflow = LocalWorkflow(self.gob, job_duration)
+        self.logger = CollectingLogger()
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "Harness":
+        """Start the stand-in and point E2ETest to it."""
+        url = self.gob.start()
+        self._stack.callback(self.gob.stop)
+        self._stack.enter_context(
+            patch.multiple(
+                e2etest,
+                MANAGEMENT_API_PUBLIC_BASE=f"{url}{MANAGEMENT_API_BASE}",
+                start_workflow=self.workflow.start_workflow,
+                logger=self.logger,
+                # Every workflow runs in a thread of its own, a wait does not occupy a consumer
+                concurrent_waits=lambda: math.inf,
+            )
+        )
+        self._stack.enter_context(patch.object(E2ETest, "api_base", f"{url}{API_BASE}"))
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Restore E2ETest and stop the stand-in."""
+        self._stack.close()
+
+    def result(self, seconds: float, **kwargs: Any) -> dict[str, Any]:
+        """Return the result of a scenario with the request counts and the logged messages per level."""
+        return {
+            "seconds": round(seconds, 3),
+            **kwargs,
+            "requests": dict(self.gob.requests),
+            "messages": self.logger.counts(),
+        }
+
+
+def run_suites(latency: float, job_duration: float, suites: Optional[list[str]] = None) -> dict[str, Any]:
+    """Run the end-to-end test suites against the stand-in."""
+    with Harness(latency, job_duration) as harness:
+        start = time.perf_counter()
+        test = E2ETest("benchmark.e2e_test")
+        test.cleartests()
+        harness.workflow.run(test.get_workflow(suites), test.process_id)
+        harness.workflow.join()
+        return harness.result(time.perf_counter() - start)
+
+
+def run_wait(latency: float, job_duration: float, processes: int, jobs: int) -> dict[str, Any]:
+    """Wait for :processes: concurrent processes of :jobs: imports each, in a wait consumer thread per process."""
+    with Harness(latency, job_duration) as harness:
+        start = time.perf_counter()
+        test = E2ETest("benchmark.wait")
+        workflow = [test._import_workflow_definition("test_catalogue", "test_entity", "ADD")] * jobs
+        process_ids = [f"benchmark.wait.{n}" for n in range(processes)]
+        for process_id in process_ids:
+            test.execute_workflow(workflow, process_id)
+        with ThreadPoolExecutor(max_workers=processes) as executor:
+            finished = list(executor.map(lambda process_id: test.wait(process_id, 600), process_ids))
+        seconds = time.perf_counter() - start
+        harness.workflow.join()
+        # The overhead of the waits on top of the duration of the jobs
+        overhead = seconds - jobs * job_duration
+        return harness.result(seconds, finished=sum(finished), overhead_seconds=round(overhead, 3))
+
+
+def run_check(latency: float, rows: int, checks: int) -> dict[str, Any]:
+    """Check an endpoint with :rows: lines of output :checks: times."""
+    endpoint = "/test_catalogue/test_entity/?ndjson=true"
+    body = synthetic_ndjson(rows)
+    with tempfile.TemporaryDirectory() as tmpdir, Harness(latency) as harness:
+        with open(f"{tmpdir}/{expect_filename('BENCHMARK')}", "w") as f:
+            f.write(body)
+        harness.gob.set_response(endpoint, body)
+        with patch.object(e2etest, "expectation_index", ExpectationIndex(tmpdir)):
+            start = time.perf_counter()
+            for _ in range(checks):
+                E2ETest("benchmark.check").check(endpoint, "BENCHMARK", "Benchmark")
+            seconds = time.perf_counter() - start
+        return harness.result(seconds, rows=rows, lines_per_second=round(rows * checks / seconds, 1))
+
+
+def run(scenarios: list[str], latency: float, job_duration: float, **options: Any) -> dict[str, dict[str, Any]]:
+    """Run the given scenarios, return the results by scenario."""
+    results = {}
+    for scenario in scenarios:
+        print(f"Run {scenario}")
+        if scenario == "suites":
+            results[scenario] = run_suites(latency, job_duration, options.get("suites"))
+        elif scenario == "wait":
+            results[scenario] = run_wait(latency, job_duration, options["processes"], options["jobs"])
+        else:
+            results[scenario] = run_check(latency, options["rows"], options["checks"])
+        print(f"{scenario}: {results[scenario]}")
+    return results
@@ -0,0 +1,148 @@
+"""Local stand-in for the GOB API and the GOB management API.
+
+The stand-in serves the endpoints that are used by E2ETest:
+
+- GET /gob/public/<endpoint>: the test catalogue NDJSON and relation CSV output, as set by set_response
+- DELETE /gob/public/alltests/: clear the tests
+- GET /gob_management/public/state/workflow: the pending messages of the workflow queues
+- GET /gob_management/public/state/process/<process id>: the jobs of a process, as registered by start_job
+
+Every request is delayed by the configured latency. The stand-in keeps count of the requests per endpoint kind.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+API_BASE = "/gob/public"
+MANAGEMENT_API_BASE = "/gob_management/public"
+PROCESS_STATE = f"{MANAGEMENT_API_BASE}/state/process/"
+WORKFLOW_STATE = f"{MANAGEMENT_API_BASE}/state/workflow"
+CLEAR_TESTS = f"{API_BASE}/alltests/"
+
+
+def synthetic_ndjson(rows: int) -> str:
+    """Return :rows: lines of test entity NDJSON output."""
+    return "".join(
+        json.dumps({"string": f"string {i}", "integer": i, "decimal": i / 100, "reference": {"bronwaarde": f"ref {i}"}})
+        + "\n"
+        for i in range(rows)
+    )
+
+
+class StandInGOB:
+    """Stand-in GOB API and management API, served by a local HTTP server."""
+
+    def __init__(self, latency: float = 0.0, pending_messages: int = 0):
+        """Initialise StandInGOB.
+
+        :param latency: Number of seconds that every request is delayed
+        :param pending_messages: Number of pending messages that are reported for the workflow queues
+        """
+        self.latency = latency
+        self.pending_messages = pending_messages
+        self.requests: Counter[str] = Counter()
+
+        self._lock = threading.Lock()
+        self._jobs: dict[str, list[dict[str, Any]]] = {}
+        self._job_ids = 0
+        self._responses: dict[str, bytes] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Return the base url of the running server."""
+        assert self._server, "Server not started"
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> str:
+        """Start the server on a free local port, return its url."""
+        gob = self
+
+        class Handler(_Handler):
+            stand_in = gob
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="StandInGOB", daemon=True).start()
+        return self.url
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def set_response(self, endpoint: str, body: str) -> None:
+        """Serve :body: for GET :endpoint:, eg /test_catalogue/test_entity/?ndjson=true."""
+        with self._lock:
+            self._responses[f"{API_BASE}{endpoint}"] = body.encode()
+
+    def start_job(self, process_id: str) -> int:
+        """Register a started job for :process_id:, return the job id."""
+        with self._lock:
+            self._job_ids += 1
+            self._jobs.setdefault(process_id, []).append({"id": self._job_ids, "status": "started"})
+            return self._job_ids
+
+    def end_job(self, process_id: str, job_id: int, status: str = "ended") -> None:
+        """Register the end of job :job_id: of :process_id:."""
+        with self._lock:
+            for job in self._jobs[process_id]:
+                if job["id"] == job_id:
+                    job["status"] = status
+
+    def get(self, path: str) -> tuple[int, bytes]:
+        """Return the status code and body for GET :path:."""
+        if path == WORKFLOW_STATE:
+            self._count("workflow")
+            return 200, json.dumps([{"name": "workflow", "messages_unacknowledged": self.pending_messages}]).encode()
+
+        if path.startswith(PROCESS_STATE):
+            self._count("process")
+            with self._lock:
+                jobs = self._jobs.get(path.removeprefix(PROCESS_STATE), [])
+                return 200, json.dumps(jobs).encode()
+
+        self._count("api")
+        with self._lock:
+            body = self._responses.get(path)
+        return (404, b"") if body is None else (200, body)
+
+    def delete(self, path: str) -> int:
+        """Return the status code for DELETE :path:."""
+        self._count("delete")
+        return 200 if path == CLEAR_TESTS else 404
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    stand_in: StandInGOB
+    protocol_version = "HTTP/1.1"  # Keep connections alive, like the GOB API
+
+    def do_GET(self) -> None:
+        time.sleep(self.stand_in.latency)
+        status, body = self.stand_in.get(self.path)
+        self._respond(status, body)
+
+    def do_DELETE(self) -> None:
+        time.sleep(self.stand_in.latency)
+        self._respond(self.stand_in.delete(self.path), b"")
+
+    def _respond(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Do not log every request."""
@@ -1,3 +1,8 @@
-from gobcore.model import GOBModel
+from gobtest.profiling import startup_profiler
 
-gob_model = GOBModel()
+# Time the imports of the service, if enabled
+startup_profiler.install()
+
+from gobtest.model import gob_model  # noqa: E402
+
+__all__ = ["gob_model", "startup_profiler"]
@@ -1,5 +1,6 @@
+from typing import Any
+
 from gobcore.message_broker.config import (
-    DATA_CONSISTENCY_TEST,
     DATA_CONSISTENCY_TEST_QUEUE,
     DATA_CONSISTENCY_TEST_RESULT_KEY,
     END_TO_END_CHECK_QUEUE,
@@ -15,23 +16,26 @@ from gobcore.message_broker.config import (
 from gobcore.message_broker.messagedriven_service import messagedriven_service
 from gobcore.message_broker.notifications import get_notification, listen_to_notifications
 from gobcore.message_broker.typing import ServiceDefinition
-from gobcore.workflow.start_workflow import start_workflow
 
+from gobtest.config import E2E_WAIT_MODE, SERVICE_WORKERS
 from gobtest.data_consistency.handler import can_handle, data_consistency_test_handler
+from gobtest.data_consistency.trigger import coalescer
+from gobtest.e2e.expectations import expectation_index
 from gobtest.e2e.handler import (
     end_to_end_check_handler,
     end_to_end_execute_workflow_handler,
+    end_to_end_notification_handler,
     end_to_end_test_handler,
     end_to_end_wait_handler,
 )
+from gobtest.profiling import startup_profiler
+from gobtest.workers import apply_worker_config, parse_worker_config
 
 
 def on_events_listener(msg):
     """On events listener."""
     notification = get_notification(msg)
 
-    workflow = {"workflow_name": DATA_CONSISTENCY_TEST}
-
     arguments = {
         "catalogue": notification.header.get("catalogue"),
         "collection": notification.header.get("collection"),
@@ -40,7 +44,25 @@ def on_events_listener(msg):
 
     if can_handle(**arguments):
         arguments["process_id"] = notification.header.get("process_id")
-        start_workflow(workflow, arguments)
+        # Identical triggers in quick succession result in one data consistency test
+        coalescer.trigger(arguments)
+
+
+def wait_service(wait_mode: str) -> dict[str, Any]:
+    """Return the service of the wait steps.
+
+    In reschedule wait mode the wait handler publishes the results itself, the service has no report.
+    """
+    service: dict[str, Any] = {
+        "queue": END_TO_END_WAIT_QUEUE,
+        "handler": end_to_end_wait_handler,
+    }
+    if wait_mode != "reschedule":
+        service["report"] = {
+            "exchange": WORKFLOW_EXCHANGE,
+            "key": END_TO_END_WAIT_RESULT_KEY,
+        }
+    return service
 
 
 SERVICEDEFINITION: ServiceDefinition = {
@@ -60,13 +82,10 @@ SERVICEDEFINITION: ServiceDefinition = {
             "key": END_TO_END_CHECK_RESULT_KEY,
         },
     },
-    "e2e_test_wait": {
-        "queue": END_TO_END_WAIT_QUEUE,
-        "handler": end_to_end_wait_handler,
-        "report": {
-            "exchange": WORKFLOW_EXCHANGE,
-            "key": END_TO_END_WAIT_RESULT_KEY,
-        },
+    "e2e_test_wait": wait_service(E2E_WAIT_MODE),
+    "e2e_test_wait_listener": {
+        "queue": lambda: listen_to_notifications("e2e_test_wait", "events"),
+        "handler": end_to_end_notification_handler,
     },
     "e2e_test_execute_workflow": {
         "queue": END_TO_END_EXECUTE_QUEUE,
@@ -94,7 +113,12 @@ SERVICEDEFINITION: ServiceDefinition = {
 def init():
     """Start messagedriven service."""
     if __name__ == "__main__":
-        messagedriven_service(SERVICEDEFINITION, "Test", {"thread_per_service": True})
+        # Fail at startup on malformed expectations
+        with startup_profiler.step("Load expectations"):
+            expectation_index.load()
+        definition = apply_worker_config(SERVICEDEFINITION, parse_worker_config(SERVICE_WORKERS))
+        startup_profiler.log_report()
+        messagedriven_service(definition, "Test", {"thread_per_service": True})
 
 
 init()
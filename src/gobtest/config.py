@@ -3,3 +3,96 @@ import os
 API_HOST = os.getenv("API_HOST", "http://localhost:8141")
 MANAGEMENT_API_HOST = os.getenv("MANAGEMENT_API_HOST", "http://localhost:8143")
 MANAGEMENT_API_PUBLIC_BASE = f"{MANAGEMENT_API_HOST}/gob_management/public"
+
+# Window in which data consistency test triggers for the same catalogue/collection/application are coalesced
+DATA_CONSISTENCY_TEST_TRIGGER_WINDOW = int(os.getenv("DATA_CONSISTENCY_TEST_TRIGGER_WINDOW", "60"))
+# Max age of a running test after which a new trigger is accepted again (the test is assumed to be lost)
+DATA_CONSISTENCY_TEST_TRIGGER_MAX_AGE = int(os.getenv("DATA_CONSISTENCY_TEST_TRIGGER_MAX_AGE", str(6 * 60 * 60)))
+# Max age of a test that has been started but is not running in this service instance, eg because it is run by another
+# instance, after which a new trigger is accepted again
+DATA_CONSISTENCY_TEST_TRIGGER_START_TIMEOUT = int(os.getenv("DATA_CONSISTENCY_TEST_TRIGGER_START_TIMEOUT", "600"))
+# Directory for Prometheus textfiles with data consistency test metrics, metrics are not written if not set
+DATA_CONSISTENCY_TEST_METRICS_DIR = os.getenv("DATA_CONSISTENCY_TEST_METRICS_DIR")
+# Count the (approximate) bytes fetched from the source, this sizes every fetched row and slows down the test
+DATA_CONSISTENCY_TEST_COUNT_BYTES = os.getenv("DATA_CONSISTENCY_TEST_COUNT_BYTES", "false").lower() == "true"
+
+# Worker pools per service, comma separated <service>=<workers>[:<thread|process>[:<prefetch>]]
+# Example: data_consistency_test=2:process:4,e2e_test_wait=8,e2e_test_check=8
+# By default every service has a single consumer
+# The end-to-end test suites run in parallel if every suite and the final join can occupy a wait consumer, eg with
+# e2e_test_wait=8, else they run one after the other. In converge check mode the suites also occupy check consumers
+SERVICE_WORKERS = os.getenv("SERVICE_WORKERS", "")
+
+# Number of worker processes in which data consistency tests are run isolated from the service, 0 to run in-process
+# Isolated workers cannot be combined with the process mode of the data_consistency_test service (SERVICE_WORKERS)
+DATA_CONSISTENCY_TEST_ISOLATED_WORKERS = int(os.getenv("DATA_CONSISTENCY_TEST_ISOLATED_WORKERS", "0"))
+# Recycle an isolated worker process after this number of tests, 0 for no limit
+DATA_CONSISTENCY_TEST_WORKER_MAX_RUNS = int(os.getenv("DATA_CONSISTENCY_TEST_WORKER_MAX_RUNS", "10"))
+# Recycle an isolated worker process when its peak RSS exceeds this number of MB, 0 for no limit
+DATA_CONSISTENCY_TEST_WORKER_MAX_RSS_MB = int(os.getenv("DATA_CONSISTENCY_TEST_WORKER_MAX_RSS_MB", "2048"))
+
+# Wait mode of the end-to-end wait step
+# - blocking: the wait handler checks the process until it has finished
+# - reschedule: the wait handler schedules the checks and returns, the result is published when the wait is done
+E2E_WAIT_MODE = os.getenv("E2E_WAIT_MODE", "blocking")
+# Number of seconds after which a process without pending jobs is checked again to confirm that it has finished
+# A shorter interval finishes waits sooner, but reopens the race in which the workflow has accepted a message but
+# has not yet created the next job of the process, which is more likely in processes with many jobs
+E2E_WAIT_CONFIRM_SECONDS = float(os.getenv("E2E_WAIT_CONFIRM_SECONDS", "5"))
+# Number of seconds after which the process is confirmed when it has no pending jobs on a check that follows a
+# notification of the process. The notification is sent when the last job has applied its events, the next job of
+# the process (if any) is then a pending message, which requires another confirmation after E2E_WAIT_CONFIRM_SECONDS
+E2E_WAIT_NOTIFIED_CONFIRM_SECONDS = float(os.getenv("E2E_WAIT_NOTIFIED_CONFIRM_SECONDS", "1"))
+
+# Check mode of the end-to-end tests
+# - wait: every check is preceded by a wait until the process has finished
+# - converge: wait and check are fused, the endpoint is checked until it matches once the process has no jobs left
+E2E_CHECK_MODE = os.getenv("E2E_CHECK_MODE", "wait")
+
+# HTTP requests of the end-to-end tests to the GOB API and management API
+# Default timeout in seconds of a request
+E2E_HTTP_TIMEOUT = float(os.getenv("E2E_HTTP_TIMEOUT", "60"))
+# Max number of retries of a request on a connection error or server error (5xx)
+E2E_HTTP_RETRIES = int(os.getenv("E2E_HTTP_RETRIES", "3"))
+# Max number of connections that are kept alive per host, at least the number of concurrent end-to-end workers
+E2E_HTTP_POOL_SIZE = int(os.getenv("E2E_HTTP_POOL_SIZE", "16"))
+# Number of seconds that a process state from the management API is shared by concurrent end-to-end waits
+# Keep it below E2E_WAIT_NOTIFIED_CONFIRM_SECONDS, the shortest interval in which a finished process is confirmed
+E2E_PROCESS_STATE_TTL = float(os.getenv("E2E_PROCESS_STATE_TTL", "0.5"))
+# Max number of endpoint comparisons that are cached, the endpoints are requested conditionally, 0 to disable
+E2E_HTTP_RESPONSE_CACHE_SIZE = int(os.getenv("E2E_HTTP_RESPONSE_CACHE_SIZE", "256"))
+
+# Report the import time per module and the duration of the initialisation steps at startup, see profiling
+PROFILE_STARTUP = os.getenv("PROFILE_STARTUP", "false").lower() == "true"
+
+GOB_SHARED_DIR = os.getenv("GOB_SHARED_DIR", "/app/shared")
+
+# Load mode of the end-to-end tests
+# Directory to which the generated sources are written, the sources are imported from this directory
+E2E_LOAD_DIR = os.getenv("E2E_LOAD_DIR", os.path.join(GOB_SHARED_DIR, "e2e_load"))
+# Default number of entities that are generated per test entity
+E2E_LOAD_SIZE = int(os.getenv("E2E_LOAD_SIZE", "100000"))
+
+# Stress mode of the end-to-end tests
+# Default number of import and relate workflows that are run concurrently
+E2E_STRESS_WORKFLOWS = int(os.getenv("E2E_STRESS_WORKFLOWS", "12"))
+# Default number of seconds over which the starts of the workflows are spread
+E2E_STRESS_RAMP = float(os.getenv("E2E_STRESS_RAMP", "60"))
+# Default number of entities that are generated per test entity
+E2E_STRESS_SIZE = int(os.getenv("E2E_STRESS_SIZE", "10000"))
+# The workflow queues are considered backed up from this number of pending messages
+E2E_STRESS_BACKLOG = int(os.getenv("E2E_STRESS_BACKLOG", "100"))
+
+# Step timings of the end-to-end tests
+# Baseline step durations per suite, a suite without a baseline stores its step durations as its baseline
+E2E_BASELINE_FILE = os.getenv("E2E_BASELINE_FILE", os.path.join(GOB_SHARED_DIR, "e2e_baseline.json"))
+# A step has regressed when it takes more than this factor times its baseline duration
+E2E_REGRESSION_THRESHOLD = float(os.getenv("E2E_REGRESSION_THRESHOLD", "1.5"))
+# and when it takes at least this number of seconds longer than its baseline duration
+E2E_REGRESSION_MIN_SECONDS = float(os.getenv("E2E_REGRESSION_MIN_SECONDS", "5"))
+
+# Benchmark mode of the end-to-end tests
+# Default number of times (rounds) that the selected suites are run
+E2E_BENCHMARK_ROUNDS = int(os.getenv("E2E_BENCHMARK_ROUNDS", "5"))
+# Directory to which the benchmark results are written
+E2E_BENCHMARK_DIR = os.getenv("E2E_BENCHMARK_DIR", os.path.join(GOB_SHARED_DIR, "e2e_benchmark"))
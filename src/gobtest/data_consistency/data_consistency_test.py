@@ -19,6 +19,8 @@ from gobcore.typesystem.gob_types import JSON, IncompleteDate, Reference, get_kw
 from gobcore.utils import ProgressTicker
 
 from gobtest import gob_model
+from gobtest.config import DATA_CONSISTENCY_TEST_COUNT_BYTES
+from gobtest.data_consistency.instrumentation import Instrumentation, timed
 
 GOB_DB = "GOBDatabase"
 
@@ -91,6 +93,7 @@ class DataConsistencyTest:
         self.src_key_warnings: dict[str, str] = {}
         self.is_merged = self.source.get("merge") is not None
         self.compared_columns: list[str] = []
+        self.metrics = Instrumentation(count_bytes=DATA_CONSISTENCY_TEST_COUNT_BYTES)
 
         # Ignore enriched attributes by default
         self.ignore_columns = (
@@ -171,12 +174,30 @@ class DataConsistencyTest:
                     self.ignore_columns.append(attribute)
 
     def run(self) -> None:
-        """Run data consistency test."""
+        """Run data consistency test.
+
+        The total time is measured until the comparison has ended, also when it fails.
+        """
+        self.metrics.start()
+        try:
+            cnt, checked, success, missing, gob_count = self._compare()
+        finally:
+            self.metrics.stop()
+
+        logger.info(f"Aantal {self.catalog_name} {self.collection_name} in source: {cnt:,}")
+        logger.info(f"Ignored columns: {', '.join(self.ignore_columns)}")
+        logger.info(f"Compared columns: {', '.join(self.compared_columns)}")
+
+        self._log_result(checked, cnt, gob_count, missing, success)
+
+    def _compare(self) -> tuple[int, int, int, int, Optional[int]]:
+        """Compare the source rows with GOB, return the source, checked, success, missing and GOB counts."""
         self._connect()
         test_every = 1 / self.SAMPLE_SIZE
         random_offset = random.randint(0, int(test_every - 1))
 
-        rows = self._get_source_data()
+        # Time spent in the source cursor is registered as the source phase
+        rows = self.metrics.iterate("source", self._get_source_data())
         cnt = 0
         checked = 0
         success = 0
@@ -212,12 +233,9 @@ class DataConsistencyTest:
         if self.is_merged:
             cnt = self._get_expected_merge_cnt(merge_ids)
 
-        logger.info(f"Aantal {self.catalog_name} {self.collection_name} in source: {cnt:,}")
-        logger.info(f"Ignored columns: {', '.join(self.ignore_columns)}")
-        logger.info(f"Compared columns: {', '.join(self.compared_columns)}")
-
-        self._log_result(checked, cnt, gob_count, missing, success)
+        return cnt, checked, success, missing, gob_count
 
+    @timed("merge")
     def _get_expected_merge_cnt(self, merge_ids: list[str]) -> int:
         merge_def = self.source.get("merge")
 
@@ -293,6 +311,7 @@ class DataConsistencyTest:
             # Don't report about something already noticed in the source
             self.gob_key_errors[attr_name] = msg
 
+    @timed("geometry")
     def _geometry_to_wkt(self, geo_value: str) -> Optional[str]:
         if geo_value is None:
             return None
@@ -340,6 +359,7 @@ class DataConsistencyTest:
                 value = self._normalise_wkt(value)
         return value
 
+    @timed("transform")
     def _transform_source_row(self, source_row: dict[str, str]) -> dict[str, Any]:
         """Transform rows from source database.
 
@@ -540,6 +560,7 @@ class DataConsistencyTest:
             return {f"{attr_name}_{k}": self._extract_attr_from_dict_list(k, gob_value) for k in keys}
         return {f"{attr_name}_{k}": gob_value.get(k) for k in keys}
 
+    @timed("transform")
     def _transform_gob_row(self, gob_row: dict[str, str]):
         ignore_source_mapping_keys = ["format", FIELD.START_VALIDITY, FIELD.END_VALIDITY]
         row = self._normalise_geometries(gob_row)
@@ -594,6 +615,7 @@ WHERE
     {where}
 """
 
+    @timed("gob_count")
     def _get_gob_count(self) -> Optional[int]:
         """Return the number of entities in GOB.
 
@@ -668,6 +690,7 @@ WHERE
 
         return start_error_cnt == len(logger.get_errors())
 
+    @timed("compare")
     def _find_mismatches(self, expected_values: dict[str, str], gob_row: dict[str, str]) -> list[tuple[str, str, str]]:
         """Find mismatching values between `expected_values` and `gob_row`.
 
@@ -691,6 +714,7 @@ WHERE
     def _get_row_id(self, source_row: dict[str, str]) -> Optional[str]:
         return source_row.get(self.entity_id_field)
 
+    @timed("gob_lookup", latency=True)
     def _get_matching_gob_rows(self, source_row: dict[str, str]) -> Optional[list[dict[str, str]]]:
         """Get matching GOB rows.
 
@@ -731,6 +755,7 @@ WHERE
     def _get_source_data(self):
         """Get the source data using a server-side cursor."""
         qry = "\n".join(self.source.get("query", []))
+        self.metrics.count("source_queries")
         return self.src_datastore.query(qry, name="test_src_db_cursor", arraysize=self.BATCH_SIZE, withhold=True)
 
     def _get_merge_data(self):
@@ -747,6 +772,7 @@ WHERE
             get_datastore_config(merge_source["application"]), merge_source.get("read_config", {})
         )
         merge_connection.connect()
+        self.metrics.count("merge_queries")
         return merge_connection.query("\n".join(merge_source.get("query", [])))
 
     def _connect(self) -> None:
@@ -773,6 +799,7 @@ WHERE
         :param query:
         :return:
         """
+        self.metrics.count("gob_queries")
         try:
             db_result: Iterator[tuple[Any, Any]] = self.gob_db.query(
                 query, name="test_gob_db_cursor", arraysize=self.BATCH_SIZE, withhold=True
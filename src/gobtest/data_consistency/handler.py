@@ -1,15 +1,35 @@
 import datetime
-from typing import Optional
+import os
+import re
+from typing import Any, ContextManager, Optional
 
 from gobconfig.exception import GOBConfigException
 from gobcore.exceptions import GOBException
 from gobcore.logging.logger import logger
 
+from gobtest.config import (
+    DATA_CONSISTENCY_TEST_ISOLATED_WORKERS,
+    DATA_CONSISTENCY_TEST_METRICS_DIR,
+    DATA_CONSISTENCY_TEST_WORKER_MAX_RSS_MB,
+    DATA_CONSISTENCY_TEST_WORKER_MAX_RUNS,
+)
 from gobtest.data_consistency.data_consistency_test import (
     DataConsistencyTest,
     NotImplementedApplicationError,
     NotImplementedCatalogError,
 )
+from gobtest.data_consistency.trigger import coalescer, trigger_key
+from gobtest.workers import ProcessPool, WorkerProcessError, consumer_context, starts_processes
+
+isolated_workers = (
+    ProcessPool(
+        DATA_CONSISTENCY_TEST_ISOLATED_WORKERS,
+        DATA_CONSISTENCY_TEST_WORKER_MAX_RUNS,
+        DATA_CONSISTENCY_TEST_WORKER_MAX_RSS_MB,
+    )
+    if DATA_CONSISTENCY_TEST_ISOLATED_WORKERS
+    else None
+)
 
 
 def can_handle(catalogue: str, collection: str, application: Optional[str] = None):
@@ -31,24 +51,40 @@ def can_handle(catalogue: str, collection: str, application: Optional[str] = Non
         )
 
 
-def data_consistency_test_handler(msg):
-    """Request to run data consistency tests.
+def _report_metrics(tester: DataConsistencyTest) -> dict[str, Any]:
+    """Return the metrics of the test and write them as Prometheus textfile if a metrics directory is configured.
 
-    :param msg:
+    :param tester:
     :return:
     """
-    catalog = msg["header"].get("catalogue")
-    collection = msg["header"].get("collection")
-    application = msg["header"].get("application")
-    msg["header"]["entity"] = msg["header"].get("entity", collection)
+    if DATA_CONSISTENCY_TEST_METRICS_DIR:
+        labels = {
+            "catalogue": tester.catalog_name,
+            "collection": tester.collection_name,
+            "application": tester.application or "",
+        }
+        filename = re.sub(r"\W", "_", "_".join(["gobtest_data_consistency", *labels.values()]))
+        tester.metrics.write_prometheus(os.path.join(DATA_CONSISTENCY_TEST_METRICS_DIR, f"{filename}.prom"), labels)
 
-    assert all([catalog, collection]), "Expecting header attributes 'catalogue' and 'collection'"
+    return tester.metrics.summary()
+
+
+def _run_data_consistency_test(catalog: str, collection: str, application: Optional[str]) -> dict[str, Any]:
+    """Run the data consistency test, return the summary.
+
+    :param catalog:
+    :param collection:
+    :param application:
+    :return:
+    """
     id = f"{catalog} {collection} {application or ''}"
     # No return value. Results are captured by logger.
     logger.info(f"Data consistency test {id} started")
+    metrics = None
     try:
         with DataConsistencyTest(catalog, collection, application) as tester:
             tester.run()
+            metrics = _report_metrics(tester)
     except GOBConfigException as e:
         logger.error(f"Dataset connection failed: {str(e)}")
     except (NotImplementedCatalogError, NotImplementedApplicationError, GOBException) as e:
@@ -56,10 +92,68 @@ def data_consistency_test_handler(msg):
     else:
         logger.info(f"Data consistency test {id} ended")
 
+    return {
+        **logger.get_summary(),
+        **({"metrics": metrics} if metrics else {}),
+    }
+
+
+def _run_isolated(msg: dict[str, Any], catalog: str, collection: str, application: Optional[str]) -> dict[str, Any]:
+    """Run the data consistency test in an isolated worker process, only the summary is returned to the service.
+
+    :param msg:
+    :param catalog:
+    :param collection:
+    :param application:
+    :return:
+    """
+    # The logger configuration of the service is not available in the worker process
+    logger.configure(msg, "DATA_CONSISTENCY_TEST")
+    return _run_data_consistency_test(catalog, collection, application)
+
+
+def _running(msg: dict[str, Any]) -> ContextManager[None]:
+    """Register the test of :msg: as running, to skip identical triggers while it runs.
+
+    :param msg:
+    :return:
+    """
+    header = msg["header"]
+    return coalescer.running(trigger_key(header.get("catalogue"), header.get("collection"), header.get("application")))
+
+
+@consumer_context(_running)
+@starts_processes(isolated_workers is not None)
+def data_consistency_test_handler(msg):
+    """Request to run data consistency tests.
+
+    The test is run in an isolated worker process if isolated workers are configured, the handler itself
+    cannot then run in a worker process.
+    In process worker mode the test is also registered as running in the service process, see consumer_context.
+
+    :param msg:
+    :return:
+    """
+    catalog = msg["header"].get("catalogue")
+    collection = msg["header"].get("collection")
+    application = msg["header"].get("application")
+    msg["header"]["entity"] = msg["header"].get("entity", collection)
+
+    assert all([catalog, collection]), "Expecting header attributes 'catalogue' and 'collection'"
+    with _running(msg):
+        if isolated_workers:
+            try:
+                summary = isolated_workers.run(_run_isolated, msg, catalog, collection, application)
+            except WorkerProcessError as e:
+                logger.error(f"Dataset test failed: {str(e)}")
+                summary = logger.get_summary()
+        else:
+            summary = _run_data_consistency_test(catalog, collection, application)
+
     return {
         "header": {
             **msg.get("header", {}),
             "timestamp": datetime.datetime.utcnow().isoformat(),
         },
-        "summary": logger.get_summary(),
+        "summary": summary,
     }
@@ -0,0 +1,187 @@
+"""Per-phase timing and throughput instrumentation.
+
+Phases are timed exclusively: time spent in a nested phase is not counted in the enclosing phase.
+This allows to tell whether the time of a data consistency test goes to the source cursor, GOB lookups,
+geometry conversions, transformations or comparisons.
+"""
+
+import math
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+METRIC_PREFIX = "gobtest_data_consistency"
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Return the nearest-rank percentile of the given values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _row_size(row: Any) -> int:
+    """Return the approximate number of bytes of a row as fetched from a datastore."""
+    values = row.values() if hasattr(row, "values") else [row]
+    return sum(len(str(value)) for value in values if value is not None)
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentation:
+    """Collect cumulative wall and CPU time per phase, counters and latencies."""
+
+    PERCENTILES = [50, 95, 99]
+
+    def __init__(self, count_bytes: bool = False) -> None:
+        """Initialise Instrumentation.
+
+        :param count_bytes: Count the bytes of the fetched rows, sizing every row adds overhead to the iteration
+        """
+        self.count_bytes = count_bytes
+        # Phase name => {"wall": seconds, "cpu": seconds, "calls": count}
+        self.phases: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, int] = {}
+        self.latencies: dict[str, list[float]] = {}
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        # Wall and CPU time of nested phases for every active phase
+        self._nested: list[list[float]] = []
+        self._start: Optional[tuple[float, float]] = None
+
+    def start(self) -> None:
+        """Start measuring the total wall and CPU time."""
+        self._start = time.perf_counter(), time.thread_time()
+
+    def stop(self) -> None:
+        """Stop measuring the total wall and CPU time."""
+        if self._start:
+            wall, cpu = self._start
+            self.wall_time += time.perf_counter() - wall
+            self.cpu_time += time.thread_time() - cpu
+            self._start = None
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment counter :name: with :value:."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name: str, latency: bool = False) -> Iterator[None]:
+        """Time the code within the context as phase :name:.
+
+        :param name: The name of the phase
+        :param latency: Register the (inclusive) duration of each call to calculate latency percentiles
+        """
+        nested = [0.0, 0.0]
+        self._nested.append(nested)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            self._nested.pop()
+            if self._nested:
+                # Exclude the time of this phase from the enclosing phase
+                self._nested[-1][0] += wall
+                self._nested[-1][1] += cpu
+
+            totals = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            totals["wall"] += wall - nested[0]
+            totals["cpu"] += cpu - nested[1]
+            totals["calls"] += 1
+
+            if latency:
+                self.latencies.setdefault(name, []).append(wall)
+
+    def iterate(self, name: str, rows: Iterable[T]) -> Iterator[T]:
+        """Iterate over :rows:, time fetching each row as phase :name: and count rows, and bytes if enabled."""
+        iterator = iter(rows)
+        while True:
+            with self.phase(name):
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    return
+            self.count("rows")
+            if self.count_bytes:
+                self.count("bytes_fetched", _row_size(row))
+            yield row
+
+    def summary(self) -> dict[str, Any]:
+        """Return a summary of all measurements."""
+        rows = self.counters.get("rows", 0)
+        return {
+            "wall_time": round(self.wall_time, 3),
+            "cpu_time": round(self.cpu_time, 3),
+            "rows_per_second": round(rows / self.wall_time, 1) if self.wall_time else None,
+            "phases": {
+                name: {"wall": round(totals["wall"], 3), "cpu": round(totals["cpu"], 3), "calls": int(totals["calls"])}
+                for name, totals in self.phases.items()
+            },
+            "counters": dict(self.counters),
+            "latencies": {
+                name: {f"p{pct}": round(percentile(values, pct) or 0, 4) for pct in self.PERCENTILES}
+                for name, values in self.latencies.items()
+            },
+        }
+
+    def to_prometheus(self, labels: dict[str, Any]) -> str:
+        """Return the measurements in Prometheus text exposition format."""
+        lines: list[str] = []
+
+        def metric(name: str, type_: str, help_: str, samples: list[tuple[dict[str, Any], float]]) -> None:
+            lines.extend([f"# HELP {METRIC_PREFIX}_{name} {help_}", f"# TYPE {METRIC_PREFIX}_{name} {type_}"])
+            for extra_labels, value in samples:
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in {**labels, **extra_labels}.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_str}}} {value}")
+
+        summary = self.summary()
+        metric("wall_seconds", "gauge", "Total wall time of the test", [({}, summary["wall_time"])])
+        metric("cpu_seconds", "gauge", "Total CPU time of the test", [({}, summary["cpu_time"])])
+        metric("rows_per_second", "gauge", "Source rows processed per second", [({}, summary["rows_per_second"] or 0)])
+
+        phases = summary["phases"].items()
+        metric("phase_wall_seconds", "gauge", "Wall time per phase", [({"phase": p}, t["wall"]) for p, t in phases])
+        metric("phase_cpu_seconds", "gauge", "CPU time per phase", [({"phase": p}, t["cpu"]) for p, t in phases])
+        metric("phase_calls", "gauge", "Number of calls per phase", [({"phase": p}, t["calls"]) for p, t in phases])
+
+        for name, value in summary["counters"].items():
+            metric(name, "gauge", f"Number of {name.replace('_', ' ')}", [({}, value)])
+
+        for name, pcts in summary["latencies"].items():
+            samples = [({"quantile": str(int(pct[1:]) / 100)}, value) for pct, value in pcts.items()]
+            metric(f"{name}_latency_seconds", "summary", f"Latency of {name.replace('_', ' ')}", samples)
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, labels: dict[str, Any]) -> None:
+        """Write the measurements as a Prometheus textfile.
+
+        The file is written atomically, so a textfile collector never reads a partially written file.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus(labels))
+        os.replace(tmp_path, path)
+
+
+def timed(name: str, latency: bool = False) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Time each call of the decorated method as phase :name: in the instrumentation of its instance."""
+
+    def decorator(method: Callable[..., T]) -> Callable[..., T]:
+        @wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+            with self.metrics.phase(name, latency):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
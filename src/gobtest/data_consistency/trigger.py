@@ -0,0 +1,145 @@
+"""Coalesce data consistency test triggers.
+
+An import workflow can produce several events notifications for the same catalogue, collection and application
+in quick succession. Each of these notifications would start an identical and expensive data consistency test.
+
+Triggers for the same key are collapsed into one pending test within a configurable window.
+Triggers for a test that is already running are skipped.
+
+The bookkeeping is kept per service process. A test that has been started is registered as running once its
+handler runs in this process (see running), in process worker mode the handler registers it in the service process.
+A started test that does not run in this process, eg because it is handled by another service instance, is no
+longer registered after the start timeout.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from gobcore.logging.logger import logger
+from gobcore.message_broker.config import DATA_CONSISTENCY_TEST
+from gobcore.workflow.start_workflow import start_workflow
+
+from gobtest.config import (
+    DATA_CONSISTENCY_TEST_TRIGGER_MAX_AGE,
+    DATA_CONSISTENCY_TEST_TRIGGER_START_TIMEOUT,
+    DATA_CONSISTENCY_TEST_TRIGGER_WINDOW,
+)
+
+TriggerKey = tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def trigger_key(catalogue: Optional[str], collection: Optional[str], application: Optional[str] = None) -> TriggerKey:
+    """Return the key that identifies identical data consistency tests."""
+    return catalogue, collection, application or None
+
+
+class TriggerCoalescer:
+    """Collapse identical data consistency test triggers into one test."""
+
+    def __init__(
+        self, start: Callable[[dict[str, Any]], None], window: float, max_active_age: float, start_timeout: float
+    ):
+        """Initialise TriggerCoalescer.
+
+        :param start: Function that starts the test for the given arguments
+        :param window: Number of seconds to collect triggers for the same key before the test is started
+        :param max_active_age: Number of seconds after which a running test is assumed to be lost
+        :param start_timeout: Number of seconds after which a started test that does not run in this process is
+            assumed to be run elsewhere or to be lost
+        """
+        self._start = start
+        self._window = window
+        self._max_active_age = max_active_age
+        self._start_timeout = start_timeout
+        self._lock = threading.Lock()
+        # Arguments of the tests that wait for their window to expire
+        self._pending: dict[TriggerKey, dict[str, Any]] = {}
+        # Start time of the tests that have been started, but that do not run in this process (yet)
+        self._started: dict[TriggerKey, float] = {}
+        # Start time of the tests that are running in this process
+        self._active: dict[TriggerKey, float] = {}
+
+    def trigger(self, arguments: dict[str, Any]) -> bool:
+        """Register a trigger for a data consistency test.
+
+        :param arguments: The workflow arguments (catalogue, collection, application and process_id)
+        :return: True if the trigger results in a new test, False if it has been coalesced or skipped
+        """
+        key = trigger_key(arguments.get("catalogue"), arguments.get("collection"), arguments.get("application"))
+
+        with self._lock:
+            if self._is_active(key):
+                logger.info(f"Data consistency test {key} is already running, skip trigger")
+                return False
+
+            is_pending = key in self._pending
+            # The arguments of the latest trigger are used, eg its process id
+            self._pending[key] = arguments
+
+        if is_pending:
+            logger.info(f"Data consistency test {key} is already pending, coalesce trigger")
+            return False
+
+        if self._window > 0:
+            timer = threading.Timer(self._window, self._fire, args=(key,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._fire(key)
+        return True
+
+    @contextmanager
+    def running(self, key: TriggerKey) -> Iterator[None]:
+        """Register the test for the given key as running within the context."""
+        with self._lock:
+            self._started.pop(key, None)
+            self._active[key] = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(key, None)
+
+    def _fire(self, key: TriggerKey) -> None:
+        with self._lock:
+            arguments = self._pending.pop(key)
+            self._started[key] = time.monotonic()
+
+        try:
+            self._start(arguments)
+        except Exception:
+            # Do not block subsequent triggers for a test that has never been started
+            with self._lock:
+                self._started.pop(key, None)
+            raise
+
+    def _is_active(self, key: TriggerKey) -> bool:
+        running = _is_recent(self._active, key, self._max_active_age)
+        return running or _is_recent(self._started, key, self._start_timeout)
+
+
+def _is_recent(registered: dict[TriggerKey, float], key: TriggerKey, max_age: float) -> bool:
+    """Return True if :key: has been registered less than :max_age: seconds ago, an older registration is removed."""
+    started = registered.get(key)
+    if started is None:
+        return False
+
+    if time.monotonic() - started > max_age:
+        # The test has probably been lost (eg handled by another service instance that has stopped)
+        del registered[key]
+        return False
+    return True
+
+
+def _start_data_consistency_test(arguments: dict[str, Any]) -> None:
+    start_workflow({"workflow_name": DATA_CONSISTENCY_TEST}, arguments)
+
+
+coalescer = TriggerCoalescer(
+    _start_data_consistency_test,
+    DATA_CONSISTENCY_TEST_TRIGGER_WINDOW,
+    DATA_CONSISTENCY_TEST_TRIGGER_MAX_AGE,
+    DATA_CONSISTENCY_TEST_TRIGGER_START_TIMEOUT,
+)
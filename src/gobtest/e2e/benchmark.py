@@ -0,0 +1,128 @@
+"""Benchmark mode of the end-to-end tests.
+
+A single end-to-end test is too noisy to judge a change in the performance of GOB. The benchmark mode runs the
+selected suites a number of times (rounds), the rounds run one after the other and start with clearing the tests.
+The step durations of every round are registered as usual, see timings.
+
+At the end the durations of every step are aggregated over the rounds: the mean and the p50, p90 and p99 percentiles
+with their bootstrap confidence intervals. The result is written as JSON to E2E_BENCHMARK_DIR, so that the results
+of different GOB releases can be compared.
+"""
+
+import datetime
+import json
+import os
+import random
+from typing import Any, Iterable, Optional, Union
+
+from gobtest.config import E2E_BENCHMARK_DIR, E2E_BENCHMARK_ROUNDS
+from gobtest.data_consistency.instrumentation import percentile
+from gobtest.e2e.timings import Durations
+
+PERCENTILES = [50, 90, 99]
+CONFIDENCE = 0.95
+BOOTSTRAP_SAMPLES = 1_000
+BOOTSTRAP_SEED = 0  # Fixed seed, the same durations give the same confidence intervals
+
+BENCHMARK_OPTIONS = ["rounds", "label"]
+
+
+def benchmark_options(spec: Union[bool, int, dict[str, Any]]) -> tuple[int, Optional[str]]:
+    """Return the number of rounds and the label of a benchmark.
+
+    The options are given as the number of rounds, or as eg {"rounds": 10, "label": "gob-2.3"}.
+    The number of rounds defaults to E2E_BENCHMARK_ROUNDS.
+    """
+    options = spec if isinstance(spec, dict) else {} if isinstance(spec, bool) else {"rounds": spec}
+    unknown = set(options) - set(BENCHMARK_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark options: {', '.join(sorted(unknown))}")
+
+    rounds = int(options.get("rounds", E2E_BENCHMARK_ROUNDS))
+    if rounds < 1:
+        raise ValueError(f"Invalid benchmark options: {rounds} rounds")
+    label = options.get("label")
+    return rounds, None if label is None else str(label)
+
+
+def confidence_interval(values: list[float], pct: float, confidence: float = CONFIDENCE) -> tuple[float, float]:
+    """Return the bootstrap confidence interval of the :pct: percentile of :values:."""
+    rng = random.Random(BOOTSTRAP_SEED)
+    estimates = [percentile(rng.choices(values, k=len(values)), pct) or 0 for _ in range(BOOTSTRAP_SAMPLES)]
+    tail = (1 - confidence) / 2 * 100
+    return percentile(estimates, tail) or 0, percentile(estimates, 100 - tail) or 0
+
+
+def statistics(values: list[float]) -> dict[str, Any]:
+    """Return the number of values, their mean, min, max and percentiles with confidence intervals."""
+    result: dict[str, Any] = {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "min": round(min(values), 3),
+        "max": round(max(values), 3),
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}"] = round(percentile(values, pct) or 0, 3)
+        result[f"p{pct}_ci"] = [round(bound, 3) for bound in confidence_interval(values, pct)]
+    return result
+
+
+def aggregate(rounds: Iterable[Durations]) -> dict[str, dict[str, Any]]:
+    """Aggregate the step durations of the rounds into statistics per step, see statistics().
+
+    A step that is missing in a round, eg because the suite of the step has failed, is aggregated over the
+    remaining rounds.
+    """
+    values: dict[str, list[float]] = {}
+    for durations in rounds:
+        for step, seconds in durations.items():
+            values.setdefault(step, []).append(seconds)
+    return {step: statistics(step_values) for step, step_values in values.items()}
+
+
+def _describe(stats: dict[str, Any], pct: int) -> str:
+    low, high = stats[f"p{pct}_ci"]
+    return f"p{pct} {stats[f'p{pct}']:.1f}s [{low:.1f}-{high:.1f}]"
+
+
+def summary(steps: dict[str, dict[str, Any]]) -> list[str]:
+    """Return a line per step with its percentiles and their confidence intervals."""
+    return [
+        f"{step}: {', '.join(_describe(stats, pct) for pct in PERCENTILES)} (n={stats['n']})"
+        for step, stats in steps.items()
+    ]
+
+
+def benchmark_result(
+    process_id: str, label: Optional[str], suites: list[str], rounds: list[Durations]
+) -> dict[str, Any]:
+    """Return the benchmark result.
+
+    :param process_id: The process id of the benchmark
+    :param label: The label of the benchmark, eg the GOB release
+    :param suites: The suites of the benchmark
+    :param rounds: The step durations of every round
+    :return: The result with the statistics per step, see aggregate()
+    """
+    return {
+        "process_id": process_id,
+        "label": label,
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "suites": suites,
+        "rounds": len(rounds),
+        "confidence": CONFIDENCE,
+        "steps": aggregate(rounds),
+    }
+
+
+def write_result(result: dict[str, Any], directory: str = E2E_BENCHMARK_DIR) -> str:
+    """Write the benchmark result as JSON to :directory:, the label of the benchmark is part of the filename.
+
+    :return: The path of the result
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = ".".join(filter(None, [result["label"], result["process_id"]]))
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return path
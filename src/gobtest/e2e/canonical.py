@@ -0,0 +1,75 @@
+"""Canonical form of NDJSON output.
+
+NDJSON output is compared in its canonical form, so that the comparison does not depend on the order of the keys
+or on the formatting of numbers by the GOB API:
+
+- the keys of every object are sorted
+- _links are removed, at any level, they only repeat the identifying fields of the record
+- floats are rounded to FLOAT_DIGITS significant digits, an integral float equals the integer (1.0 == 1)
+
+Every line is parsed once and serialised compactly, with orjson when it is installed, else with the json module.
+The canonical expected lines are computed once, when the expectation is compiled (see expectations).
+"""
+
+import json
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+IGNORED_KEYS = {"_links"}
+FLOAT_DIGITS = 12
+
+MAX_SAFE_INTEGER = 2**53
+
+
+def canonical_value(value: Any) -> Any:
+    """Return the canonical form of a parsed JSON value."""
+    if isinstance(value, dict):
+        return {key: canonical_value(item) for key, item in value.items() if key not in IGNORED_KEYS}
+    if isinstance(value, list):
+        return [canonical_value(item) for item in value]
+    if isinstance(value, float):
+        return _canonical_float(value)
+    return value
+
+
+def _canonical_float(value: float) -> Any:
+    rounded = float(f"{value:.{FLOAT_DIGITS}g}")
+    return int(rounded) if rounded.is_integer() and abs(rounded) < MAX_SAFE_INTEGER else rounded
+
+
+def _loads(line: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # Eg NaN, which is accepted by the json module
+            pass
+    return json.loads(line)
+
+
+def _dumps(value: Any) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode()
+        except TypeError:
+            # Eg integers that do not fit in 64 bits
+            pass
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_line(line: str) -> str:
+    """Return the canonical form of a NDJSON line, a line that cannot be parsed is returned unchanged."""
+    try:
+        value = _loads(line)
+    except ValueError:
+        return line
+    return _dumps(canonical_value(value))
+
+
+def canonical_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Return the canonical form of the non-empty NDJSON lines."""
+    return (canonical_line(line) for line in lines if line)
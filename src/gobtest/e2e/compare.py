@@ -0,0 +1,112 @@
+"""Streaming comparison of API output with expected output.
+
+The order of the lines in the API output is not significant. The expected and received lines are therefore
+compared as multisets of line hashes, in a single pass over the received lines and without sorting.
+Only the lines that differ are kept, up to a maximum, to describe the difference (see gobtest.e2e.diff).
+"""
+
+import hashlib
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+# Max number of missing and unexpected lines that are kept to describe a difference
+MAX_KEPT_LINES = 1_000
+
+
+def line_hash(line: str) -> bytes:
+    """Return the hash of a single line."""
+    return hashlib.blake2b(line.encode(), digest_size=16).digest()
+
+
+class Comparison:
+    """Result of the comparison of expected and received lines."""
+
+    def __init__(self) -> None:
+        self.missing: list[str] = []  # Expected lines that have not been received, max MAX_KEPT_LINES
+        self.unexpected: list[str] = []  # Received lines that have not been expected, max MAX_KEPT_LINES
+        self.missing_count = 0
+        self.unexpected_count = 0
+        # First lines, the header of CSV output
+        self.expected_header: Optional[str] = None
+        self.received_header: Optional[str] = None
+
+    @property
+    def matches(self) -> bool:
+        """Return True if the received lines equal the expected lines."""
+        return not (self.missing_count or self.unexpected_count)
+
+
+def count_lines(lines: Iterable[str]) -> tuple[Counter[bytes], Optional[str]]:
+    """Count the hashes of the lines. Empty lines are skipped.
+
+    :param lines: The lines to count
+    :return: The number of lines per line hash and the first line, the header of CSV output
+    """
+    counts: Counter[bytes] = Counter()
+    header = None
+    for line in filter(None, lines):
+        header = header or line
+        counts[line_hash(line)] += 1
+    return counts, header
+
+
+def compare_lines(
+    expected: Callable[[], Iterable[str]], received: Iterable[str], max_lines: int = MAX_KEPT_LINES
+) -> Comparison:
+    """Compare the expected lines with the received lines, regardless of their order. Empty lines are skipped.
+
+    :param expected: Returns the expected lines, is called a second time to report missing lines
+    :param received: The received lines, they are read only once
+    :param max_lines: Max number of missing and unexpected lines to keep
+    :return:
+    """
+    counts, header = count_lines(expected())
+    return compare_counts(counts, header, expected, received, max_lines)
+
+
+def compare_counts(
+    counts: Counter[bytes],
+    header: Optional[str],
+    expected: Callable[[], Iterable[str]],
+    received: Iterable[str],
+    max_lines: int = MAX_KEPT_LINES,
+) -> Comparison:
+    """Compare the counted expected lines with the received lines, see count_lines and compare_lines.
+
+    :param counts: The counts of the expected lines, the counts are consumed by the comparison
+    :param header: The first expected line
+    :param expected: Returns the expected lines, is only called to report missing lines
+    :param received: The received lines, they are read only once
+    :param max_lines: Max number of missing and unexpected lines to keep
+    :return:
+    """
+    comparison = Comparison()
+    comparison.expected_header = header
+    for line in filter(None, received):
+        comparison.received_header = comparison.received_header or line
+        key = line_hash(line)
+        if counts[key] > 0:
+            counts[key] -= 1
+        else:
+            comparison.unexpected_count += 1
+            if len(comparison.unexpected) < max_lines:
+                comparison.unexpected.append(line)
+
+    comparison.missing_count = sum(counts.values())
+    if comparison.missing_count:
+        # Only the hashes of the missing lines are known, collect the lines from the expected lines
+        comparison.missing = _collect_lines(expected(), counts, max_lines)
+    return comparison
+
+
+def _collect_lines(lines: Iterable[str], counts: Counter[bytes], max_lines: int) -> list[str]:
+    """Return the lines with a positive count, max :max_lines: lines."""
+    result: list[str] = []
+    for line in filter(None, lines):
+        key = line_hash(line)
+        if counts[key] > 0:
+            counts[key] -= 1
+            result.append(line)
+            if len(result) >= max_lines:
+                break
+    return result
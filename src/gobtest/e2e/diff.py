@@ -0,0 +1,131 @@
+"""Keyed structured diff of API output.
+
+Describes the difference between expected and received API output per record instead of per line.
+Records are parsed from NDJSON lines or from CSV (dump) lines and keyed by their identifying fields:
+src_id/dst_id (and volgnummers) for relations, identificatie/volgnummer for entities.
+
+The report lists missing, extra and changed records, with the differing fields of changed records.
+The size of the report is bounded, so large differences remain cheap to report.
+"""
+
+import csv
+import json
+from typing import Any, Iterable, Optional
+
+from gobtest.e2e.compare import Comparison
+
+# Max number of missing, extra and changed records that are reported
+MAX_REPORTED_RECORDS = 10
+# Max length of reported values
+MAX_VALUE_LENGTH = 80
+
+# Identifying fields, the first set of which the first field is present in a record is used as key
+KEY_FIELDS = [
+    ["src_id", "src_volgnummer", "dst_id", "dst_volgnummer"],
+    ["identificatie", "volgnummer"],
+    ["string"],
+]
+
+Record = dict[str, Any]
+Key = tuple[Any, ...]
+
+
+def _parse_csv_line(line: str) -> list[str]:
+    return next(csv.reader([line], delimiter=";"), [])
+
+
+def parse_record(line: str, header: Optional[str]) -> Record:
+    """Parse a NDJSON line, or a CSV line with the given CSV header line.
+
+    Lines that cannot be parsed are returned as a record with only the line.
+    """
+    try:
+        if line.startswith("{"):
+            record: Record = json.loads(line)
+            return record
+        if header and not header.startswith("{"):
+            return dict(zip(_parse_csv_line(header), _parse_csv_line(line)))
+    except ValueError:
+        pass
+    return {"line": line}
+
+
+def record_key(record: Record) -> Key:
+    """Return the key of the record, the record itself if it has no identifying fields."""
+    for fields in KEY_FIELDS:
+        if fields[0] in record:
+            return tuple(f"{field}={record[field]}" for field in fields if field in record)
+    return (json.dumps(record, sort_keys=True),)
+
+
+def _group(lines: Iterable[str], header: Optional[str]) -> dict[Key, list[Record]]:
+    records: dict[Key, list[Record]] = {}
+    for line in lines:
+        if line == header and not line.startswith("{"):
+            # CSV header line
+            continue
+        record = parse_record(line, header)
+        records.setdefault(record_key(record), []).append(record)
+    return records
+
+
+def _format(value: Any) -> str:
+    result = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+    return result if len(result) <= MAX_VALUE_LENGTH else f"{result[:MAX_VALUE_LENGTH]}..."
+
+
+def _format_key(key: Key) -> str:
+    return _format(", ".join(str(k) for k in key))
+
+
+def field_differences(expected: Record, received: Record) -> list[str]:
+    """Return the differences between two records, one line per differing field."""
+    return [
+        f"{field}: expected {_format(expected.get(field))}, received {_format(received.get(field))}"
+        for field in sorted(set(expected) | set(received))
+        if expected.get(field) != received.get(field)
+    ]
+
+
+def _describe_changed(key: Key, expected: list[Record], received: list[Record]) -> list[str]:
+    if len(expected) == len(received) == 1:
+        return [f"Changed {_format_key(key)}: {'; '.join(field_differences(expected[0], received[0]))}"]
+    return [f"Changed {_format_key(key)}: expected {len(expected)} records, received {len(received)}"]
+
+
+def _section(title: str, items: list[Any], max_records: int) -> list[str]:
+    if not items:
+        return []
+    more = f", first {max_records} shown" if len(items) > max_records else ""
+    return [f"{len(items)} {title} records{more}"]
+
+
+def describe(comparison: Comparison, max_records: int = MAX_REPORTED_RECORDS) -> list[str]:
+    """Describe the difference of a comparison per record.
+
+    :param comparison: The comparison of expected and received lines
+    :param max_records: Max number of missing, extra and changed records to report
+    :return: The lines of the report
+    """
+    expected = _group(comparison.missing, comparison.expected_header)
+    received = _group(comparison.unexpected, comparison.received_header)
+
+    missing = [key for key in expected if key not in received]
+    extra = [key for key in received if key not in expected]
+    changed = [key for key in expected if key in received]
+
+    report = [
+        f"{comparison.missing_count} expected lines have not been received, "
+        f"{comparison.unexpected_count} received lines have not been expected"
+    ]
+    if len(comparison.missing) < comparison.missing_count or len(comparison.unexpected) < comparison.unexpected_count:
+        report.append(f"Only the first {max(len(comparison.missing), len(comparison.unexpected))} lines are compared")
+
+    report += _section("missing", missing, max_records)
+    report += [f"Missing {_format_key(key)}" for key in missing[:max_records]]
+    report += _section("extra", extra, max_records)
+    report += [f"Extra {_format_key(key)}" for key in extra[:max_records]]
+    report += _section("changed", changed, max_records)
+    for key in changed[:max_records]:
+        report += _describe_changed(key, expected[key], received[key])
+    return report
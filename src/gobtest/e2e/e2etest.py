@@ -6,15 +6,50 @@ Program exit code is the number of errors that occurred, or -1 in case a system
 """
 
 
-import os
+import math
 import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
 
-import requests
 from gobcore.logging.logger import logger
 from gobcore.message_broker.config import END_TO_END_CHECK, END_TO_END_EXECUTE, END_TO_END_WAIT, IMPORT, RELATE
 from gobcore.workflow.start_workflow import start_workflow
 
-from gobtest.config import API_HOST, MANAGEMENT_API_PUBLIC_BASE
+from gobtest.config import API_HOST, E2E_CHECK_MODE, E2E_WAIT_MODE, MANAGEMENT_API_PUBLIC_BASE, SERVICE_WORKERS
+from gobtest.e2e.benchmark import benchmark_options, benchmark_result, summary, write_result
+from gobtest.e2e.diff import describe
+from gobtest.e2e.expectations import expectation_index
+from gobtest.e2e.load import (
+    LOAD_APPLICATION,
+    LOAD_ENTITIES,
+    LOAD_EXPECT_PREFIX,
+    LOAD_RELATIONS,
+    compare_load_output,
+    generate,
+    load_sizes,
+    manifest_version,
+    relation_name,
+)
+from gobtest.e2e.notifications import process_notifications
+from gobtest.e2e.poller import WORKFLOW_STATE, process_state, process_state_poller
+from gobtest.e2e.responses import compare_response, conditional_headers, response_cache
+from gobtest.e2e.runs import run_registry
+from gobtest.e2e.session import session
+from gobtest.e2e.stress import StressTest, stress_options
+from gobtest.e2e.timings import compare_baseline, duration_table, step_durations
+from gobtest.e2e.wait import ProcessWait, wait_scheduler
+from gobtest.workers import service_consumers
+
+
+def concurrent_waits() -> float:
+    """Return the max number of wait steps that are handled at the same time.
+
+    A wait step occupies a consumer of the wait service until the process has finished, unless the wait is
+    rescheduled (E2E_WAIT_MODE=reschedule).
+    """
+    if E2E_WAIT_MODE == "reschedule":
+        return math.inf
+    return service_consumers(SERVICE_WORKERS, "e2e_test_wait")
 
 
 class E2ETest:
@@ -25,7 +60,11 @@ class E2ETest:
     """
 
     MAX_SECONDS_TO_WAIT_FOR_PROCESS_TO_FINISH = 10 * 60  # Wait for maximally 10 minutes
-    CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH = 5  # Check every 5 seconds
+    MAX_SECONDS_TO_WAIT_FOR_SUITE_TO_FINISH = 60 * 60  # Wait for maximally 1 hour for a complete test suite
+    MAX_SECONDS_TO_WAIT_FOR_LOAD_TO_FINISH = 12 * 60 * 60  # Wait for maximally 12 hours for a load test
+    CONVERGE_FIRST_DELAY = 1  # Re-check a converging endpoint after 1 second
+    CONVERGE_MAX_DELAY = 10  # Double the delay between the checks up to 10 seconds
+    FAILED_JOB_STATES = ["rejected", "failed"]  # A process with jobs in these states has failed
 
     test_catalog = "test_catalogue"
 
@@ -94,63 +133,62 @@ class E2ETest:
     def __init__(self, process_id: str):
         self.process_id = process_id
 
-    def _remove_last_event(self, api_response: str):
-        """Change all last_event values in the API response to an empty string.
+    def cleartests(self):
+        """Clear tests."""
+        r = session.delete(f"{self.api_base}{self.clear_tests_endpoint}")
+        if r.status_code != 200:
+            self._log_error("Error clearing tests")
+
+    def _compare_api_output(self, endpoint: str, expect: str):
+        """Compare the output of :endpoint: with the expected output.
 
-        :param api_response:
-        :return:
+        The output is compared line by line with the preloaded expectation, see expectation_index.
+        A difference is described per record, see describe.
+        The output of the load mode is compared with the manifest of the generated sources, see load.
+        The endpoint is requested conditionally, output that has not been modified since the previous comparison
+        with the same expected output is not compared again, see responses.
+
+        :return: True if the output matches, else False and the messages that describe the difference
         """
-        lines = api_response.split("\n")
+        version, compare = self._output_comparison(expect)
+        cached = response_cache.get(endpoint, expect, version)
 
-        # Check header line for last_event column
-        firstline = lines[0].split(";")
+        with session.get(f"{self.api_base}{endpoint}", stream=True, headers=conditional_headers(cached)) as r:
+            if r.status_code != 200 and not (cached and r.status_code == 304):
+                return False, [f"Error requesting {endpoint}"]
 
-        try:
-            idx = firstline.index('"_last_event"')
-        except ValueError:
-            # No last event found, return the original API response
-            return api_response
-
-        # Keep original header
-        result = [lines[0]]
-
-        for line in lines[1:]:
-            if line:
-                # Change last event column by ''
-                split = line.split(";")
-                split[idx] = ""
-                result.append(";".join(split))
-            else:
-                # Empty line
-                result.append(line)
-        return "\n".join(result)
+            comparison = compare_response(r, cached, compare)
+        response_cache.put(endpoint, expect, version, comparison)
 
-    def cleartests(self):
-        """Clear tests."""
-        r = requests.delete(f"{self.api_base}{self.clear_tests_endpoint}")
-        if r.status_code != 200:
-            self._log_error("Error clearing tests")
+        source, differences = comparison.result
+        if not differences:
+            return True, []
+        return False, [f"ERROR checking {source} with {endpoint}", *differences]
 
-    def _check_api_output(self, endpoint: str, expect: str, step_name: str):
-        def sort_lines(data: str):
-            return "\n".join(sorted(data.split("\n")))
+    def _output_comparison(self, expect: str) -> tuple[Any, Callable[[Iterable[str]], tuple[str, list[str]]]]:
+        """Return the version of :expect: and the function that compares output lines with :expect:.
 
-        testfile = f"expect.{expect}.ndjson"
+        The function returns the name of the expected output and the differences.
+        """
+        if expect.startswith(LOAD_EXPECT_PREFIX):
+            name = expect.removeprefix(LOAD_EXPECT_PREFIX)
+            return manifest_version(), lambda lines: (f"load manifest {name}", compare_load_output(lines, name))
 
-        expected_data = sort_lines(self._load_testfile(testfile))
-        r = requests.get(f"{self.api_base}{endpoint}")
+        expectation = expectation_index.get(expect)
 
-        if r.status_code != 200:
-            self._log_error(f"Error requesting {endpoint}")
+        def compare(lines: Iterable[str]) -> tuple[str, list[str]]:
+            comparison = expectation.compare(lines)
+            return expectation.filename, [] if comparison.matches else describe(comparison)
 
-        received = sort_lines(self._remove_last_event(r.text))
+        return expectation.mtime, compare
 
-        if received == expected_data:
+    def _check_api_output(self, endpoint: str, expect: str, step_name: str):
+        matches, differences = self._compare_api_output(endpoint, expect)
+        if matches:
             self._log_info(f"{step_name}: OK")
         else:
-            self._log_error(f"{step_name}: ERROR checking {testfile} with {endpoint}")
-            self._log_error(f"Expected data: {expected_data}")
-            self._log_error(f"Received data: {received}")
+            for difference in differences:
+                self._log_error(f"{step_name}: {difference}")
 
     def _log_error(self, message):
         logger.error(message)
@@ -161,11 +199,6 @@ class E2ETest:
     def _log_info(self, message):
         logger.info(message)
 
-    def _load_testfile(self, filename: str):
-        """Return content of test file in expect directory."""
-        with open(os.path.join(os.path.abspath(os.path.dirname(__file__)), "expect", filename)) as f:
-            return f.read()
-
     def _import_workflow_definition(self, catalog: str, collection: str, application: str):
         return {
             "type": "workflow",
@@ -210,7 +243,30 @@ class E2ETest:
             },
         }
 
-    def _execute_start_workflow_definition(self, workflow: list[str], process_id: str):
+    def _converge_workflow_steps(self, workflow: list[Any]):
+        """Fuse every wait step and the check steps that follow it into converging check steps.
+
+        A converging check polls the endpoint until its output matches the expected output as soon as the process
+        that is waited for has no unfinished jobs, without waiting for the confirmations of a wait step.
+
+        :param workflow: The workflow to convert
+        :return:
+        """
+        result = []
+        wait_header: dict[str, Any] = {}
+        for step in workflow:
+            step_name = step.get("step_name") if isinstance(step, dict) else None
+            if step_name == END_TO_END_WAIT:
+                wait_header = step["header"]
+                continue
+            if step_name == END_TO_END_CHECK and wait_header:
+                step = {**step, "header": {**step["header"], **wait_header}}
+            else:
+                wait_header = {}
+            result.append(step)
+        return result
+
+    def _execute_start_workflow_definition(self, workflow: list[str], process_id: str, cleartests: bool = False):
         """Start a workflow as a separate job. Assign given :process_id: .
 
         Allows us to wait for the complete process including event-triggered jobs to finish before checking the
@@ -218,12 +274,16 @@ class E2ETest:
 
         :param workflow: The dynamic workflow to execute
         :param process_id: The process id to assign to the new workflow (with which we can keep track of it)
+        :param cleartests: Clear the tests before the workflow is started
         :return:
         """
+        header: dict[str, Any] = {"execute": workflow, "execute_process_id": process_id}
+        if cleartests:
+            header["cleartests"] = True
         return {
             "type": "workflow_step",
             "step_name": END_TO_END_EXECUTE,
-            "header": {"execute": workflow, "execute_process_id": process_id},
+            "header": header,
         }
 
     def _relate_workflow_definition(self, catalog: str, collection: str, attribute: str):
@@ -506,43 +566,335 @@ class E2ETest:
 
         return workflow
 
-    def _build_e2e_workflow(self):
-        """Build end-to-end workflow."""
-        return (
-            self._build_autoid_test_workflow()
-            + self._build_autoid_states_test_workflow()
-            + self._build_import_test_workflow()
-            + self._build_relate_test_workflow()
-            + self._build_relate_collapsed_states_test_workflow()
-            + self._build_relate_multiple_allowed_test_workflow()
+    def _build_suites(self):
+        """Build the workflows of the test suites, by suite name.
+
+        The suites use distinct test entities and can therefore run concurrently.
+
+        :return:
+        """
+        return {
+            "autoid": self._build_autoid_test_workflow(),
+            "autoid_states": self._build_autoid_states_test_workflow(),
+            "import": self._build_import_test_workflow(),
+            "relate": self._build_relate_test_workflow(),
+            "relate_collapsed_states": self._build_relate_collapsed_states_test_workflow(),
+            "relate_multiple_allowed": self._build_relate_multiple_allowed_test_workflow(),
+        }
+
+    def _suite_process_id(self, suite: str):
+        return f"{self.process_id}.suite.{suite}"
+
+    def _split_stages(self, workflow: list[Any]):
+        """Split a suite workflow into stages, every stage starts with the execution of a test process.
+
+        The first stage contains the steps before the first test process, eg the imports of the test entities.
+
+        :param workflow: The workflow of a suite
+        :return: The stages of the workflow
+        """
+        stages: list[list[Any]] = [[]]
+        for step in workflow:
+            if isinstance(step, dict) and step.get("step_name") == END_TO_END_EXECUTE:
+                stages.append([])
+            stages[-1].append(step)
+        return stages
+
+    def _select_steps(self, workflow: list[Any], first: int, last: int):
+        """Select the steps :first: to :last: (inclusive, 1-based) of a suite workflow.
+
+        A step is a test process with its wait and check steps, see _split_stages.
+        The steps before the selected steps are executed as setup, without their checks.
+
+        :param workflow: The workflow of a suite
+        :param first: The first step to select
+        :param last: The last step to select
+        :return: The workflow with the selected steps
+        """
+        stages = self._split_stages(workflow)
+        result = stages[0]
+        for step_no, stage in enumerate(stages[1:], start=1):
+            if step_no < first:
+                result += [step for step in stage if step.get("step_name") != END_TO_END_CHECK]
+            elif step_no <= last:
+                result += stage
+        return result
+
+    def _parse_suite_selection(self, selection: list[str], suites: dict[str, list[Any]]):
+        """Parse a selection of suites and steps, eg ["relate", "relate_multiple_allowed:1-3"].
+
+        A suite is selected by its name, optionally followed by a single step (:3) or a range of steps (:1-3).
+
+        :param selection: The selected suites
+        :param suites: The workflows of all suites, by suite name
+        :return: The workflows of the selected suites, by suite name
+        """
+        result = {}
+        for spec in selection:
+            suite, _, steps = spec.partition(":")
+            if suite not in suites:
+                raise ValueError(f"Unknown E2E suite '{suite}', expected one of {', '.join(suites)}")
+
+            result[suite] = self._select_suite_steps(spec, suites[suite], steps) if steps else suites[suite]
+        return result
+
+    def _select_suite_steps(self, spec: str, workflow: list[Any], steps: str):
+        """Select the steps of a suite workflow, eg "3" or "1-3"."""
+        max_step = len(self._split_stages(workflow)) - 1
+        try:
+            first, _, last = steps.partition("-")
+            selected = int(first), int(last or first)
+            assert 1 <= selected[0] <= selected[1] <= max_step
+        except (ValueError, AssertionError):
+            raise ValueError(f"Invalid E2E steps '{spec}', expected steps within 1-{max_step}")
+        return self._select_steps(workflow, *selected)
+
+    def _build_load_workflow(self, sizes: dict[str, int]):
+        """Build the workflow of the load test, see load.
+
+        The sources are generated, then every test entity is imported and every relation is related in a separate
+        process, so that the duration of every stage is reported.
+
+        :param sizes: The number of entities to generate per test entity
+        :return:
+        """
+        start = time.monotonic()
+        generate(sizes)
+        self._log_info(f"Generated load sources for {sizes} in {time.monotonic() - start:.1f} seconds")
+
+        workflow = []
+        stages = [
+            (
+                f"import.{entity}",
+                self._import_workflow_definition(self.test_catalog, entity, LOAD_APPLICATION),
+                f"/{self.test_catalog}/{entity}/?ndjson=true",
+                entity,
+            )
+            for entity in LOAD_ENTITIES
+        ] + [
+            (
+                f"relate.{src_entity}.{attribute}",
+                self._relate_workflow_definition(self.test_catalog, src_entity, attribute),
+                f"/dump/rel/{relation_name(src_entity, attribute)}/?format=csv",
+                relation_name(src_entity, attribute),
+            )
+            for src_entity in self.test_relation_src_entities
+            for attribute in LOAD_RELATIONS
+        ]
+        for stage, definition, endpoint, name in stages:
+            process_id = f"{self.process_id}.load.{stage}"
+            workflow.append(self._execute_start_workflow_definition([definition], process_id))
+            workflow.append(
+                self._wait_step_workflow_definition(process_id, self.MAX_SECONDS_TO_WAIT_FOR_LOAD_TO_FINISH)
+            )
+            workflow.append(
+                self._check_workflow_step_definition(endpoint, f"{LOAD_EXPECT_PREFIX}{name}", f"Load {name}")
+            )
+        return workflow
+
+    def _build_stress_workflows(self, count: int):
+        """Build the workflows of the stress test, by process id, see stress.
+
+        Every workflow imports a load test entity, the workflows of the relation source entities relate the entity.
+
+        :param count: The number of workflows
+        :return:
+        """
+        entities = list(LOAD_ENTITIES)
+        workflows = {}
+        for n in range(count):
+            entity = entities[n % len(entities)]
+            workflow = [self._import_workflow_definition(self.test_catalog, entity, LOAD_APPLICATION)]
+            if entity in self.test_relation_src_entities:
+                workflow += [
+                    self._relate_workflow_definition(self.test_catalog, entity, attribute)
+                    for attribute in LOAD_RELATIONS
+                ]
+            workflows[f"{self.process_id}.stress.{n}.{entity}"] = workflow
+        return workflows
+
+    def _stress_step_definition(self, spec: Any):
+        """Run the stress test as a single step, the step starts and tracks the workflows of the stress test."""
+        return {
+            "type": "workflow_step",
+            "step_name": END_TO_END_EXECUTE,
+            "header": {"stress": spec},
+        }
+
+    def _round_process_id(self, round_no: int):
+        return f"{self.process_id}.round.{round_no}"
+
+    def _build_benchmark_workflow(self, selection: Optional[list[str]], rounds: int, label: Optional[str]):
+        """Build the workflow of the benchmark, see benchmark.
+
+        Every round is started as a separate process that runs the selected suites, see _build_e2e_workflow.
+        The rounds are run one after the other, every round clears the tests first.
+        The last step aggregates the step durations of the rounds.
+
+        :param selection: The suites (and steps) to run, see _parse_suite_selection. All suites are run by default
+        :param rounds: The number of rounds
+        :param label: The label of the benchmark result
+        :return:
+        """
+        suites = [spec.partition(":")[0] for spec in selection] if selection else list(self._build_suites())
+        if len(suites) + 2 > concurrent_waits():
+            # The round, the join of the round and every suite wait at the same time
+            raise ValueError(
+                f"The benchmark of {len(suites)} suites requires {len(suites) + 2} e2e_test_wait consumers "
+                "(SERVICE_WORKERS) or E2E_WAIT_MODE=reschedule"
+            )
+        workflow = []
+        for round_no in range(1, rounds + 1):
+            process_id = self._round_process_id(round_no)
+            round_workflow = E2ETest(process_id)._build_e2e_workflow(selection)
+            workflow.append(self._execute_start_workflow_definition(round_workflow, process_id, cleartests=True))
+            workflow.append(
+                self._wait_step_workflow_definition(process_id, self.MAX_SECONDS_TO_WAIT_FOR_SUITE_TO_FINISH)
+            )
+        workflow.append(
+            {
+                "type": "workflow_step",
+                "step_name": END_TO_END_EXECUTE,
+                "header": {"benchmark_report": {"rounds": rounds, "label": label, "suites": suites}},
+            }
         )
+        return workflow
 
-    def get_workflow(self):
+    def _build_e2e_workflow(self, selection: Optional[list[str]] = None, load: Any = None):
+        """Build end-to-end workflow.
+
+        Every test suite is started as a separate process, so that the suites run in parallel.
+        The workflow ends by waiting for all suite processes to finish (join).
+        Every suite and the join occupy a wait consumer while they wait, with fewer wait consumers the suites are
+        run one after the other in this process instead, see concurrent_waits.
+
+        :param selection: The suites (and steps) to run, see _parse_suite_selection. All suites are run by default
+        :param load: Run the load test instead of the test suites, see load_sizes
+        """
+        max_seconds = self.MAX_SECONDS_TO_WAIT_FOR_SUITE_TO_FINISH
+        if load:
+            suites = {"load": self._build_load_workflow(load_sizes(load))}
+            max_seconds = self.MAX_SECONDS_TO_WAIT_FOR_LOAD_TO_FINISH
+        elif selection:
+            suites = self._parse_suite_selection(selection, self._build_suites())
+        else:
+            suites = self._build_suites()
+        if E2E_CHECK_MODE == "converge":
+            suites = {suite: self._converge_workflow_steps(workflow) for suite, workflow in suites.items()}
+        if len(suites) + 1 > concurrent_waits():
+            return [step for workflow in suites.values() for step in workflow]
+        return [
+            self._execute_start_workflow_definition(workflow, self._suite_process_id(suite))
+            for suite, workflow in suites.items()
+        ] + [self._wait_step_workflow_definition(self._suite_process_id(suite), max_seconds) for suite in suites]
+
+    def get_workflow(
+        self, suites: Optional[list[str]] = None, load: Any = None, stress: Any = None, benchmark: Any = None
+    ):
         """Receive end-to-end start message.
 
         Change message header into dynamic workflow.
 
+        :param suites: The suites (and steps) to run, eg ["relate", "relate_multiple_allowed:1-3"], default all
+        :param load: Run the load test, True or the number of entities per test entity, eg {"test_entity": 1000000}
+        :param stress: Run the stress test, True or the stress options, eg {"workflows": 24}, see stress_options
+        :param benchmark: Run the suites repeatedly, True or the benchmark options, eg 10, see benchmark_options
         :return:
         """
-        return self._build_e2e_workflow()
+        if stress:
+            # Fail on invalid options before the stress test is started
+            stress_options(stress)
+            return [self._stress_step_definition(stress)]
+        if benchmark:
+            return self._build_benchmark_workflow(suites, *benchmark_options(benchmark))
+        return self._build_e2e_workflow(suites, load)
 
     def execute_workflow(self, workflow: list[str], workflow_process_id: str):
         """Execute workflow."""
+        run_registry.start(workflow_process_id)
         args = {
             "header": {
                 "workflow": workflow,
                 "process_id": workflow_process_id,
             }
         }
-        start_workflow({"workflow_name": "dynamic"}, args)
+        with self._timed(f"execute {workflow_process_id}"):
+            start_workflow({"workflow_name": "dynamic"}, args)
+
+    @contextmanager
+    def _timed(self, step: str) -> Iterator[None]:
+        """Register the start timestamp and duration of :step: with the run, see timings.
+
+        The duration is also registered when the step fails, so that a failed step is not missing from the timings.
+        """
+        start = time.time()
+        begin = time.monotonic()
+        try:
+            yield
+        finally:
+            run_registry.record(self.process_id, step, start, time.monotonic() - begin)
+
+    def stress(self, spec: Any):
+        """Run the stress test, see StressTest.
+
+        The sources are generated, then the workflows are started on a ramp and tracked until they have finished.
+
+        :param spec: True or the stress options, eg {"workflows": 24, "ramp": 120}, see stress_options
+        :return:
+        """
+        workflows, ramp, sizes = stress_options(spec)
+        generate(sizes)
+        stress_test = StressTest(
+            self, self._build_stress_workflows(workflows), ramp, self.MAX_SECONDS_TO_WAIT_FOR_SUITE_TO_FINISH
+        )
+        for line in stress_test.run():
+            self._log_info(line)
+        for error in stress_test.errors():
+            self._log_error(error)
+
+    def benchmark_report(self, spec: dict[str, Any]):
+        """Aggregate the step durations of the benchmark rounds and write the result, see benchmark.
+
+        :param spec: The number of rounds, the label and the suites of the benchmark
+        :return:
+        """
+        rounds = [self._round_durations(round_no, spec["suites"]) for round_no in range(1, spec["rounds"] + 1)]
+        result = benchmark_result(self.process_id, spec.get("label"), spec["suites"], rounds)
+        for line in summary(result["steps"]):
+            self._log_info(line)
+        self._log_info(f"Benchmark result written to {write_result(result)}")
+
+    def _round_durations(self, round_no: int, suites: list[str]) -> dict[str, float]:
+        """Return the step durations of the suites of a benchmark round, by suite and step.
+
+        The suites that have failed in the round are left out.
+        """
+        round_test = E2ETest(self._round_process_id(round_no))
+        round_steps = step_durations(run_registry.timings(round_test.process_id))
+        prefix = f"{round_test.process_id}."
+        durations = {}
+        for suite in suites:
+            process_id = round_test._suite_process_id(suite)
+            if run_registry.failure(process_id) is not None:
+                continue
+            if (total := round_steps.get(f"wait {process_id}")) is not None:
+                durations[f"{suite}: total"] = total
+            steps = step_durations(run_registry.timings(process_id), prefix)
+            durations |= {f"{suite}: {step}": seconds for step, seconds in steps.items()}
+        return durations
 
     def pending_messages(self):
         """Report the number of pending messages for queues that contain notifications or start workflows.
 
+        The state is shared with concurrent waits, see ProcessStatePoller.
+
         :return: #pending messages
         """
+        return process_state_poller.get(WORKFLOW_STATE, self._request_pending_messages)
+
+    def _request_pending_messages(self):
         url = f"{MANAGEMENT_API_PUBLIC_BASE}/state/workflow"
-        response = requests.get(url)
+        response = session.get(url)
         assert response.ok, "API request for pending workflow messages has failed"
         workflow_queues = response.json()
         # Example response
@@ -551,40 +903,74 @@ class E2ETest:
         # Count pending messages
         return sum([queue["messages_unacknowledged"] for queue in workflow_queues])
 
-    def pending_jobs(self, process_id):
-        """Report the number of jobs that run for the given process.
+    def process_jobs(self, process_id):
+        """Return the jobs of the given process.
 
-        If no jobs are found -1 is returned to indicate that the process has not yet started or does not exist
+        The state is shared with concurrent waits, see ProcessStatePoller.
 
         :param process_id:
-        :return:
+        :return: The jobs, eg [{'id': 226, 'status': 'scheduled'}]
         """
+        return process_state_poller.get(process_state(process_id), lambda: self._request_process_jobs(process_id))
+
+    def _request_process_jobs(self, process_id):
         url = f"{MANAGEMENT_API_PUBLIC_BASE}/state/process/{process_id}"
-        response = requests.get(url)
+        response = session.get(url)
         assert response.ok, "API request for process state has failed"
-        jobs = response.json()
         # Example response
         # [{'id': 226, 'status': 'scheduled'}]
+        return response.json()
+
+    def pending_jobs(self, process_id):
+        """Report the number of jobs that run for the given process.
+
+        If no jobs are found -1 is returned to indicate that the process has not yet started or does not exist
+
+        :param process_id:
+        :return:
+        """
+        jobs = self.process_jobs(process_id)
         if not jobs:
             # Process has not yet started or does not exist
             return -1
         # Process has started, return number of jobs that do not yet have finished
-        # A job is finished when it has ended or it has never started (rejected)
-        end_states = ["ended", "rejected"]
+        # A job is finished when it has ended, has failed or it has never started (rejected)
+        end_states = ["ended", *self.FAILED_JOB_STATES]
         unfinished_jobs = [job for job in jobs if not job["status"] in end_states]
         return len(unfinished_jobs)
 
+    def failed_jobs(self, process_id):
+        """Return the jobs of the given process that have been rejected or have failed.
+
+        :param process_id:
+        :return:
+        """
+        return [job for job in self.process_jobs(process_id) if job["status"] in self.FAILED_JOB_STATES]
+
+    def fail_on_failed_jobs(self, process_id: str):
+        """Mark the run as failed if :process_id: has any rejected or failed jobs.
+
+        :param process_id:
+        :return: True if the process has failed jobs
+        """
+        failed_jobs = self.failed_jobs(process_id)
+        if failed_jobs:
+            jobs = ", ".join(f"{job.get('id')} ({job['status']})" for job in failed_jobs)
+            self.fail(f"Process {process_id} has {len(failed_jobs)} failed jobs: {jobs}")
+        return bool(failed_jobs)
+
+    def fail(self, reason: str):
+        """Mark the run as failed, the remaining steps of the run are skipped."""
+        self._log_error(f"{reason}, the remaining steps are skipped")
+        run_registry.fail(self.process_id, reason)
+
     def wait(self, process_id: str, max_seconds_to_try: int):
         """Wait for :process_id: to be finished.
 
-        The check is quite straightforward
-        First the jobs for the given process id are requested
-        If there are any jobs the process is considered to have started
-        If all jobs have ended the process is considered to have ended
-
-        An extra check is made to check the length of the notification queues and start workflow queue
-        If any messages are present in any of these queues the process will require more confirmations
-        that all jobs have ended
+        The process is checked until it has finished, see ProcessWait.
+        Between the checks the wait is woken up by any notification for the process, the polling interval
+        is only a safety net. A finished process is confirmed after the confirmation interval, which is shorter
+        when the process has no pending jobs right after a notification.
 
         The given number of seconds is the max time that the wait process will check for jobs
 
@@ -594,49 +980,75 @@ class E2ETest:
         """
         self._log_info(f"Wait for process {process_id} to complete for max {max_seconds_to_try} seconds")
 
-        confirmed: float = 0  # Number of times the process has been confirmed to have finished
-        last_pending_jobs = 0  # Last number of pending jobs that has been registered
-        seconds_to_try = max_seconds_to_try  # Max nr seconds to wait for process to have finished
-        while seconds_to_try > 0:
-            # Try for a maximum of seconds_to_try seconds
-
-            # count pending jobs for the given process
-            pending_jobs = self.pending_jobs(process_id)
-
-            if pending_jobs > last_pending_jobs:
-                # Process is still expanding
-                seconds_to_try = max_seconds_to_try
-            last_pending_jobs = pending_jobs
-
-            if pending_jobs == 0:
-                # No pending jobs
-                if confirmed >= 1:
-                    # If sufficiently confirmed then consider process as finished
-                    self._log_info(f"Process {process_id} has completed")
-                    return True
-
-                # count pending notifications or workflow starts
-                pending_messages = self.pending_messages()
-
-                if pending_messages == 0:
-                    # No pending jobs and no pending messages
-                    # Confirmation is required because of a possible race condition
-                    # - Workflow has accepted the message but not yet committed the job
-                    confirmed += 1
-                else:
-                    # No pending jobs but there are pending messages
-                    # Require extra confirmations
-                    confirmed += 0.5
-            else:
-                confirmed = 0  # process still running; reset any confirmations
+        process_wait = ProcessWait(self, process_id, max_seconds_to_try)
+        with process_notifications.watch(process_id):
+            while (finished := process_wait.check()) is None:
+                # Wait for a notification for the process before re-testing the process, or for the interval
+                process_notifications.wait(process_id, process_wait.notifications, process_wait.interval)
 
-            # Wait some time before re-testing the process
-            time.sleep(self.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH)
-            # But do not test forever
-            seconds_to_try -= self.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH
+        self.log_wait_result(process_id, finished)
+        return finished
 
-        self._log_warning(f"Max wait time for process {process_id} to complete exceeded.")
-        return False
+    def schedule_wait(self, process_id: str, max_seconds_to_try: int, on_done: Callable[[bool], None]):
+        """Wait for :process_id: to be finished without blocking, :on_done: is called with the result of the wait.
+
+        The process is checked by the wait scheduler, see wait().
+
+        :param process_id: the process id of the process to wait for
+        :param max_seconds_to_try: the max time to check for running jobs within the process
+        :param on_done: called with True if the process has finished, False if the max wait time has been exceeded
+        :return:
+        """
+        self._log_info(f"Schedule wait for process {process_id} to complete for max {max_seconds_to_try} seconds")
+        wait_scheduler.schedule(ProcessWait(self, process_id, max_seconds_to_try), on_done)
+
+    def log_wait_result(self, process_id: str, finished: bool):
+        """Log the result of a wait for :process_id:.
+
+        The run fails when the process has not completed or when it has failed jobs.
+        """
+        if not finished:
+            self._log_warning(f"Max wait time for process {process_id} to complete exceeded.")
+            self.fail(f"Process {process_id} has not completed")
+        elif not self.fail_on_failed_jobs(process_id):
+            self._log_completed(process_id)
+            self._report_timings(process_id)
+
+    def _log_completed(self, process_id: str):
+        """Log the completion of :process_id:, the duration of the process is registered as wait step."""
+        duration = run_registry.duration(process_id)
+        if duration is None:
+            self._log_info(f"Process {process_id} has completed")
+            return
+
+        self._log_info(f"Process {process_id} has completed in {duration:.1f} seconds")
+        run_registry.record(self.process_id, f"wait {process_id}", time.time() - duration, duration)
+
+    def _report_timings(self, process_id: str):
+        """Report the step durations of the run :process_id: and the steps that have regressed, see timings.
+
+        Only the suites are reported. The process id of the end-to-end test is left out
+        of the step names, so that the steps can be compared with the steps of previous end-to-end tests.
+        The durations of a failed run are not stored as baseline.
+        """
+        timings = run_registry.timings(process_id)
+        if not timings or not process_id.startswith(self._suite_process_id("")):
+            return
+
+        prefix = f"{self.process_id}."
+        suite = process_id.removeprefix(prefix)
+        durations = step_durations(timings, prefix)
+        try:
+            baseline, regressed = compare_baseline(suite, durations, run_registry.failure(process_id) is None)
+        except (OSError, ValueError) as e:
+            self._log_warning(f"Baseline of {suite} is not available: {str(e)}")
+            baseline, regressed = None, []
+
+        self._log_info(f"Step durations of {suite}")
+        for line in duration_table(durations, baseline):
+            self._log_info(line)
+        for regression in regressed:
+            self._log_warning(f"Performance regression in {suite}: {regression}")
 
     def check(self, endpoint: str, expect: str, description: str):
         """Check endpoint.
@@ -646,4 +1058,63 @@ class E2ETest:
         :param description:
         :return:
         """
-        self._check_api_output(endpoint, expect, description)
+        with self._timed(f"check {description}"):
+            self._check_api_output(endpoint, expect, description)
+
+    def converge(self, endpoint: str, expect: str, description: str, process_id: str, max_seconds_to_try: int):
+        """Check endpoint until its output matches the expected output, see _converge."""
+        with self._timed(f"check {description}"):
+            return self._converge(endpoint, expect, description, process_id, max_seconds_to_try)
+
+    def _converge(self, endpoint: str, expect: str, description: str, process_id: str, max_seconds_to_try: int):
+        """Check endpoint until its output matches the expected output.
+
+        The output is compared as soon as :process_id: has started and has no unfinished jobs. Requiring the
+        jobs to have finished prevents a match on the output of a previous step with the same expected output.
+        The endpoint is re-checked with an exponential backoff, or as soon as a notification for the process is
+        received. The check fails when the output does not match within the given number of seconds, the last
+        difference is reported.
+
+        :param endpoint:
+        :param expect:
+        :param description:
+        :param process_id: the process id of the process that produces the output
+        :param max_seconds_to_try: the max time to check for matching output
+        :return: True if the output matches
+        """
+        deadline = time.monotonic() + max_seconds_to_try
+        delay = self.CONVERGE_FIRST_DELAY
+        differences = [f"Process {process_id} has not completed"]
+
+        with process_notifications.watch(process_id):
+            while True:
+                notifications = process_notifications.received(process_id)
+                if self.pending_jobs(process_id) == 0:
+                    matches, differences = self._converge_compare(endpoint, expect, description, process_id)
+                    if matches is not None:
+                        return matches
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                process_notifications.wait(process_id, notifications, min(delay, remaining))
+                delay = min(delay * 2, self.CONVERGE_MAX_DELAY)
+
+        self._log_error(f"{description}: No match within {max_seconds_to_try} seconds")
+        for difference in differences:
+            self._log_error(f"{description}: {difference}")
+        return False
+
+    def _converge_compare(self, endpoint: str, expect: str, description: str, process_id: str):
+        """Compare the output of a process that has no unfinished jobs.
+
+        :return: True on a match, False if the process has failed and None with the differences otherwise
+        """
+        if self.fail_on_failed_jobs(process_id):
+            self._log_error(f"{description}: Not checked")
+            return False, []
+        matches, differences = self._compare_api_output(endpoint, expect)
+        if matches:
+            self._log_info(f"{description}: OK")
+            return True, []
+        return None, differences
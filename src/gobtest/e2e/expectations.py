@@ -0,0 +1,152 @@
+"""Index of the expected output of the end-to-end tests.
+
+The expect files in the expect directory are compiled once, at service startup, into an in-memory index.
+Every expectation holds the normalised expected lines and their precomputed line hashes, so that a check
+only has to hash the received lines. Malformed expect files are reported at startup instead of during a test.
+
+An expectation is recompiled when the modification time of its file has changed.
+"""
+
+import csv
+import json
+import os
+import threading
+from typing import Any, Iterable, Iterator, Optional
+
+from gobcore.exceptions import GOBException
+from gobcore.logging.logger import logger
+
+from gobtest.e2e.compare import MAX_KEPT_LINES, Comparison, compare_counts, count_lines
+from gobtest.e2e.normalise import DEFAULT_SPEC, Normaliser, normaliser, read_specs, spec_for
+
+EXPECT_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), "expect")
+EXPECT_PREFIX = "expect."
+EXPECT_SUFFIX = ".ndjson"
+
+
+class ExpectationError(GOBException):  # type: ignore[misc]
+    """Raised when an expect file is missing or malformed."""
+
+    pass
+
+
+def expect_filename(name: str) -> str:
+    """Return the filename of the expected output :name:."""
+    return f"{EXPECT_PREFIX}{name}{EXPECT_SUFFIX}"
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    """Read the lines with their line terminators, the normaliser joins the lines of multi-line values."""
+    with open(path, newline="") as f:
+        yield from f
+
+
+def _validate_ndjson(lines: list[str]) -> None:
+    for nr, line in enumerate(lines, start=1):
+        try:
+            if line.strip():
+                json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {nr}: {str(e)}")
+
+
+def _validate_csv(lines: list[str]) -> None:
+    """Check the rows of the CSV lines, a quoted value that spans lines is part of a single row."""
+    reader = csv.reader(lines, delimiter=";")
+    try:
+        columns = len(next(reader, []))
+        for row in reader:
+            if row and len(row) != columns:
+                raise ValueError(f"line {reader.line_num}: expected {columns} columns")
+    except csv.Error as e:
+        raise ValueError(f"line {reader.line_num}: {str(e)}")
+
+
+def _validate(filename: str, lines: list[str]) -> None:
+    """Check that the lines are either valid NDJSON or CSV with the columns of the header line."""
+    try:
+        if lines and lines[0].startswith("{"):
+            _validate_ndjson(lines)
+        else:
+            _validate_csv(lines)
+    except ValueError as e:
+        raise ExpectationError(f"Malformed expect file {filename}, {str(e)}")
+
+
+class Expectation:
+    """The compiled expected output of an expect file."""
+
+    def __init__(self, name: str, path: str, normalise: Optional[Normaliser] = None):
+        self.name = name
+        self.filename = os.path.basename(path)
+        self.mtime = os.stat(path).st_mtime_ns
+        # Normalises the expected and received lines, see normalise
+        self.normalise = normalise or normaliser(DEFAULT_SPEC)
+        lines = list(_read_lines(path))
+        _validate(self.filename, lines)
+        # Normalised non-empty lines, in the order of the file
+        self.lines = [line for line in self.normalise(lines) if line]
+        self.counts, self.header = count_lines(self.lines)
+
+    def compare(self, received: Iterable[str], max_lines: int = MAX_KEPT_LINES) -> Comparison:
+        """Normalise the received lines and compare them with the expected lines, see compare_lines."""
+        return compare_counts(self.counts.copy(), self.header, lambda: self.lines, self.normalise(received), max_lines)
+
+
+class ExpectationIndex:
+    """In-memory index of the expectations in a directory."""
+
+    def __init__(self, directory: str = EXPECT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._expectations: dict[str, Expectation] = {}
+        # Normalisation specs per expectation name, read from the directory when first needed
+        self._specs: Optional[dict[str, dict[str, Any]]] = None
+
+    def load(self) -> None:
+        """Compile all expect files in the directory, raises ExpectationError on a malformed file or spec."""
+        self._specs = None
+        names = [
+            filename.removeprefix(EXPECT_PREFIX).removesuffix(EXPECT_SUFFIX)
+            for filename in sorted(os.listdir(self.directory))
+            if filename.startswith(EXPECT_PREFIX) and filename.endswith(EXPECT_SUFFIX)
+        ]
+        expectations = {name: self._compile(name) for name in names}
+        with self._lock:
+            self._expectations = expectations
+        logger.info(f"Loaded {len(expectations)} expectations, {self.size()} lines")
+
+    def get(self, name: str) -> Expectation:
+        """Return the expectation :name:, it is (re)compiled if it is not loaded or if its file has changed."""
+        with self._lock:
+            expectation: Optional[Expectation] = self._expectations.get(name)
+        try:
+            if expectation is None or os.stat(self._path(name)).st_mtime_ns != expectation.mtime:
+                expectation = self._compile(name)
+        except OSError as e:
+            raise ExpectationError(f"Missing expect file {expect_filename(name)}: {str(e)}")
+        with self._lock:
+            self._expectations[name] = expectation
+        return expectation
+
+    def size(self) -> int:
+        """Return the total number of loaded expected lines."""
+        with self._lock:
+            return sum(len(expectation.lines) for expectation in self._expectations.values())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, expect_filename(name))
+
+    def _compile(self, name: str) -> Expectation:
+        return Expectation(name, self._path(name), self._normaliser(name))
+
+    def _normaliser(self, name: str) -> Normaliser:
+        try:
+            if self._specs is None:
+                self._specs = read_specs(self.directory)
+            return normaliser(spec_for(self._specs, name))
+        except ValueError as e:
+            raise ExpectationError(f"Invalid normalisation spec of {expect_filename(name)}: {str(e)}")
+
+
+expectation_index = ExpectationIndex()
@@ -3,14 +3,24 @@
 import datetime
 
 from gobcore.logging.logger import logger
+from gobcore.message_broker import publish
+from gobcore.message_broker.config import END_TO_END_WAIT_RESULT_KEY, WORKFLOW_EXCHANGE
+from gobcore.message_broker.notifications import get_notification
 
+from gobtest.config import E2E_WAIT_MODE
 from gobtest.e2e.e2etest import E2ETest
+from gobtest.e2e.notifications import process_notifications
+from gobtest.e2e.runs import run_registry
 
 
 def end_to_end_test_handler(msg):
     """Request to run E2E tests.
 
     Return message with new generated dynamic workflow in the header.
+    The suites (and steps) to run can be selected in the header, eg "suites": ["relate", "relate_multiple_allowed:1-3"].
+    The load test is run instead with "load": true, or with the number of entities, eg "load": {"test_entity": 1000000}.
+    The stress test is run instead with "stress": true, or with the stress options, eg "stress": {"workflows": 24}.
+    The selected suites are run repeatedly with "benchmark": true, or with the number of rounds, eg "benchmark": 10.
 
     :param msg:
     :return:
@@ -32,14 +42,53 @@ def end_to_end_test_handler(msg):
         "header": {
             **header,
             "timestamp": now.isoformat(),
-            "workflow": e2etest.get_workflow(),
+            "workflow": e2etest.get_workflow(
+                header.get("suites"), header.get("load"), header.get("stress"), header.get("benchmark")
+            ),
         },
         "contents": "",
     }
 
 
+def _skip_failed_run(msg):
+    """Return the result of a step of a failed run, None if the run has not failed.
+
+    The steps of a failed run are skipped, see RunRegistry.
+    """
+    failure = run_registry.failure(msg["header"].get("process_id"))
+    if failure is None:
+        return None
+
+    logger.warning(f"Step skipped, {failure}")
+    return {
+        "header": {**msg.get("header", {})},
+        "summary": logger.get_summary(),
+    }
+
+
 def end_to_end_execute_workflow_handler(msg):
-    """End to end execute workflow handler."""
+    """End to end execute workflow handler.
+
+    The stress test step starts and tracks the workflows of the stress test, it returns when they have finished.
+    The benchmark report step aggregates the results of the benchmark rounds.
+    """
+    if skipped := _skip_failed_run(msg):
+        return skipped
+
+    if stress := msg["header"].get("stress"):
+        E2ETest(msg["header"].get("process_id")).stress(stress)
+    elif benchmark_report := msg["header"].get("benchmark_report"):
+        E2ETest(msg["header"].get("process_id")).benchmark_report(benchmark_report)
+    else:
+        _execute_workflow(msg)
+
+    return {
+        "header": {**msg.get("header", {})},
+        "summary": logger.get_summary(),
+    }
+
+
+def _execute_workflow(msg):
     workflow_to_execute = msg["header"].get("execute")
     workflow_process_id = msg["header"].get("execute_process_id")
     process_id = msg["header"].get("process_id")
@@ -48,16 +97,44 @@ def end_to_end_execute_workflow_handler(msg):
         [workflow_to_execute, workflow_process_id, process_id]
     ), "Expecting attributes 'execute', 'execute_process_id' and 'process_id' in header"
 
-    E2ETest(process_id).execute_workflow(workflow_to_execute, workflow_process_id)
+    e2etest = E2ETest(process_id)
+    if msg["header"].get("cleartests"):
+        e2etest.cleartests()
+    e2etest.execute_workflow(workflow_to_execute, workflow_process_id)
+
+
+def _publish_wait_result(msg, finished: bool):
+    """Publish the result of a scheduled wait, as the wait handler would have returned it."""
+    logger.configure(msg, "E2E_TEST_WAIT")
+    E2ETest(msg["header"]["process_id"]).log_wait_result(msg["header"]["wait_for_process_id"], finished)
+    publish(
+        WORKFLOW_EXCHANGE,
+        END_TO_END_WAIT_RESULT_KEY,
+        {
+            "header": {**msg.get("header", {})},
+            "summary": logger.get_summary(),
+        },
+    )
 
-    return {
-        "header": {**msg.get("header", {})},
-        "summary": logger.get_summary(),
-    }
+
+def _wait_result(result):
+    """Return the result of a wait step, in reschedule wait mode the result is published and None is returned."""
+    if E2E_WAIT_MODE != "reschedule":
+        return result
+    publish(WORKFLOW_EXCHANGE, END_TO_END_WAIT_RESULT_KEY, result)
+    return None
 
 
 def end_to_end_wait_handler(msg):
-    """End to end wait handler."""
+    """End to end wait handler.
+
+    In reschedule wait mode the wait is handed over to the wait scheduler and no result is returned.
+    The wait service then has no report, the result is published by the scheduler when the wait is done,
+    or right away when the step is skipped.
+    """
+    if skipped := _skip_failed_run(msg):
+        return _wait_result(skipped)
+
     process_id = msg["header"].get("process_id")
     wait_for_process_id = msg["header"].get("wait_for_process_id")
     seconds = msg["header"].get("seconds")
@@ -66,6 +143,12 @@ def end_to_end_wait_handler(msg):
         [process_id, wait_for_process_id, seconds]
     ), "Expecting attributes 'process_id', 'wait_for_process_id' and 'seconds' in header"
 
+    if E2E_WAIT_MODE == "reschedule":
+        E2ETest(process_id).schedule_wait(
+            wait_for_process_id, seconds, lambda finished: _publish_wait_result(msg, finished)
+        )
+        return None
+
     E2ETest(process_id).wait(wait_for_process_id, seconds)
 
     return {
@@ -75,7 +158,13 @@ def end_to_end_wait_handler(msg):
 
 
 def end_to_end_check_handler(msg):
-    """End to end check handler."""
+    """End to end check handler.
+
+    A check with a 'wait_for_process_id' in its header converges, see E2ETest.converge.
+    """
+    if skipped := _skip_failed_run(msg):
+        return skipped
+
     endpoint = msg["header"].get("endpoint")
     expect = msg["header"].get("expect")
     description = msg["header"].get("description")
@@ -85,8 +174,20 @@ def end_to_end_check_handler(msg):
         [endpoint, expect, description, process_id]
     ), "Expecting attributes 'endpoint', 'expect', 'description' and 'process_id' in header"
 
-    E2ETest(process_id).check(endpoint, expect, description)
+    if msg["header"].get("wait_for_process_id"):
+        # Converging check, fused with the wait for the process
+        E2ETest(process_id).converge(
+            endpoint, expect, description, msg["header"]["wait_for_process_id"], msg["header"]["seconds"]
+        )
+    else:
+        E2ETest(process_id).check(endpoint, expect, description)
     return {
         "header": {**msg.get("header", {})},
         "summary": logger.get_summary(),
     }
+
+
+def end_to_end_notification_handler(msg):
+    """Wake up any waits for the process of the notification."""
+    notification = get_notification(msg)
+    process_notifications.notify(notification.header.get("process_id"))
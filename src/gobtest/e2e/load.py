@@ -0,0 +1,218 @@
+"""Load mode of the end-to-end tests.
+
+The load mode measures how GOB imports and relates large collections. Synthetic sources are generated for
+the test entities, at configurable cardinalities, and imported and related by the usual end-to-end workflow.
+The generated sources are written as CSV files to the shared directory, they are imported as application LOAD.
+
+The output is too large for expect files. Instead, every check compares the number of records in the output
+and a checksum of their keys with a manifest that is written along with the sources. The checksum is the
+sum of the hashes of the keys, it does not depend on the order of the records.
+"""
+
+import csv
+import itertools
+import json
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+from gobtest.config import E2E_LOAD_DIR, E2E_LOAD_SIZE
+from gobtest.e2e.compare import line_hash
+
+LOAD_APPLICATION = "LOAD"
+LOAD_EXPECT_PREFIX = "load:"
+MANIFEST = "manifest.json"
+
+CHECKSUM_MODULUS = 2**128
+
+# Entities with their key fields in the API output
+LOAD_ENTITIES = {
+    "test_entity": ["string"],
+    "test_entity_autoid_states": ["identificatie", "volgnummer"],
+    "rel_test_entity_a": ["identificatie", "volgnummer"],
+    "rel_test_entity_b": ["identificatie", "volgnummer"],
+    "rel_test_entity_c": ["identificatie", "volgnummer"],
+    "rel_test_entity_d": ["identificatie", "volgnummer"],
+}
+
+# Relations of the source entities, by relation attribute the destination entity and the number of references
+LOAD_RELATIONS = {
+    "ref_to_c": ("rel_test_entity_c", 1),
+    "manyref_to_c": ("rel_test_entity_c", 2),
+    "ref_to_d": ("rel_test_entity_d", 1),
+    "manyref_to_d": ("rel_test_entity_d", 2),
+}
+
+# Key fields of the relation dumps
+RELATION_KEY = ["src_id", "dst_id"]
+
+LoadSizes = dict[str, int]
+Row = dict[str, Any]
+
+
+def load_sizes(spec: Union[bool, dict[str, int]], default: Optional[int] = None) -> LoadSizes:
+    """Return the number of entities to generate per entity, eg {"test_entity": 1000000}.
+
+    Entities that are not specified get the default size, E2E_LOAD_SIZE unless another default is given.
+    """
+    sizes = spec if isinstance(spec, dict) else {}
+    default = E2E_LOAD_SIZE if default is None else default
+    unknown = set(sizes) - set(LOAD_ENTITIES)
+    if unknown:
+        raise ValueError(f"Unknown load entities: {', '.join(sorted(unknown))}")
+    return {entity: int(sizes.get(entity, default)) for entity in LOAD_ENTITIES}
+
+
+def checksum(keys: Iterable[str]) -> tuple[int, str]:
+    """Return the number of keys and their order independent checksum."""
+    count = 0
+    total = 0
+    for key in keys:
+        count += 1
+        total = (total + int.from_bytes(line_hash(key), "big")) % CHECKSUM_MODULUS
+    return count, f"{total:032x}"
+
+
+def _key(row: Row, fields: list[str]) -> str:
+    return "|".join(str(row.get(field)) for field in fields)
+
+
+def _test_entity(i: int) -> Row:
+    return {
+        "string": f"load {i}",
+        "character": "abcdefghijklmnopqrstuvwxyz"[i % 26],
+        "decimal": i / 100,
+        "integer": i,
+        "date": f"20{i % 20:02d}-01-01",
+        "boolean": i % 2 == 0,
+        "reference": f"refid {i % 10}",
+    }
+
+
+def _autoid_state(i: int) -> Row:
+    # Two states per entity
+    return {
+        "identificatie": str(i // 2),
+        "volgnummer": i % 2 + 1,
+        "code": f"code {i // 2}",
+        "begin_geldigheid": f"{2000 + i % 2}-01-01",
+        "eind_geldigheid": "2001-01-01" if i % 2 == 0 else "",
+    }
+
+
+def _rel_entity(prefix: str, sizes: LoadSizes) -> Callable[[int], Row]:
+    def row(i: int) -> Row:
+        result: Row = {"identificatie": f"{prefix}{i}", "volgnummer": 1, "begin_geldigheid": "2000-01-01"}
+        if prefix in "AB":
+            for attribute, (dst_entity, references) in LOAD_RELATIONS.items():
+                dst_prefix = dst_entity[-1].upper()
+                ids = [f"{dst_prefix}{(i + n) % sizes[dst_entity]}" for n in range(references)]
+                result[attribute] = ids[0] if references == 1 else ",".join(ids)
+        return result
+
+    return row
+
+
+def _generators(sizes: LoadSizes) -> dict[str, Callable[[int], Row]]:
+    return {
+        "test_entity": _test_entity,
+        "test_entity_autoid_states": _autoid_state,
+        **{f"rel_test_entity_{x}": _rel_entity(x.upper(), sizes) for x in "abcd"},
+    }
+
+
+def _write_source(path: str, rows: Iterator[Row]) -> None:
+    with open(path, "w", newline="") as f:
+        first = next(rows, None)
+        if first is None:
+            return
+        writer = csv.DictWriter(f, fieldnames=list(first), delimiter=";")
+        writer.writeheader()
+        writer.writerow(first)
+        writer.writerows(rows)
+
+
+def _relation_keys(attribute: str, size: int, generator: Callable[[int], Row]) -> Iterator[str]:
+    for i in range(size):
+        row = generator(i)
+        for dst_id in row[attribute].split(","):
+            yield _key({"src_id": row["identificatie"], "dst_id": dst_id}, RELATION_KEY)
+
+
+def relation_name(src_entity: str, attribute: str) -> str:
+    """Return the name of the relation table, eg tst_rta_tst_rtc_ref_to_c."""
+    src = f"rt{src_entity[-1]}"
+    dst = f"rt{LOAD_RELATIONS[attribute][0][-1]}"
+    return f"tst_{src}_tst_{dst}_{attribute}"
+
+
+def generate(sizes: LoadSizes, directory: str = E2E_LOAD_DIR) -> dict[str, Any]:
+    """Generate the sources and write them with their manifest to :directory:.
+
+    :param sizes: The number of rows per entity
+    :param directory: The directory to write the sources to
+    :return: The manifest, the expected number of records and checksum per entity and relation
+    """
+    os.makedirs(directory, exist_ok=True)
+    generators = _generators(sizes)
+    manifest: dict[str, Any] = {}
+    for entity, fields in LOAD_ENTITIES.items():
+        path = os.path.join(directory, f"{entity}.csv")
+        _write_source(path, (generators[entity](i) for i in range(sizes[entity])))
+        rows, sum_ = checksum(_key(generators[entity](i), fields) for i in range(sizes[entity]))
+        manifest[entity] = {"file": path, "key": fields, "rows": rows, "checksum": sum_}
+
+    for src_entity in ["rel_test_entity_a", "rel_test_entity_b"]:
+        for attribute in LOAD_RELATIONS:
+            keys = _relation_keys(attribute, sizes[src_entity], generators[src_entity])
+            rows, sum_ = checksum(keys)
+            manifest[relation_name(src_entity, attribute)] = {"key": RELATION_KEY, "rows": rows, "checksum": sum_}
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(directory: str = E2E_LOAD_DIR) -> dict[str, Any]:
+    """Read the manifest of the generated sources."""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest: dict[str, Any] = json.load(f)
+    return manifest
+
+
+def manifest_version(directory: str = E2E_LOAD_DIR) -> Optional[int]:
+    """Return the modification time of the manifest of the generated sources, None if there is no manifest."""
+    try:
+        return os.stat(os.path.join(directory, MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _records(lines: Iterable[str]) -> Iterator[Row]:
+    """Parse NDJSON lines or CSV lines with a header line."""
+    lines = (line for line in lines if line.rstrip("\r\n"))
+    first = next(lines, None)
+    if first is None:
+        return
+    if first.startswith("{"):
+        yield json.loads(first)
+        yield from (json.loads(line) for line in lines)
+    else:
+        yield from csv.DictReader(itertools.chain([first], lines), delimiter=";")
+
+
+def compare_load_output(lines: Iterable[str], name: str, manifest: Optional[dict[str, Any]] = None) -> list[str]:
+    """Compare the number of records and the checksum of their keys with the manifest.
+
+    :param lines: The output lines
+    :param name: The name of the entity or relation in the manifest
+    :param manifest: The manifest, read from the load directory by default
+    :return: The differences, empty if the output matches
+    """
+    expected = (manifest or read_manifest())[name]
+    rows, sum_ = checksum(_key(record, expected["key"]) for record in _records(lines))
+    differences = []
+    if rows != expected["rows"]:
+        differences.append(f"Expected {expected['rows']} records, received {rows}")
+    if sum_ != expected["checksum"]:
+        differences.append(f"Checksum of {', '.join(expected['key'])} does not match")
+    return differences
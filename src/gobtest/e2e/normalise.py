@@ -0,0 +1,167 @@
+"""Column-aware normalisation of CSV output before it is compared.
+
+Some columns of the API output differ between test runs, eg the _last_event of a relation dump. The expected and
+received output is normalised before it is compared, according to the normalisation spec of the expectation:
+
+- mask: the values of these columns are replaced by an empty string
+- drop: these columns are removed
+- columns: only these columns are kept, in the given order
+
+The specs are stored in normalise.json in the expect directory, per expectation name. Expectations without a spec
+use the "*" spec, which masks _last_event.
+
+The first line of CSV output is the header line. A quoted value that spans lines is part of a single row, and a quoted
+separator does not separate fields. Only the masked and dropped fields are changed, the other fields keep their text
+and quoting as received, so that eg an empty string ("") still differs from an empty value. When the spec does not
+apply to the columns of the output the rows are passed unchanged.
+
+NDJSON output is not normalised by column, it is brought into its canonical form instead, see canonical.
+"""
+
+import json
+import os
+from itertools import chain
+from typing import Any, Iterable, Iterator, Optional
+
+from gobtest.e2e.canonical import canonical_lines
+
+NORMALISE_FILE = "normalise.json"
+DEFAULT_SPEC_NAME = "*"
+DEFAULT_SPEC = {"mask": ["_last_event"]}
+
+SPEC_OPTIONS = ["mask", "drop", "columns"]
+
+DELIMITER = ";"
+LINE_TERMINATORS = "\r\n"
+
+
+class Normaliser:
+    """Normalise CSV lines according to a normalisation spec."""
+
+    def __init__(self, mask: Iterable[str] = (), drop: Iterable[str] = (), columns: Optional[Iterable[str]] = None):
+        """Initialise Normaliser.
+
+        :param mask: The columns of which the values are replaced by an empty string
+        :param drop: The columns that are removed
+        :param columns: The columns that are kept, in this order, all columns if None
+        """
+        self.mask = set(mask)
+        self.drop = set(drop)
+        self.columns = None if columns is None else list(columns)
+
+    def __call__(self, lines: Iterable[str]) -> Iterator[str]:
+        """Normalise the lines, the first line is the header line of CSV output or the first NDJSON line.
+
+        The lines may end with their line terminator, the normalised lines do not.
+        """
+        lines = iter(lines)
+        first = next(lines, None)
+        if first is None:
+            return
+
+        if first.startswith("{"):
+            yield from canonical_lines(line.rstrip(LINE_TERMINATORS) for line in chain([first], lines))
+            return
+
+        rows = _csv_rows(chain([first], lines))
+        header_row = next(rows)
+        header = _split(header_row)
+        positions, masked = self._projection([_unquote(field) for field in header])
+        if positions == list(range(len(header))) and not masked:
+            # Nothing to normalise
+            yield header_row
+            yield from rows
+            return
+
+        yield DELIMITER.join(header[i] for i in positions)
+        yield from _rows(rows, len(header), positions, masked)
+
+    def _projection(self, fields: list[str]) -> tuple[list[int], set[int]]:
+        """Return the positions of the columns that are kept, and the positions of the masked columns."""
+        index = {field: i for i, field in enumerate(fields)}
+        columns = fields if self.columns is None else self.columns
+        positions = [index[column] for column in columns if column in index and column not in self.drop]
+        return positions, {index[column] for column in self.mask if column in index}
+
+
+def _csv_rows(lines: Iterable[str]) -> Iterator[str]:
+    """Join the lines of quoted values that span lines, and strip the line terminators of the rows.
+
+    A line without its line terminator is joined with a newline.
+    """
+    row: list[str] = []
+    quoted = False
+    for line in lines:
+        if quoted and not row[-1].endswith("\n"):
+            row.append("\n")
+        row.append(line)
+        # A row ends when all its quotes are closed, an escaped quote ("") does not change this
+        quoted ^= line.count('"') % 2 == 1
+        if not quoted:
+            yield "".join(row).rstrip(LINE_TERMINATORS)
+            row = []
+    if row:
+        # Unterminated quoted value
+        yield "".join(row).rstrip(LINE_TERMINATORS)
+
+
+def _split(row: str) -> list[str]:
+    """Split a row into its raw fields, the quotes of a quoted field are kept."""
+    pieces = row.split(DELIMITER)
+    if '"' not in row:
+        return pieces
+
+    fields: list[str] = []
+    for piece in pieces:
+        if fields and fields[-1].count('"') % 2 == 1:
+            # The delimiter is part of a quoted value
+            fields[-1] += DELIMITER + piece
+        else:
+            fields.append(piece)
+    return fields
+
+
+def _unquote(field: str) -> str:
+    if len(field) > 1 and field.startswith('"') and field.endswith('"'):
+        return field[1:-1].replace('""', '"')
+    return field
+
+
+def _rows(rows: Iterable[str], columns: int, positions: list[int], masked: set[int]) -> Iterator[str]:
+    """Mask and project the rows, malformed rows are kept as they are so that they are reported."""
+    project = positions != list(range(columns))
+    for row in filter(None, rows):
+        fields = _split(row)
+        if len(fields) == columns:
+            for i in masked:
+                fields[i] = ""
+            yield DELIMITER.join(fields[i] for i in positions) if project else DELIMITER.join(fields)
+        else:
+            yield row
+
+
+def normaliser(spec: dict[str, Any]) -> Normaliser:
+    """Return the normaliser for a normalisation spec, raises ValueError on an invalid spec."""
+    unknown = set(spec) - set(SPEC_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown normalisation options: {', '.join(sorted(unknown))}")
+
+    for option, columns in spec.items():
+        if not isinstance(columns, list) or not all(isinstance(column, str) for column in columns):
+            raise ValueError(f"Invalid normalisation option {option}: expected a list of column names")
+    return Normaliser(**spec)
+
+
+def read_specs(directory: str) -> dict[str, dict[str, Any]]:
+    """Read the normalisation specs per expectation name from :directory:, the default spec if there are none."""
+    try:
+        with open(os.path.join(directory, NORMALISE_FILE)) as f:
+            specs: dict[str, dict[str, Any]] = json.load(f)
+    except FileNotFoundError:
+        return {DEFAULT_SPEC_NAME: DEFAULT_SPEC}
+    return specs
+
+
+def spec_for(specs: dict[str, dict[str, Any]], name: str) -> dict[str, Any]:
+    """Return the normalisation spec of the expectation :name:, the "*" spec if it has no spec of its own."""
+    return specs.get(name, specs.get(DEFAULT_SPEC_NAME, {}))
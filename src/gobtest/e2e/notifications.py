@@ -0,0 +1,73 @@
+"""Process notifications.
+
+GOB publishes a notification on the message broker when a job has applied events. The notification header
+contains the process id of the job. These notifications are used to wake up waits for the process, so that
+the process state is checked as soon as something has happened instead of after a fixed polling interval.
+
+Notifications are only a wake-up signal. Whether a process has finished is still determined by its job states.
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class ProcessNotifications:
+    """Keep track of the notifications that are received for watched processes."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        # Number of notifications received per watched process id
+        self._received: dict[str, int] = {}
+        # Number of watchers per process id, only notifications for watched processes are registered
+        self._watchers: Counter[str] = Counter()
+        # Functions that are called with the process id of every notification
+        self._listeners: list[Callable[[Optional[str]], None]] = []
+
+    def add_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call :listener: with the process id of every notification, watched or not."""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def watch(self, process_id: str) -> Iterator[None]:
+        """Register notifications for :process_id: while in this context."""
+        with self._condition:
+            self._watchers[process_id] += 1
+            self._received.setdefault(process_id, 0)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._watchers[process_id] -= 1
+                if not self._watchers[process_id]:
+                    del self._watchers[process_id]
+                    del self._received[process_id]
+
+    def received(self, process_id: str) -> int:
+        """Return the number of notifications that have been received for the watched :process_id:."""
+        with self._condition:
+            return self._received.get(process_id, 0)
+
+    def notify(self, process_id: Optional[str]) -> None:
+        """Register a notification for :process_id: and wake up its waiters."""
+        with self._condition:
+            if process_id in self._received:
+                self._received[process_id] += 1
+                self._condition.notify_all()
+        for listener in self._listeners:
+            listener(process_id)
+
+    def wait(self, process_id: str, since: int, timeout: float) -> bool:
+        """Wait until a notification for :process_id: is received after :since: notifications, or timeout.
+
+        :param process_id: The watched process id
+        :param since: The number of notifications that have already been seen, see received()
+        :param timeout: Max number of seconds to wait
+        :return: True if a notification has been received, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._received.get(process_id, 0) > since, timeout)
+
+
+process_notifications = ProcessNotifications()
@@ -0,0 +1,108 @@
+"""Shared polling of process states.
+
+Many waits may check the state of their process at the same time. Every check requests the pending messages
+of the workflow queues and the jobs of its process from the management API. The ProcessStatePoller shares these
+requests between all waits in the service:
+
+- a state is requested at most once per tick, the result is kept for a short time (ttl) and shared by all waits
+- concurrent checks for the same state wait for the single request that is in progress
+
+A notification for a process invalidates its state, so that a wait that is woken up by a notification always
+sees a fresh state. The ttl is shorter than the interval in which a finished process is confirmed, so a
+confirmation is never based on the state that it confirms.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from gobtest.config import E2E_PROCESS_STATE_TTL
+from gobtest.e2e.notifications import process_notifications
+
+WORKFLOW_STATE = "workflow"
+
+T = TypeVar("T")
+
+
+def process_state(process_id: str) -> str:
+    """Return the key of the state of :process_id:."""
+    return f"process.{process_id}"
+
+
+class _State:
+    """A requested state, the value is available when the request has completed."""
+
+    def __init__(self) -> None:
+        self.completed = threading.Event()
+        self.value: Any = None
+        self.error: Optional[Exception] = None
+        self.time = 0.0
+
+
+class ProcessStatePoller:
+    """Share the requests for process states between concurrent waits."""
+
+    def __init__(self, ttl: float = E2E_PROCESS_STATE_TTL):
+        """Initialise ProcessStatePoller.
+
+        :param ttl: Number of seconds that a requested state is shared
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._states: dict[str, _State] = {}
+
+    def get(self, key: str, request: Callable[[], T]) -> T:
+        """Return the state :key:, :request: is only called if no recent or pending request for the state exists.
+
+        :param key: The key of the state, see WORKFLOW_STATE and process_state()
+        :param request: Requests the state
+        :return: The state value
+        """
+        state, owner = self._claim(key)
+        if owner:
+            self._request(key, state, request)
+        else:
+            state.completed.wait()
+        if state.error is not None:
+            raise state.error
+        result: T = state.value
+        return result
+
+    def invalidate(self, process_id: Optional[str]) -> None:
+        """Forget the state of :process_id: and the workflow state, called on every notification."""
+        with self._lock:
+            self._states.pop(WORKFLOW_STATE, None)
+            if process_id is not None:
+                self._states.pop(process_state(process_id), None)
+
+    def _claim(self, key: str) -> tuple[_State, bool]:
+        """Return the state for :key: and whether the caller has to request it."""
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and not (state.completed.is_set() and self._expired(state)):
+                return state, False
+
+            # Drop the states that have expired, eg of finished processes
+            self._states = {k: s for k, s in self._states.items() if not s.completed.is_set() or not self._expired(s)}
+            state = self._states[key] = _State()
+            return state, True
+
+    def _request(self, key: str, state: _State, request: Callable[[], Any]) -> None:
+        try:
+            state.value = request()
+        except Exception as e:
+            # Do not share a failure, the next check requests the state again
+            state.error = e
+            with self._lock:
+                if self._states.get(key) is state:
+                    del self._states[key]
+        finally:
+            state.time = time.monotonic()
+            state.completed.set()
+
+    def _expired(self, state: _State) -> bool:
+        return time.monotonic() - state.time >= self.ttl
+
+
+process_state_poller = ProcessStatePoller()
+process_notifications.add_listener(process_state_poller.invalidate)
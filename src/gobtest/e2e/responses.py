@@ -0,0 +1,123 @@
+"""Cache of the compared output of the GOB API endpoints.
+
+The output of an endpoint is often requested again while it has not changed: a converging check re-requests the
+endpoint until it matches and the rounds of a benchmark check the same endpoints. The comparison of the output with
+the expected output is cached per endpoint and expected output, together with the validators of the response
+(ETag, Last-Modified) and the digest of its content:
+
+- the endpoint is requested conditionally (If-None-Match, If-Modified-Since), on a 304 Not Modified the cached
+  comparison is returned without receiving the output again
+- otherwise the output is received and its digest is computed before comparing, when the digest equals the
+  digest of the cached output the cached comparison is returned without parsing and comparing the output again
+
+The output is spooled to a temporary file while its digest is computed, large output (eg of the load mode) is not
+kept in memory. A cached comparison is only used for the same version of the expected output, eg the modification
+time of the expect file.
+"""
+
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+import requests
+
+from gobtest.config import E2E_HTTP_RESPONSE_CACHE_SIZE
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 16 * 1024 * 1024  # Output up to 16MB is spooled in memory, larger output to a temporary file
+
+# The name of the expected output and the differences, see E2ETest._output_comparison
+Result = tuple[str, list[str]]
+
+
+class CachedComparison(NamedTuple):
+    """The comparison of the output of an endpoint, with the validators and the digest of the output."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    digest: bytes
+    result: Result
+
+
+def conditional_headers(cached: Optional[CachedComparison]) -> dict[str, str]:
+    """Return the headers to request an endpoint only if its output has been modified since :cached:."""
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def compare_response(
+    response: requests.Response, cached: Optional[CachedComparison], compare: Callable[[Iterable[str]], Result]
+) -> CachedComparison:
+    """Compare the output in :response:, the cached comparison is returned if the output has not been modified.
+
+    :param response: A successful or 304 Not Modified response, requested with the conditional headers of :cached:
+    :param cached: The cached comparison of the endpoint, if any
+    :param compare: Compares the output lines with the expected output
+    :return: The comparison of the output
+    """
+    if cached and response.status_code == HTTPStatus.NOT_MODIFIED:
+        return cached
+
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    digest = hashlib.blake2b(digest_size=16)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as body:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            digest.update(chunk)
+            body.write(chunk)
+
+        if cached and cached.digest == digest.digest():
+            return cached._replace(etag=etag, last_modified=last_modified)
+
+        body.seek(0)
+        encoding = response.encoding or "utf-8"
+        # The lines keep their line terminators, so that a quoted value that spans lines is kept as received
+        result = compare(line.decode(encoding) for line in body)
+    return CachedComparison(etag, last_modified, digest.digest(), result)
+
+
+class ResponseCache:
+    """Cache the comparisons of the endpoints, the least recently used comparisons are dropped first."""
+
+    def __init__(self, max_size: int = E2E_HTTP_RESPONSE_CACHE_SIZE):
+        """Initialise ResponseCache.
+
+        :param max_size: Max number of cached comparisons, 0 to disable the cache
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Version of the expected output and comparison per endpoint and expected output
+        self._comparisons: OrderedDict[tuple[str, str], tuple[Any, CachedComparison]] = OrderedDict()
+
+    def get(self, endpoint: str, expect: str, version: Any) -> Optional[CachedComparison]:
+        """Return the cached comparison of :endpoint: with version :version: of :expect:, None if not cached."""
+        with self._lock:
+            cached = self._comparisons.get((endpoint, expect))
+            if cached is None or cached[0] != version:
+                return None
+            self._comparisons.move_to_end((endpoint, expect))
+            return cached[1]
+
+    def put(self, endpoint: str, expect: str, version: Any, comparison: CachedComparison) -> None:
+        """Cache the comparison of :endpoint: with version :version: of :expect:."""
+        if self.max_size <= 0 or version is None:
+            return
+        with self._lock:
+            self._comparisons[(endpoint, expect)] = (version, comparison)
+            self._comparisons.move_to_end((endpoint, expect))
+            while len(self._comparisons) > self.max_size:
+                self._comparisons.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached comparisons."""
+        with self._lock:
+            self._comparisons.clear()
+
+
+response_cache = ResponseCache()
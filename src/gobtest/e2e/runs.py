@@ -0,0 +1,76 @@
+"""Registry of end-to-end test runs.
+
+Every test suite runs as a separate process (run), the steps of the suite have the process id of the run.
+When a step detects that the run is broken, eg because an import job has been rejected, the run is marked
+as failed. The remaining steps of a failed run are skipped, so that a broken run finishes in minutes instead
+of running (and waiting for) all of its steps. Other runs are not affected.
+
+The start time of every test process is registered as well, to report the duration of the process.
+The steps of a run register their start timestamp and duration, to report the step durations, see timings.
+
+The registry is kept in memory; it is shared by the end-to-end handlers of the service.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Step name, start timestamp and duration in seconds
+Timing = tuple[str, float, float]
+
+
+class RunRegistry:
+    """Keep track of the failed runs, the start of the test processes and the step timings of the runs."""
+
+    MAX_RUNS = 1_000  # Max number of runs that are remembered, the oldest runs are forgotten first
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Reason of failure per failed run process id
+        self._failures: OrderedDict[str, str] = OrderedDict()
+        # Start time per test process id
+        self._starts: OrderedDict[str, float] = OrderedDict()
+        # Step timings per run process id
+        self._timings: OrderedDict[str, list[Timing]] = OrderedDict()
+
+    def fail(self, process_id: str, reason: str) -> None:
+        """Mark the run :process_id: as failed, the first reason is kept."""
+        with self._lock:
+            self._failures.setdefault(process_id, reason)
+            self._limit(self._failures)
+
+    def failure(self, process_id: Optional[str]) -> Optional[str]:
+        """Return the reason why the run :process_id: has failed, None if the run has not failed."""
+        with self._lock:
+            return self._failures.get(process_id) if process_id is not None else None
+
+    def start(self, process_id: str) -> None:
+        """Register the start of the test process :process_id:."""
+        with self._lock:
+            self._starts[process_id] = time.monotonic()
+            self._limit(self._starts)
+
+    def duration(self, process_id: str) -> Optional[float]:
+        """Return the number of seconds since the start of :process_id:, None if the start is unknown."""
+        with self._lock:
+            start = self._starts.get(process_id)
+        return None if start is None else time.monotonic() - start
+
+    def record(self, process_id: str, step: str, start: float, seconds: float) -> None:
+        """Register the start timestamp and duration of :step: of the run :process_id:."""
+        with self._lock:
+            self._timings.setdefault(process_id, []).append((step, start, seconds))
+            self._limit(self._timings)
+
+    def timings(self, process_id: str) -> list[Timing]:
+        """Return the step timings of the run :process_id:, in the order in which the steps have finished."""
+        with self._lock:
+            return list(self._timings.get(process_id, []))
+
+    def _limit(self, items: OrderedDict[str, Any]) -> None:
+        while len(items) > self.MAX_RUNS:
+            items.popitem(last=False)
+
+
+run_registry = RunRegistry()
@@ -0,0 +1,60 @@
+"""Shared HTTP session for the GOB API and management API requests of the end-to-end tests.
+
+A single session is used by all tests in the process, so that connections are kept alive and reused
+instead of being set up for every request. The session negotiates gzip compression, applies a default
+timeout to every request and retries requests with backoff on connection errors and server errors.
+"""
+
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from gobtest.config import E2E_HTTP_POOL_SIZE, E2E_HTTP_RETRIES, E2E_HTTP_TIMEOUT
+
+RETRY_BACKOFF_FACTOR = 0.5  # Wait 0.5, 1, 2, ... seconds between retries
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+
+
+class Session(requests.Session):
+    """Session with a default timeout for every request."""
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args: Any, **kwargs: Any) -> requests.Response:
+        """Send a request, with the default timeout unless another timeout is given."""
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
+
+
+def create_session(
+    timeout: float = E2E_HTTP_TIMEOUT, retries: int = E2E_HTTP_RETRIES, pool_size: int = E2E_HTTP_POOL_SIZE
+) -> Session:
+    """Create a session with connection pooling, gzip compression, a default timeout and retries.
+
+    :param timeout: Default timeout in seconds for every request
+    :param retries: Max number of retries of a request on a connection error or server error
+    :param pool_size: Max number of connections that are kept alive per host
+    :return:
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET", "DELETE"],
+        # Return the last response when all retries have failed, the status code is checked by the caller
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = Session(timeout)
+    session.headers["Accept-Encoding"] = "gzip"
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+session = create_session()
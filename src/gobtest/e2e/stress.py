@@ -0,0 +1,198 @@
+"""Stress mode of the end-to-end tests.
+
+The stress mode measures how GOB behaves when many imports and relates run at the same time. A number of
+workflows, each with its own process id, is started on a ramp: the starts are spread evenly over the ramp
+period. Every workflow imports one of the load test entities from the generated sources (see load), the
+workflows for the relation source entities also relate the imported entity.
+
+GOB collections are defined by the model, the load test entities are the collections that are available to
+the stress test. Workflow n uses the collection n modulo the number of load test entities. With more workflows
+than collections, the workflows for the same collection compete with each other.
+
+The workflows are tracked until they have finished, see ProcessWait. The report contains the percentiles of the
+completion times, the throughput in jobs per minute and the point at which the workflow queues back up: the
+number of concurrent workflows at which the pending messages first reach E2E_STRESS_BACKLOG.
+"""
+
+import time
+from typing import Any, Optional, Protocol, Union
+
+from gobtest.config import E2E_STRESS_BACKLOG, E2E_STRESS_RAMP, E2E_STRESS_SIZE, E2E_STRESS_WORKFLOWS
+from gobtest.data_consistency.instrumentation import percentile
+from gobtest.e2e.load import LoadSizes, load_sizes
+from gobtest.e2e.wait import ProcessState, ProcessWait
+
+PERCENTILES = [50, 90, 99]
+STRESS_OPTIONS = ["workflows", "ramp", "sizes"]
+
+
+class StressTarget(ProcessState, Protocol):
+    """Starts the workflows of a stress test and provides their state, implemented by E2ETest."""
+
+    def execute_workflow(self, workflow: list[Any], workflow_process_id: str) -> None:
+        """Start :workflow: with process id :workflow_process_id:."""
+
+    def process_jobs(self, process_id: str) -> list[dict[str, Any]]:
+        """Return the jobs of the process."""
+
+    def failed_jobs(self, process_id: str) -> list[dict[str, Any]]:
+        """Return the jobs of the process that have been rejected or have failed."""
+
+
+def stress_options(spec: Union[bool, dict[str, Any]]) -> tuple[int, float, LoadSizes]:
+    """Return the number of workflows, the ramp in seconds and the sizes of the sources of a stress test.
+
+    The options are given as eg {"workflows": 24, "ramp": 120, "sizes": {"test_entity": 100000}}.
+    Options that are not specified get their default value, see E2E_STRESS_WORKFLOWS, E2E_STRESS_RAMP and
+    E2E_STRESS_SIZE.
+    """
+    options = spec if isinstance(spec, dict) else {}
+    unknown = set(options) - set(STRESS_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown stress options: {', '.join(sorted(unknown))}")
+
+    workflows = int(options.get("workflows", E2E_STRESS_WORKFLOWS))
+    ramp = float(options.get("ramp", E2E_STRESS_RAMP))
+    if workflows < 1 or ramp < 0:
+        raise ValueError(f"Invalid stress options: {workflows} workflows, ramp {ramp} seconds")
+    return workflows, ramp, load_sizes(options.get("sizes", True), E2E_STRESS_SIZE)
+
+
+class _Workflow:
+    """A workflow of the stress test, with its progress."""
+
+    def __init__(self, process_id: str, workflow: list[Any], start: float):
+        self.process_id = process_id
+        self.workflow = workflow
+        self.start = start  # Number of seconds after the start of the stress test to start the workflow
+        self.wait: Optional[ProcessWait] = None  # Set when the workflow has been started
+        self.started = 0.0
+        self.result: Optional[bool] = None  # True if the workflow has finished, False if it has not in time
+        self.duration = 0.0
+        self.jobs = 0
+        self.failed_jobs = 0
+
+
+class StressTest:
+    """Start workflows on a ramp and track them until they have finished."""
+
+    POLL_INTERVAL = 1  # Check the workflows every second, the state requests are shared (ProcessStatePoller)
+
+    def __init__(
+        self,
+        target: StressTarget,
+        workflows: dict[str, list[Any]],
+        ramp: float,
+        max_seconds_to_try: float,
+        backlog: int = E2E_STRESS_BACKLOG,
+    ):
+        """Initialise StressTest.
+
+        :param target: Starts the workflows and provides their state
+        :param workflows: The workflows to run, by process id
+        :param ramp: The number of seconds over which the starts of the workflows are spread
+        :param max_seconds_to_try: The max time to wait for a workflow to finish, see ProcessWait
+        :param backlog: The number of pending messages from which the workflow queues are considered backed up
+        """
+        self.target = target
+        self.ramp = ramp
+        self.max_seconds_to_try = max_seconds_to_try
+        self.backlog = backlog
+
+        interval = ramp / max(len(workflows) - 1, 1)
+        self._workflows = [
+            _Workflow(process_id, workflow, n * interval) for n, (process_id, workflow) in enumerate(workflows.items())
+        ]
+        self.elapsed = 0.0
+        # (seconds, concurrent workflows, pending messages) when the queues first backed up
+        self.backed_up: Optional[tuple[float, int, int]] = None
+        # (pending messages, concurrent workflows) at the max number of pending messages
+        self.max_pending = (0, 0)
+
+    def run(self) -> list[str]:
+        """Run the stress test until all workflows have finished or have exceeded the max wait time.
+
+        :return: The report, see report()
+        """
+        begin = time.monotonic()
+        while True:
+            self.elapsed = time.monotonic() - begin
+            self._start_workflows()
+            self._check_workflows()
+            if all(workflow.result is not None for workflow in self._workflows):
+                return self.report()
+            self._check_queues()
+            time.sleep(self.POLL_INTERVAL)
+
+    def _running(self) -> list[_Workflow]:
+        return [workflow for workflow in self._workflows if workflow.wait is not None and workflow.result is None]
+
+    def _start_workflows(self) -> None:
+        for workflow in self._workflows:
+            if workflow.wait is None and workflow.start <= self.elapsed:
+                self.target.execute_workflow(workflow.workflow, workflow.process_id)
+                workflow.wait = ProcessWait(self.target, workflow.process_id, self.max_seconds_to_try)
+                workflow.started = self.elapsed
+
+    def _check_workflows(self) -> None:
+        for workflow in self._running():
+            assert workflow.wait is not None
+            result = workflow.wait.check()
+            if result is None:
+                continue
+
+            workflow.result = result
+            workflow.duration = self.elapsed - workflow.started
+            if result:
+                workflow.jobs = len(self.target.process_jobs(workflow.process_id))
+                workflow.failed_jobs = len(self.target.failed_jobs(workflow.process_id))
+
+    def _check_queues(self) -> None:
+        running = len(self._running())
+        pending = self.target.pending_messages()
+        if pending > self.max_pending[0]:
+            self.max_pending = (pending, running)
+        if self.backed_up is None and pending >= self.backlog:
+            self.backed_up = (self.elapsed, running, pending)
+
+    def report(self) -> list[str]:
+        """Report the completion times, the throughput and the point at which the queues backed up."""
+        finished = [workflow for workflow in self._workflows if workflow.result]
+        durations = [workflow.duration for workflow in finished]
+        jobs = sum(workflow.jobs for workflow in finished)
+        minutes = self.elapsed / 60
+
+        lines = [
+            f"Stress test of {len(self._workflows)} workflows, ramped up in {self.ramp:.0f} seconds: "
+            f"{len(finished)} finished in {self.elapsed:.1f} seconds"
+        ]
+        if durations:
+            percentiles = ", ".join(f"p{pct} {percentile(durations, pct):.1f}" for pct in PERCENTILES)
+            lines.append(f"Completion time in seconds: {percentiles}, max {max(durations):.1f}")
+        throughput = jobs / minutes if minutes else 0
+        lines.append(f"Throughput: {jobs} jobs in {minutes:.1f} minutes, {throughput:.1f} jobs/min")
+
+        if self.backed_up:
+            seconds, running, pending = self.backed_up
+            lines.append(
+                f"Queues backed up at {running} concurrent workflows after {seconds:.1f} seconds, "
+                f"{pending} pending messages"
+            )
+        else:
+            lines.append(
+                f"Queues did not back up, max {self.max_pending[0]} pending messages "
+                f"at {self.max_pending[1]} concurrent workflows"
+            )
+        return lines
+
+    def errors(self) -> list[str]:
+        """Report the workflows that have not finished in time or that have failed jobs."""
+        return [
+            f"Process {workflow.process_id} has not completed"
+            for workflow in self._workflows
+            if workflow.result is False
+        ] + [
+            f"Process {workflow.process_id} has {workflow.failed_jobs} failed jobs"
+            for workflow in self._workflows
+            if workflow.failed_jobs
+        ]
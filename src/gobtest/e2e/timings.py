@@ -0,0 +1,133 @@
+"""Step timings of the end-to-end test suites.
+
+Every execute, wait and check step of a suite registers its start timestamp and duration with the run registry.
+When the suite has finished, the duration of every step is reported and compared with the baseline of the suite.
+A step that takes more than E2E_REGRESSION_THRESHOLD times its baseline duration, and at least
+E2E_REGRESSION_MIN_SECONDS longer, has regressed.
+
+The baselines are stored as JSON in E2E_BASELINE_FILE, per suite the duration per step. A suite without a baseline
+stores the step durations of its first successful run as its baseline. Remove the suite from the file to reset its
+baseline. Suites that run in parallel, also in other processes on the shared volume, store their baselines under an
+exclusive lock on the file, so that no baseline is lost.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from gobtest.config import E2E_BASELINE_FILE, E2E_REGRESSION_MIN_SECONDS, E2E_REGRESSION_THRESHOLD
+from gobtest.e2e.runs import Timing
+
+Durations = dict[str, float]
+
+
+def step_durations(timings: Iterable[Timing], prefix: str = "") -> Durations:
+    """Return the duration per step, a repeated step is numbered, eg "check Import ADD (2)".
+
+    The :prefix: is left out of the step names, eg the process id of the end-to-end test in the test process ids.
+    """
+    durations: Durations = {}
+    for timing, _, seconds in timings:
+        step = timing.replace(prefix, "") if prefix else timing
+        name = step
+        repeat = 1
+        while name in durations:
+            repeat += 1
+            name = f"{step} ({repeat})"
+        durations[name] = seconds
+    return durations
+
+
+def read_baselines(path: str = E2E_BASELINE_FILE) -> dict[str, Durations]:
+    """Read the baselines of all suites, an empty dict if no baselines have been stored."""
+    try:
+        with open(path) as f:
+            baselines: dict[str, Durations] = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return baselines
+
+
+def write_baselines(baselines: dict[str, Durations], path: str = E2E_BASELINE_FILE) -> None:
+    """Write the baselines of all suites, the file is replaced at once."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+        try:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def locked_baselines(path: str = E2E_BASELINE_FILE) -> Iterator[None]:
+    """Hold an exclusive lock on the baselines file within the context, also for other processes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def regressions(
+    durations: Durations,
+    baseline: Durations,
+    threshold: float = E2E_REGRESSION_THRESHOLD,
+    min_seconds: float = E2E_REGRESSION_MIN_SECONDS,
+) -> list[str]:
+    """Return the steps that have regressed compared to their baseline duration.
+
+    :param durations: The duration per step
+    :param baseline: The baseline duration per step, steps without a baseline are not compared
+    :param threshold: A step has regressed when it takes more than threshold times its baseline duration
+    :param min_seconds: and at least min_seconds longer than its baseline duration
+    :return: A description of every regressed step
+    """
+    return [
+        f"{step} took {seconds:.1f} seconds, baseline {baseline[step]:.1f} seconds"
+        for step, seconds in durations.items()
+        if step in baseline and seconds > threshold * baseline[step] and seconds - baseline[step] >= min_seconds
+    ]
+
+
+def duration_table(durations: Durations, baseline: Optional[Durations] = None) -> list[str]:
+    """Return a line per step with its duration, and its baseline duration when known."""
+    baseline = baseline or {}
+    width = max((len(step) for step in durations), default=0)
+    return [
+        f"{step.ljust(width)} {seconds:8.1f}s" + (f" (baseline {baseline[step]:.1f}s)" if step in baseline else "")
+        for step, seconds in durations.items()
+    ]
+
+
+def compare_baseline(
+    suite: str, durations: Durations, store: bool, path: str = E2E_BASELINE_FILE
+) -> tuple[Optional[Durations], list[str]]:
+    """Compare the step durations of :suite: with its baseline.
+
+    :param suite: The name of the suite
+    :param durations: The duration per step
+    :param store: Store the durations as baseline if the suite has no baseline yet
+    :param path: The baselines file
+    :return: The baseline of the suite, None if it had no baseline, and the regressions, see regressions()
+    """
+    baselines = read_baselines(path)
+    if suite not in baselines and store:
+        with locked_baselines(path):
+            # Read again under the lock, the baselines may have been changed by another suite or run
+            baselines = read_baselines(path)
+            if suite not in baselines:
+                write_baselines({**baselines, suite: durations}, path)
+                return None, []
+
+    if suite in baselines:
+        return baselines[suite], regressions(durations, baselines[suite])
+    return None, []
@@ -0,0 +1,208 @@
+"""Wait for processes to finish.
+
+A ProcessWait checks the state of a process one step at a time. The steps can be executed in a blocking loop
+(E2ETest.wait) or be scheduled by the WaitScheduler. The scheduler runs the steps of many waits in a single
+thread, so that waiting processes do not occupy a consumer thread each.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Optional, Protocol
+
+from gobcore.logging.logger import logger
+
+from gobtest.config import E2E_WAIT_CONFIRM_SECONDS, E2E_WAIT_NOTIFIED_CONFIRM_SECONDS
+from gobtest.e2e.notifications import process_notifications
+
+
+class ProcessState(Protocol):
+    """Source of the state of processes, implemented by E2ETest."""
+
+    def pending_jobs(self, process_id: str) -> int:
+        """Return the number of unfinished jobs for the process, -1 if the process has not yet started."""
+
+    def pending_messages(self) -> int:
+        """Return the number of pending messages in the notification and start workflow queues."""
+
+
+class ProcessWait:
+    """Step-wise wait for a process to finish.
+
+    The check is quite straightforward
+    First the jobs for the given process id are requested
+    If there are any jobs the process is considered to have started
+    If all jobs have ended the process is considered to have ended
+
+    An extra check is made to check the length of the notification queues and start workflow queue
+    If any messages are present in any of these queues the process will require more confirmations
+    that all jobs have ended
+
+    A confirmation is only accepted after CONFIRM_AFTER_N_SECONDS, also when the wait is woken up earlier by a
+    notification, to not confirm a process of which the workflow has not yet created the next job.
+    When a notification of the process has been received since the previous check, the last job has just applied
+    its events and the confirmation is accepted after CONFIRM_AFTER_NOTIFICATION_SECONDS instead
+    """
+
+    CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH = 5  # Check every 5 seconds, or earlier on a notification
+    CONFIRM_AFTER_N_SECONDS = E2E_WAIT_CONFIRM_SECONDS  # Re-check after 5 seconds to confirm that it has finished
+    CONFIRM_AFTER_NOTIFICATION_SECONDS = E2E_WAIT_NOTIFIED_CONFIRM_SECONDS  # Or after 1 second, after a notification
+
+    def __init__(self, state: ProcessState, process_id: str, max_seconds_to_try: float):
+        """Initialise ProcessWait.
+
+        :param state: The source of the process state
+        :param process_id: the process id of the process to wait for
+        :param max_seconds_to_try: the max time to check for running jobs within the process, the time is
+            reset as long as the process is expanding
+        """
+        self.state = state
+        self.process_id = process_id
+        self.max_seconds_to_try = max_seconds_to_try
+
+        self.confirmed: float = 0  # Number of times the process has been confirmed to have finished
+        self.last_pending_jobs = 0  # Last number of pending jobs that has been registered
+        self.seconds_to_try = max_seconds_to_try  # Max nr seconds to wait for process to have finished
+        self.interval: float = 0  # Number of seconds to wait before the next check
+        self.notifications = 0  # Number of notifications for the process that had been received at the last check
+        self._last_check = time.monotonic()
+        self._confirm_at: float = 0  # Time at which the last confirmation can be accepted
+
+    def check(self) -> Optional[bool]:
+        """Check the process once.
+
+        :return: True if the process has finished, False if the max wait time has been exceeded and None if the
+            process should be checked again after self.interval seconds
+        """
+        now = time.monotonic()
+        self.seconds_to_try -= now - self._last_check
+        self._last_check = now
+        if self.seconds_to_try <= 0:
+            return False
+
+        notifications = process_notifications.received(self.process_id)
+        notified = notifications > self.notifications
+        self.notifications = notifications
+
+        # count pending jobs for the given process
+        pending_jobs = self.state.pending_jobs(self.process_id)
+
+        if pending_jobs > self.last_pending_jobs:
+            # Process is still expanding
+            self.seconds_to_try = self.max_seconds_to_try
+        self.last_pending_jobs = pending_jobs
+
+        if pending_jobs == 0:
+            return self._confirm(now, notified)
+        self.confirmed = 0  # process still running; reset any confirmations
+        self.interval = self.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH
+        return None
+
+    def _confirm(self, now: float, notified: bool) -> Optional[bool]:
+        """Confirm that the process without pending jobs has finished, True if sufficiently confirmed.
+
+        :param now: The time of the check
+        :param notified: True if a notification of the process has been received since the previous check
+        """
+        if now < self._confirm_at:
+            # Woken up before the confirmation interval has passed, eg by a notification
+            self.interval = self._confirm_at - now
+            return None
+
+        if self.confirmed >= 1:
+            # If sufficiently confirmed then consider process as finished
+            return True
+
+        # count pending notifications or workflow starts
+        if self.state.pending_messages() == 0:
+            # No pending jobs and no pending messages
+            # Confirmation is required because of a possible race condition
+            # - Workflow has accepted the message but not yet committed the job
+            self.confirmed += 1
+        else:
+            # No pending jobs but there are pending messages
+            # Require extra confirmations
+            self.confirmed += 0.5
+        self.interval = self.CONFIRM_AFTER_NOTIFICATION_SECONDS if notified else self.CONFIRM_AFTER_N_SECONDS
+        self._confirm_at = now + self.interval
+        return None
+
+
+class WaitScheduler:
+    """Run the checks of process waits in a single background thread."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        # Heap of (due time, sequence number, wait, callback)
+        self._scheduled: list[tuple[float, int, ProcessWait, Callable[[bool], None]]] = []
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        process_notifications.add_listener(self.wake)
+
+    def schedule(self, wait: ProcessWait, on_done: Callable[[bool], None]) -> None:
+        """Check :wait: until it is done, then call :on_done: with the result of the wait.
+
+        :param wait: The wait to schedule
+        :param on_done: Called with True if the process has finished, False if the max wait time has been exceeded
+        """
+        with self._condition:
+            self._push(time.monotonic(), wait, on_done)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="WaitScheduler", daemon=True)
+                self._thread.start()
+
+    def wake(self, process_id: Optional[str]) -> None:
+        """Check the waits for :process_id: now."""
+        with self._condition:
+            now = time.monotonic()
+            if any(wait.process_id == process_id for _, _, wait, _ in self._scheduled):
+                self._scheduled = [
+                    (now if wait.process_id == process_id else due, seq, wait, on_done)
+                    for due, seq, wait, on_done in self._scheduled
+                ]
+                heapq.heapify(self._scheduled)
+                self._condition.notify()
+
+    def pending(self) -> int:
+        """Return the number of scheduled waits."""
+        with self._condition:
+            return len(self._scheduled)
+
+    def _push(self, due: float, wait: ProcessWait, on_done: Callable[[bool], None]) -> None:
+        heapq.heappush(self._scheduled, (due, next(self._sequence), wait, on_done))
+        self._condition.notify()
+
+    def _next(self) -> tuple[ProcessWait, Callable[[bool], None]]:
+        with self._condition:
+            while not self._scheduled or self._scheduled[0][0] > time.monotonic():
+                timeout = self._scheduled[0][0] - time.monotonic() if self._scheduled else None
+                self._condition.wait(timeout)
+            _, _, wait, on_done = heapq.heappop(self._scheduled)
+            return wait, on_done
+
+    def _step(self) -> None:
+        wait, on_done = self._next()
+        try:
+            result = wait.check()
+        except Exception as e:
+            # Any failure to check the process (eg management API unavailable), retry after the default interval
+            logger.warning(f"Wait for process {wait.process_id} failed to check the process state: {str(e)}")
+            wait.interval = wait.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH
+            result = None
+
+        if result is None:
+            with self._condition:
+                self._push(time.monotonic() + wait.interval, wait, on_done)
+        else:
+            try:
+                on_done(result)
+            except Exception as e:
+                logger.error(f"Wait for process {wait.process_id} failed to report: {str(e)}")
+
+    def _run(self) -> None:
+        while True:
+            self._step()
+
+
+wait_scheduler = WaitScheduler()
@@ -0,0 +1,58 @@
+"""Lazily loaded GOB model.
+
+Loading the GOB model takes a few seconds, and only the data consistency tests need it. The model is therefore
+loaded on first use instead of when gobtest is imported: the end-to-end tests, the unit tests and a service
+start do not wait for it. The model is loaded once, by the first thread that uses it.
+
+The worker processes of the data consistency tests are forked from a fork server that loads the model, see preload.
+"""
+
+import threading
+from typing import Any, Iterator
+
+from gobtest.profiling import startup_profiler
+
+
+class LazyGOBModel:
+    """Proxy of GOBModel, the model is loaded on first use."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._model: Any = None
+
+    def load(self) -> Any:
+        """Return the GOB model, it is loaded if it has not been loaded yet."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with startup_profiler.step("Load GOB model"):
+                        from gobcore.model import GOBModel
+
+                        self._model = GOBModel()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        """Return True if the model has been loaded."""
+        return self._model is not None
+
+    def __getitem__(self, catalog_name: str) -> Any:
+        """Return the model of the catalog, as GOBModel()[catalog_name]."""
+        return self.load()[catalog_name]
+
+    def __contains__(self, catalog_name: str) -> bool:
+        """Return True if the catalog is in the model."""
+        return catalog_name in self.load()
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the catalog names."""
+        return iter(self.load())
+
+    def __getattr__(self, name: str) -> Any:
+        """Return the other attributes and methods of GOBModel, private attributes do not load the model."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+gob_model = LazyGOBModel()
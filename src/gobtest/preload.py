@@ -0,0 +1,8 @@
+"""Preloaded by the fork server of the worker processes.
+
+Loads the GOB model in the fork server, so that every worker process inherits the loaded model.
+"""
+
+from gobtest import gob_model
+
+gob_model.load()
@@ -0,0 +1,139 @@
+"""Startup profiling.
+
+With PROFILE_STARTUP=true the import of every module and the initialisation steps of the service are timed, to find
+what slows down a cold start of the service. The report lists the modules with the longest import times: the
+cumulative time, including the imports of the module, and the self time, excluding them. An initialisation step,
+eg loading the GOB model, is reported as soon as it has finished. The profile is reported through the logger.
+
+The imports are timed by a finder in front of sys.meta_path, it wraps the loader of every module that is imported
+after the profiler has been installed. The profiler is installed when the gobtest package is imported, so the
+imports of the service are timed but the imports of the Python startup are not.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+from typing import Any, Iterator, Optional, Sequence
+
+from gobtest.config import PROFILE_STARTUP
+
+# Number of modules in the report
+REPORT_MODULES = 25
+
+
+def _log(message: str) -> None:
+    # The logger is imported on use, so that its import is timed as well
+    from gobcore.logging.logger import logger
+
+    logger.info(f"Startup profile: {message}")
+
+
+class _TimedLoader(Loader):
+    """Time the execution of a module, all other loader attributes are those of the wrapped loader."""
+
+    def __init__(self, loader: Loader, profiler: "StartupProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        with self._profiler.timed_import(self._name):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(MetaPathFinder):
+    """Find modules with the other finders, and wrap their loaders in a _TimedLoader."""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(
+        self, fullname: str, path: Optional[Sequence[str]], target: Optional[ModuleType] = None
+    ) -> Optional[ModuleSpec]:
+        for finder in sys.meta_path:
+            spec = None if finder is self else finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """Time the imports of modules and the initialisation steps of the service."""
+
+    def __init__(self, enabled: bool = PROFILE_STARTUP):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Cumulative and self seconds per imported module
+        self.imports: dict[str, tuple[float, float]] = {}
+        self._finder: Optional[_TimingFinder] = None
+
+    def install(self) -> None:
+        """Start timing the imports, if the profiler is enabled."""
+        if self.enabled and self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        """Stop timing the imports."""
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def timed_import(self, name: str) -> Iterator[None]:
+        """Time the import of module :name:, the time of the nested imports is subtracted from its self time."""
+        # Cumulative time of the nested imports, per import in progress in this thread
+        stack: list[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += seconds
+            with self._lock:
+                self.imports[name] = seconds, seconds - nested
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time the initialisation step :name:, it is reported when it has finished and the profiler is enabled."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                _log(f"{name} took {time.perf_counter() - start:.3f} seconds")
+
+    def report(self, limit: int = REPORT_MODULES) -> list[str]:
+        """Return a line per module with the longest cumulative import times, max :limit: modules."""
+        with self._lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            f"{name}: {cumulative:.3f} seconds ({self_seconds:.3f} seconds self)"
+            for name, (cumulative, self_seconds) in imports[:limit]
+        ]
+
+    def log_report(self) -> None:
+        """Log the import times, if the profiler is enabled."""
+        if self.enabled:
+            _log(f"{len(self.imports)} modules imported")
+            for line in self.report():
+                _log(line)
+
+
+startup_profiler = StartupProfiler()
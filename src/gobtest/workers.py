@@ -0,0 +1,299 @@
+"""Worker pools per service.
+
+By default every service in the service definition is handled by exactly one consumer thread.
+A worker pool allows a service to handle multiple messages concurrently:
+
+- thread: messages are handled in the consumer threads, for I/O-bound handlers
+- process: messages are handled in worker processes, for CPU-bound handlers
+
+Worker processes are forked from a fork server that has preloaded the GOB model, so a new worker process
+starts without loading the model again. A worker process can be recycled after a number of runs or when its
+peak RSS exceeds a threshold, which bounds the memory that is accumulated by long-lived workers.
+
+A handler can have a consumer context (see consumer_context) that is entered in the service process for every
+message, also in process mode, to keep bookkeeping of the service in the service process instead of in the worker.
+
+Worker processes are daemonic, so they are stopped with the service. A daemonic process cannot start processes of
+its own, a handler that starts processes (see starts_processes) is therefore rejected in process mode.
+
+The prefetch of a pool is the number of consumer threads for the queue of the service, and thus the maximum
+number of messages that the service takes from its queue at any time. The prefetch defaults to the number of
+workers; a larger prefetch lets messages wait locally for a free worker.
+"""
+
+import queue
+import resource
+import threading
+from contextlib import nullcontext
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, ContextManager, Optional
+
+from gobcore.exceptions import GOBException
+from gobcore.logging.logger import logger
+from gobcore.message_broker.typing import ServiceDefinition
+
+THREAD = "thread"
+PROCESS = "process"
+
+# Modules that are loaded by the fork server, and thereby inherited by every worker process
+PRELOAD = ["gobtest.data_consistency.data_consistency_test", "gobtest.preload"]
+
+Handler = Callable[[dict[str, Any]], Any]
+Context = Callable[[dict[str, Any]], ContextManager[Any]]
+
+
+class WorkerProcessError(GOBException):  # type: ignore[misc]
+    """Worker process exited unexpectedly."""
+
+    pass
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _serve(connection: Connection) -> None:
+    """Run the tasks that are received on :connection: until a stop (None) is received."""
+    while task := connection.recv():
+        func, args = task
+        try:
+            ok, result = True, func(*args)
+        except Exception as e:
+            ok, result = False, e
+        try:
+            connection.send((ok, result, _peak_rss_mb()))
+        except Exception as e:
+            # The result or exception could not be pickled
+            connection.send((False, WorkerProcessError(f"Result could not be returned: {str(e)}"), _peak_rss_mb()))
+
+
+class WorkerProcess:
+    """A single worker process that is (re)started on demand and recycled after max runs or max RSS."""
+
+    def __init__(self, context: BaseContext, max_runs: int = 0, max_rss_mb: int = 0):
+        """Initialise WorkerProcess.
+
+        :param context: The multiprocessing context to start the process in
+        :param max_runs: Recycle the process after this number of runs, 0 for no limit
+        :param max_rss_mb: Recycle the process when its peak RSS exceeds this number of MB, 0 for no limit
+        """
+        self.context = context
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.runs = 0
+        self._process: Optional[BaseProcess] = None
+        self._connection: Optional[Connection] = None
+
+    def start(self) -> None:
+        """Start the worker process."""
+        self._connection, child_connection = self.context.Pipe()
+        self._process = self.context.Process(target=_serve, args=(child_connection,), daemon=True)  # type: ignore
+        self._process.start()
+        child_connection.close()
+        self.runs = 0
+
+    def stop(self) -> None:
+        """Stop the worker process, if it is running."""
+        if self._process is not None and self._connection is not None:
+            try:
+                self._connection.send(None)
+            except OSError:
+                # The process has already exited
+                pass
+            self._process.join()
+            self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run :func: with :args: in the worker process, return its result or raise its exception.
+
+        :func: and :args: are pickled, so :func: should be a module-level function.
+        """
+        if self._process is None:
+            self.start()
+        assert self._process is not None and self._connection is not None
+
+        try:
+            self._connection.send((func, args))
+            ok, result, rss_mb = self._connection.recv()
+        except (EOFError, OSError):
+            self._process.join()
+            exitcode = self._process.exitcode
+            self.stop()
+            raise WorkerProcessError(f"Worker process exited unexpectedly with exit code {exitcode}")
+
+        self.runs += 1
+        if (self.max_runs and self.runs >= self.max_runs) or (self.max_rss_mb and rss_mb > self.max_rss_mb):
+            # Recycle, the replacement is started immediately to have it ready for the next run
+            self.stop()
+            self.start()
+
+        if not ok:
+            raise result
+        return result
+
+
+class ProcessPool:
+    """Pool of worker processes, every process runs one task at a time."""
+
+    def __init__(self, workers: int, max_runs: int = 0, max_rss_mb: int = 0):
+        """Initialise ProcessPool.
+
+        The worker processes are started on first use.
+
+        :param workers: Number of worker processes
+        :param max_runs: Recycle a process after this number of runs, 0 for no limit
+        :param max_rss_mb: Recycle a process when its peak RSS exceeds this number of MB, 0 for no limit
+        """
+        # Forking a process with running consumer threads is unsafe, fork from a single threaded fork server
+        context = get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD)
+
+        self._idle: queue.SimpleQueue[WorkerProcess] = queue.SimpleQueue()
+        for _ in range(workers):
+            self._idle.put(WorkerProcess(context, max_runs, max_rss_mb))
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run :func: with :args: in the first idle worker process, wait for an idle process if none is available."""
+        worker = self._idle.get()
+        try:
+            return worker.run(func, *args)
+        finally:
+            self._idle.put(worker)
+
+
+def consumer_context(context: Context) -> Callable[[Handler], Handler]:
+    """Decorate a handler with a context that is entered in the service process, also in process mode.
+
+    The handler enters the context itself when it is run in the service process. In process mode the handler is run
+    in a worker process, and the context is entered around it in the service process as well. The handler itself is
+    returned, so that it can still be pickled to run in the worker process.
+
+    :param context: Returns the context for a message
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        setattr(handler, "consumer_context", context)
+        return handler
+
+    return decorator
+
+
+def starts_processes(enabled: bool) -> Callable[[Handler], Handler]:
+    """Decorate a handler that starts processes of its own if :enabled:, it cannot be run in process mode.
+
+    :param enabled: True if the handler starts processes
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        setattr(handler, "starts_processes", enabled)
+        return handler
+
+    return decorator
+
+
+def _run_in_process(handler: Handler, name: str, msg: dict[str, Any]) -> Any:
+    """Run :handler: for :msg: in a worker process."""
+    # The logger configuration of the consumer thread is not available in the worker process
+    logger.configure(msg, name.upper())
+    return handler(msg)
+
+
+class WorkerPool:
+    """Worker pool for a single service."""
+
+    def __init__(self, name: str, workers: int, mode: str = THREAD, prefetch: Optional[int] = None):
+        """Initialise WorkerPool.
+
+        :param name: The name of the service
+        :param workers: Number of messages that are handled concurrently
+        :param mode: thread or process
+        :param prefetch: Number of consumer threads, defaults to the number of workers
+        """
+        if mode not in [THREAD, PROCESS]:
+            raise ValueError(f"Unknown worker mode '{mode}' for service {name}")
+        if workers < 1 or (prefetch is not None and prefetch < workers):
+            raise ValueError(f"Service {name} requires at least 1 worker and a prefetch of at least #workers")
+
+        self.name = name
+        self.workers = workers
+        self.mode = mode
+        self.prefetch = prefetch or workers
+        self._semaphore = threading.BoundedSemaphore(workers)
+        self._processes = ProcessPool(workers) if mode == PROCESS else None
+
+    def wrap(self, handler: Handler) -> Handler:
+        """Return a handler that runs :handler: in this pool, raises ValueError if the pool cannot run it."""
+        if self.mode == PROCESS and getattr(handler, "starts_processes", False):
+            raise ValueError(
+                f"Service {self.name} starts processes of its own and cannot run in worker processes, use thread mode"
+            )
+
+        def handle_in_thread(msg: dict[str, Any]) -> Any:
+            with self._semaphore:
+                return handler(msg)
+
+        def handle_in_process(msg: dict[str, Any]) -> Any:
+            assert self._processes is not None
+            with getattr(handler, "consumer_context", lambda msg: nullcontext())(msg):
+                return self._processes.run(_run_in_process, handler, self.name, msg)
+
+        return handle_in_thread if self.mode == THREAD else handle_in_process
+
+
+def parse_worker_config(spec: str) -> dict[str, WorkerPool]:
+    """Parse the worker pool configuration.
+
+    :param spec: Comma separated <service>=<workers>[:<thread|process>[:<prefetch>]]
+    :return: Worker pool by service name
+    """
+    pools = {}
+    for item in filter(None, (item.strip() for item in spec.split(","))):
+        try:
+            name, settings = item.split("=")
+            workers, *options = settings.split(":")
+            if len(options) > 2:
+                raise ValueError("too many options")
+            mode = options[0] if options else THREAD
+            prefetch = int(options[1]) if len(options) > 1 else None
+            pools[name] = WorkerPool(name, int(workers), mode, prefetch)
+        except ValueError as e:
+            raise ValueError(f"Invalid worker configuration '{item}': {str(e)}")
+    return pools
+
+
+def service_consumers(spec: str, service: str) -> int:
+    """Return the number of consumers of :service: in the worker pool configuration :spec:, see parse_worker_config."""
+    pool = parse_worker_config(spec).get(service)
+    return pool.prefetch if pool else 1
+
+
+def apply_worker_config(definition: ServiceDefinition, pools: dict[str, WorkerPool]) -> ServiceDefinition:
+    """Return the service definition with a consumer per prefetched message for every service with a worker pool.
+
+    The additional consumers are added as services <service>_<n> on the same queue.
+
+    :param definition: The service definition
+    :param pools: Worker pool by service name
+    :return:
+    """
+    unknown = set(pools) - set(definition)
+    if unknown:
+        raise ValueError(f"Worker configuration for unknown services: {', '.join(sorted(unknown))}")
+
+    result: ServiceDefinition = {}
+    for name, service in definition.items():
+        if name not in pools:
+            result[name] = service
+            continue
+
+        pool = pools[name]
+        handler = pool.wrap(service["handler"])
+        for n in range(pool.prefetch):
+            result[f"{name}_{n}" if n else name] = {**service, "handler": handler}
+    return result
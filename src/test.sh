@@ -19,6 +19,9 @@ coverage run --source=gobtest -m pytest
 echo "Coverage report"
 coverage report --fail-under=100
 
+echo "\nRunning data consistency benchmark (query and fetch counters are gated, rows/sec is only reported)"
+python -m benchmarks.data_consistency --sizes 10k
+
 echo "\nCheck if Black finds no potential reformat fixes"
 black --check --diff gobtest
 
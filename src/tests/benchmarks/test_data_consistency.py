@@ -0,0 +1,226 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock, ANY
+
+import os
+import tempfile
+
+from benchmarks.data_consistency.datastore import SQLiteDatastore, StandInDatastoreFactory
+from benchmarks.data_consistency import __main__ as benchmark
+from benchmarks.data_consistency.run import compare, generate, load_baseline, measure, run, update_baseline
+from benchmarks.data_consistency.synthetic import SyntheticCollection
+
+
+class TestSyntheticCollection(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = {name: os.path.join(self.tmpdir.name, name) for name in ['source', 'gob', 'merge']}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_init(self):
+        with self.assertRaises(AssertionError):
+            SyntheticCollection(10, states=0, merge=True)
+
+        with self.assertRaises(AssertionError):
+            SyntheticCollection(1, states=2)
+
+    def test_model(self):
+        collection = SyntheticCollection(10, states=0, references=False, json_attributes=False, geometries=False)
+        model = collection.model()['collections']['entities']
+        self.assertEqual(['identificatie', 'naam', 'aantal'], list(model['attributes']))
+        self.assertFalse(model['has_states'])
+        self.assertIn('_source_id', model['all_fields'])
+
+        collection = SyntheticCollection(10, states=2)
+        attributes = collection.model()['collections']['entities']['attributes']
+        self.assertEqual(['identificatie', 'naam', 'aantal', 'volgnummer', 'geometrie', 'kenmerken', 'ligt_in',
+                          'grenst_aan'], list(attributes))
+
+    def test_import_definition(self):
+        collection = SyntheticCollection(10, states=2, geometries=False, merge=True)
+        definition = collection.import_definition('source db')
+
+        self.assertEqual({'database': 'source db'}, definition['source']['application_config'])
+        self.assertEqual('diva_into_dgdialog', definition['source']['merge']['id'])
+        self.assertNotIn('geometrie', definition['gob_mapping'])
+        self.assertEqual({'source_mapping': {'bronwaarde': 'ligt_in'}}, definition['gob_mapping']['ligt_in'])
+
+    def test_populate(self):
+        collection = SyntheticCollection(100, states=2, merge=True)
+        collection.populate(self.db['source'], self.db['gob'], self.db['merge'])
+
+        datastore = SQLiteDatastore({'database': self.db['gob']})
+        datastore.connect()
+        rows = list(datastore.query("SELECT * FROM benchmark_entities WHERE _source_id = 'id1.2'"))
+        self.assertEqual(1, len(rows))
+        self.assertEqual('id1', rows[0]['identificatie'])
+        self.assertEqual(2, rows[0]['volgnummer'])
+        # JSON columns are returned as Python objects
+        self.assertEqual(['soort', 'omschrijving'], list(rows[0]['kenmerken']))
+
+        datastore = SQLiteDatastore({'database': self.db['merge']})
+        datastore.connect()
+        self.assertEqual(10, len(list(datastore.query("SELECT * FROM merge_source"))))
+
+        # Same seed, same data
+        source = SQLiteDatastore({'database': self.db['source']})
+        source.connect()
+        first = list(source.query("SELECT * FROM source"))
+        collection.populate(self.db['source'], self.db['gob'], self.db['merge'])
+        self.assertEqual(first, list(source.query("SELECT * FROM source")))
+
+        with self.assertRaises(AssertionError):
+            collection.populate(self.db['source'], self.db['gob'])
+
+
+class TestSQLiteDatastore(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.factory = StandInDatastoreFactory()
+        self.datastore = self.factory.get_datastore({'database': os.path.join(self.tmpdir.name, 'db')})
+        self.datastore.connect()
+        self.datastore.connection.execute("CREATE TABLE t (id TEXT)")
+        self.datastore.connection.executemany("INSERT INTO t VALUES (?)", [('a%',), ('b',), ('c',)])
+
+    def tearDown(self):
+        self.datastore.disconnect()
+        self.tmpdir.cleanup()
+
+    def test_query(self):
+        self.assertEqual([{'id': 'a%'}, {'id': 'b'}, {'id': 'c'}], list(self.datastore.query("SELECT * FROM t",
+                                                                                              arraysize=2)))
+        self.assertEqual({'count': 3}, next(self.datastore.query("SELECT count(*) FROM t")))
+        self.assertEqual([{'id': 'a%'}], list(self.datastore.query("SELECT * FROM t WHERE id LIKE 'a%%'")))
+        self.assertEqual(("POINT (1 2)",), next(self.datastore.query("SELECT ST_AsText('POINT (1 2)'::geometry)")))
+        self.assertEqual(4, self.factory.queries)
+
+    def test_disconnect(self):
+        self.datastore.disconnect()
+        self.assertIsNone(self.datastore.connection)
+
+        with self.assertRaises(AssertionError):
+            self.datastore.query("SELECT * FROM t")
+
+
+class TestRun(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_measure(self):
+        collection = SyntheticCollection(100, states=0, references=False, json_attributes=False, geometries=False)
+        generate(collection, self.tmpdir.name, 'plain-100')
+
+        result = measure(collection, self.tmpdir.name, 'plain-100')
+        self.assertEqual(100, result['rows'])
+        self.assertEqual(100, result['rows_fetched'])
+        self.assertGreater(result['bytes_fetched'], 0)
+        # Source query, GOB count and the GOB lookups
+        self.assertGreater(result['queries'], 2)
+        self.assertEqual(result['metrics']['counters']['bytes_fetched'], result['bytes_fetched'])
+
+        # Same data, same counts
+        self.assertEqual(
+            {k: result[k] for k in ['queries', 'rows_fetched', 'bytes_fetched']},
+            {k: v for k, v in measure(collection, self.tmpdir.name, 'plain-100').items()
+             if k in ['queries', 'rows_fetched', 'bytes_fetched']}
+        )
+
+    @patch("benchmarks.data_consistency.run.ProcessPoolExecutor")
+    @patch("benchmarks.data_consistency.run.generate")
+    def test_run(self, mock_generate, mock_executor):
+        result = {'rows_per_second': 1000, 'peak_rss_mb': 50, 'queries': 10, 'bytes_fetched': 2000}
+        mock_executor.return_value.__enter__.return_value.submit.return_value.result.return_value = result
+
+        self.assertEqual({'plain-10k': result, 'full-10k': result}, run(['plain', 'full'], ['10k'], 'dir'))
+        self.assertEqual(2, mock_generate.call_count)
+        submit = mock_executor.return_value.__enter__.return_value.submit
+        self.assertEqual((measure, ANY, 'dir', 'plain-10k'), submit.call_args_list[0].args)
+
+
+class TestBaseline(TestCase):
+
+    def test_compare(self):
+        baseline = {'full-10k': {'queries': 10, 'rows_fetched': 100, 'bytes_fetched': 1000}}
+
+        # Timing and memory are not compared, equal or lower counts pass
+        self.assertEqual([], compare({
+            'full-10k': {'rows_per_second': 1, 'peak_rss_mb': 1000, 'queries': 9, 'rows_fetched': 100,
+                         'bytes_fetched': 1000},
+        }, baseline))
+
+        self.assertEqual([
+            'full-10k: 11 queries, baseline 10',
+            'full-10k: 1,001 bytes fetched, baseline 1,000',
+        ], compare({'full-10k': {'queries': 11, 'rows_fetched': 100, 'bytes_fetched': 1001}}, baseline))
+
+    def test_compare_missing_baseline(self):
+        self.assertEqual(
+            ['other-10k: no baseline, record it with --update-baseline'],
+            compare({'other-10k': {'queries': 1, 'rows_fetched': 1, 'bytes_fetched': 1}}, {})
+        )
+
+    def test_update_baseline(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'baselines.json')
+            self.assertEqual({}, load_baseline(path))
+
+            update_baseline(path, {'a': {'rows_per_second': 1, 'queries': 3, 'rows_fetched': 4, 'bytes_fetched': 5,
+                                         'metrics': {}}})
+            update_baseline(path, {'b': {'queries': 6, 'rows_fetched': 7, 'bytes_fetched': 8}})
+
+            self.assertEqual({
+                'a': {'queries': 3, 'rows_fetched': 4, 'bytes_fetched': 5},
+                'b': {'queries': 6, 'rows_fetched': 7, 'bytes_fetched': 8},
+            }, load_baseline(path))
+
+    def test_baselines(self):
+        # The scenarios of test.sh have a baseline
+        baseline = load_baseline(benchmark.DEFAULT_BASELINE)
+        self.assertEqual({'plain-10k', 'full-10k', 'merged-10k'}, set(baseline))
+
+
+@patch("benchmarks.data_consistency.__main__.run")
+class TestMain(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.baseline = os.path.join(self.tmpdir.name, 'baselines.json')
+        self.result = {'queries': 10, 'rows_fetched': 100, 'bytes_fetched': 1000}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def main(self, *args):
+        with patch("sys.argv", ['benchmark', '--scenarios', 'plain', '--baseline', self.baseline, *args]):
+            return benchmark.main()
+
+    def test_missing_baseline(self, mock_run):
+        mock_run.return_value = {'plain-10k': self.result}
+        self.assertEqual(1, self.main())
+
+        # Recording the baseline succeeds
+        self.assertEqual(0, self.main('--update-baseline'))
+        self.assertEqual({'plain-10k': self.result}, load_baseline(self.baseline))
+
+    def test_pass_and_regress(self, mock_run):
+        update_baseline(self.baseline, {'plain-10k': self.result})
+
+        mock_run.return_value = {'plain-10k': self.result}
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(0, self.main())
+        # The throughput is not compared, which is reported
+        mock_print.assert_called_with(benchmark.NOT_GATED)
+
+        # Also not when it drops
+        mock_run.return_value = {'plain-10k': {**self.result, 'rows_per_second': 1}}
+        self.assertEqual(0, self.main())
+
+        mock_run.return_value = {'plain-10k': {**self.result, 'queries': 11}}
+        self.assertEqual(1, self.main())
@@ -0,0 +1,98 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import json
+import requests
+
+from benchmarks.e2e.run import CollectingLogger, Harness, run_check, run_wait
+from benchmarks.e2e.server import CLEAR_TESTS, PROCESS_STATE, WORKFLOW_STATE, StandInGOB, synthetic_ndjson
+from gobtest.e2e.wait import ProcessWait
+
+
+class TestStandInGOB(TestCase):
+
+    def setUp(self):
+        self.gob = StandInGOB(pending_messages=3)
+        self.url = self.gob.start()
+
+    def tearDown(self):
+        self.gob.stop()
+
+    def test_synthetic_ndjson(self):
+        lines = synthetic_ndjson(3).splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual(2, json.loads(lines[2])['integer'])
+
+    def test_workflow_state(self):
+        r = requests.get(f"{self.url}{WORKFLOW_STATE}")
+        self.assertEqual([{'name': 'workflow', 'messages_unacknowledged': 3}], r.json())
+
+    def test_process_state(self):
+        job_id = self.gob.start_job('pid')
+        self.gob.start_job('pid')
+        self.gob.end_job('pid', job_id, 'failed')
+
+        r = requests.get(f"{self.url}{PROCESS_STATE}pid")
+        self.assertEqual([{'id': 1, 'status': 'failed'}, {'id': 2, 'status': 'started'}], r.json())
+        self.assertEqual([], requests.get(f"{self.url}{PROCESS_STATE}other").json())
+
+    def test_api(self):
+        self.gob.set_response('/cat/col/?ndjson=true', 'any output\n')
+
+        r = requests.get(f"{self.url}/gob/public/cat/col/?ndjson=true")
+        self.assertEqual(200, r.status_code)
+        self.assertEqual('any output\n', r.text)
+        self.assertEqual(404, requests.get(f"{self.url}/gob/public/cat/other/").status_code)
+
+        self.assertEqual(200, requests.delete(f"{self.url}{CLEAR_TESTS}").status_code)
+        self.assertEqual(404, requests.delete(f"{self.url}/gob/public/cat/col/").status_code)
+
+        self.assertEqual({'api': 2, 'delete': 2}, dict(self.gob.requests))
+
+    def test_stop(self):
+        self.gob.stop()
+        self.gob.stop()
+        with self.assertRaises(AssertionError):
+            self.gob.url
+
+
+class TestCollectingLogger(TestCase):
+
+    def test_counts(self):
+        logger = CollectingLogger()
+        logger.info('any info')
+        logger.error('any error')
+        logger.error('any other error')
+        self.assertEqual({'info': 1, 'warning': 0, 'error': 2}, logger.counts())
+
+
+class TestRun(TestCase):
+
+    def test_harness(self):
+        with Harness() as harness:
+            self.assertTrue(harness.gob.url)
+            result = harness.result(1.23456, any='value')
+        self.assertEqual({'seconds': 1.235, 'any': 'value', 'requests': {},
+                          'messages': {'info': 0, 'warning': 0, 'error': 0}}, result)
+
+    @patch.object(ProcessWait, 'CONFIRM_AFTER_N_SECONDS', 0.1)
+    @patch.object(ProcessWait, 'CONFIRM_AFTER_NOTIFICATION_SECONDS', 0.1)
+    def test_run_wait(self):
+        result = run_wait(0, 0, processes=2, jobs=2)
+        self.assertEqual(2, result['finished'])
+        self.assertEqual(0, result['messages']['error'])
+        self.assertGreater(result['requests']['process'], 0)
+
+    def test_run_check(self):
+        result = run_check(0, rows=10, checks=2)
+        self.assertEqual(10, result['rows'])
+        self.assertEqual({'info': 2, 'warning': 0, 'error': 0}, result['messages'])
+        self.assertEqual(2, result['requests']['api'])
+
+    def test_failed_step(self):
+        with Harness() as harness:
+            step = {'type': 'workflow_step', 'step_name': 'any step', 'header': {}}
+            with patch.object(harness.workflow, '_step', side_effect=Exception('any error')):
+                harness.workflow.run([step], 'pid')
+            status, body = harness.gob.get(f"{PROCESS_STATE}pid")
+        self.assertEqual([{'id': 1, 'status': 'failed'}], json.loads(body))
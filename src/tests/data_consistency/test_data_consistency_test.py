@@ -286,6 +286,11 @@ class TestDataConsistencyTest(TestCase):
         mock_logger.info.assert_called_with('Completed data consistency test on 4 rows of 13 rows total. '
                                             '1 rows contained errors. 2 rows could not be found.')
 
+        # All source rows are registered by the instrumentation
+        self.assertEqual(13, inst.metrics.counters['rows'])
+        self.assertEqual(13, inst.metrics.phases['source']['calls'] - 1)
+        self.assertGreater(inst.metrics.wall_time, 0)
+
         # Check count mismatch
         mock_logger.error.reset_mock()
         inst._get_gob_count = lambda: 0
@@ -294,6 +299,18 @@ class TestDataConsistencyTest(TestCase):
         mock_logger.error.assert_any_call('Have 2 missing rows in GOB, of 4 total rows.')
         self.assertEqual(mock_logger.error.call_count, 2)
 
+    @patch("gobtest.data_consistency.data_consistency_test.ProgressTicker", MagicMock())
+    def test_run_fails(self):
+        inst = DataConsistencyTest('cat', 'col', 'appl')
+        inst._connect = MagicMock(side_effect=Exception("connection failed"))
+
+        with self.assertRaises(Exception):
+            inst.run()
+
+        # The total time is measured, also for a failed test
+        self.assertIsNone(inst.metrics._start)
+        self.assertGreater(inst.metrics.wall_time, 0)
+
     @patch("gobtest.data_consistency.data_consistency_test.ProgressTicker", MagicMock())
     @patch("gobtest.data_consistency.data_consistency_test.logger")
     @patch("gobtest.data_consistency.data_consistency_test.random")
@@ -984,6 +1001,7 @@ WHERE
         inst.gob_db = MagicMock()
         inst.gob_db.query.side_effect = lambda query, name, arraysize, withhold: "any result"
         self.assertEqual(inst._read_from_gob_db("any query"), "any result")
+        self.assertEqual(1, inst.metrics.counters['gob_queries'])
         inst.gob_db.query.side_effect = GOBException("any GOB exception")
         self.assertEqual(inst._read_from_gob_db("any error query"), None)
 
@@ -1,16 +1,17 @@
 from unittest import TestCase
-from unittest.mock import patch, ANY
+from unittest.mock import patch, ANY, MagicMock
 
 from gobtest.data_consistency.handler import data_consistency_test_handler, can_handle, GOBConfigException, \
-    NotImplementedCatalogError, NotImplementedApplicationError
+    NotImplementedCatalogError, NotImplementedApplicationError, _report_metrics, _run_isolated, WorkerProcessError
 
 
 class TestDataConsistencyTestHandler(TestCase):
 
+    @patch("gobtest.data_consistency.handler.coalescer")
     @patch("gobtest.data_consistency.handler.datetime")
     @patch("gobtest.data_consistency.handler.logger")
     @patch("gobtest.data_consistency.handler.DataConsistencyTest")
-    def test_data_consistency_test_handler(self, mock_test, mock_logger, mock_datetime):
+    def test_data_consistency_test_handler(self, mock_test, mock_logger, mock_datetime, mock_coalescer):
         msg = {
             'header': {
                 'catalogue': 'the catalogue',
@@ -18,11 +19,21 @@ class TestDataConsistencyTestHandler(TestCase):
                 'application': 'the application',
             }
         }
+        mock_logger.get_summary.return_value = {'errors': []}
         res = data_consistency_test_handler(msg)
 
         mock_test.assert_called_with('the catalogue', 'the collection', 'the application')
         mock_test.return_value.__enter__.return_value.run.assert_called_once()
         mock_test.return_value.__exit__.assert_called_once()
+        # Test is registered as running to skip identical triggers
+        mock_coalescer.running.assert_called_with(('the catalogue', 'the collection', 'the application'))
+
+        # Also in the service process when the handler is run in a worker process
+        mock_coalescer.running.reset_mock()
+        data_consistency_test_handler.consumer_context(msg)
+        mock_coalescer.running.assert_called_with(('the catalogue', 'the collection', 'the application'))
+        # Without isolated workers the handler can run in a worker process
+        self.assertFalse(data_consistency_test_handler.starts_processes)
 
         self.assertEqual({
             'header': {
@@ -32,7 +43,10 @@ class TestDataConsistencyTestHandler(TestCase):
                 'application': 'the application',
                 'timestamp': mock_datetime.datetime.utcnow.return_value.isoformat.return_value,
             },
-            'summary': mock_logger.get_summary(),
+            'summary': {
+                'errors': [],
+                'metrics': mock_test.return_value.__enter__.return_value.metrics.summary.return_value,
+            },
         }, res)
 
         mock_logger.error.reset_mock()
@@ -40,7 +54,55 @@ class TestDataConsistencyTestHandler(TestCase):
         res = data_consistency_test_handler(msg)
         mock_logger.error.assert_called()
         # Assert that a response is returned
-        self.assertEqual(res, {'header': ANY, 'summary': ANY})
+        self.assertEqual(res, {'header': ANY, 'summary': {'errors': []}})
+
+    @patch("gobtest.data_consistency.handler.isolated_workers")
+    @patch("gobtest.data_consistency.handler.coalescer")
+    @patch("gobtest.data_consistency.handler.logger")
+    @patch("gobtest.data_consistency.handler.DataConsistencyTest")
+    def test_data_consistency_test_handler_isolated(self, mock_test, mock_logger, mock_coalescer, mock_workers):
+        msg = {'header': {'catalogue': 'the catalogue', 'collection': 'the collection'}}
+        mock_workers.run.return_value = {'errors': [], 'metrics': {}}
+        res = data_consistency_test_handler(msg)
+
+        # The test is run in a worker process, only the summary is returned
+        mock_test.assert_not_called()
+        mock_workers.run.assert_called_with(_run_isolated, msg, 'the catalogue', 'the collection', None)
+        mock_coalescer.running.assert_called_with(('the catalogue', 'the collection', None))
+        self.assertEqual({'errors': [], 'metrics': {}}, res['summary'])
+
+        # A crashed worker process is reported
+        mock_workers.run.side_effect = WorkerProcessError('exit code -9')
+        mock_logger.get_summary.return_value = {'errors': ['crashed']}
+        res = data_consistency_test_handler(msg)
+        mock_logger.error.assert_called_with('Dataset test failed: exit code -9')
+        self.assertEqual({'errors': ['crashed']}, res['summary'])
+
+    @patch("gobtest.data_consistency.handler._run_data_consistency_test")
+    @patch("gobtest.data_consistency.handler.logger")
+    def test_run_isolated(self, mock_logger, mock_run):
+        msg = {'header': {}}
+        self.assertEqual(mock_run.return_value, _run_isolated(msg, 'cat', 'col', 'app'))
+        mock_logger.configure.assert_called_with(msg, 'DATA_CONSISTENCY_TEST')
+        mock_run.assert_called_with('cat', 'col', 'app')
+
+    @patch("gobtest.data_consistency.handler.DATA_CONSISTENCY_TEST_METRICS_DIR", "/metrics")
+    def test_report_metrics(self):
+        tester = MagicMock()
+        tester.catalog_name = 'the cat'
+        tester.collection_name = 'the col'
+        tester.application = None
+
+        self.assertEqual(tester.metrics.summary.return_value, _report_metrics(tester))
+        tester.metrics.write_prometheus.assert_called_with(
+            '/metrics/gobtest_data_consistency_the_cat_the_col_.prom',
+            {'catalogue': 'the cat', 'collection': 'the col', 'application': ''}
+        )
+
+        with patch("gobtest.data_consistency.handler.DATA_CONSISTENCY_TEST_METRICS_DIR", None):
+            tester.metrics.write_prometheus.reset_mock()
+            _report_metrics(tester)
+            tester.metrics.write_prometheus.assert_not_called()
 
     @patch("gobtest.data_consistency.handler.DataConsistencyTest.run")
     @patch("gobtest.data_consistency.handler.logger")
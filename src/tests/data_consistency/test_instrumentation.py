@@ -0,0 +1,140 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock, mock_open
+
+from gobtest.data_consistency.instrumentation import Instrumentation, percentile, timed, _row_size
+
+
+class TestFunctions(TestCase):
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(2, percentile([4, 1, 3, 2], 50))
+        self.assertEqual(4, percentile([4, 1, 3, 2], 95))
+        self.assertEqual(1, percentile([4, 1, 3, 2], 0))
+
+    def test_row_size(self):
+        self.assertEqual(6, _row_size({'a': 'abc', 'b': 123, 'c': None}))
+        self.assertEqual(3, _row_size(123))
+
+    def test_timed(self):
+        class Timed:
+            metrics = Instrumentation()
+
+            @timed('phase', latency=True)
+            def method(self, a, b=0):
+                return a + b
+
+        self.assertEqual(3, Timed().method(1, b=2))
+        self.assertEqual(1, Timed.metrics.phases['phase']['calls'])
+        self.assertEqual(1, len(Timed.metrics.latencies['phase']))
+
+
+@patch("gobtest.data_consistency.instrumentation.time")
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        self.clock = 0
+
+    def _tick(self, mock_time, seconds=1):
+        """Let every clock reading advance the time with :seconds:."""
+        def tick():
+            self.clock += seconds
+            return self.clock
+        mock_time.perf_counter.side_effect = tick
+        mock_time.thread_time.side_effect = tick
+
+    def test_start_stop(self, mock_time):
+        self._tick(mock_time)
+        metrics = Instrumentation()
+        metrics.stop()
+        self.assertEqual(0, metrics.wall_time)
+
+        metrics.start()
+        metrics.stop()
+        # perf_counter 1 => 3, thread_time 2 => 4
+        self.assertEqual(2, metrics.wall_time)
+        self.assertEqual(2, metrics.cpu_time)
+
+    def test_phase_exclusive(self, mock_time):
+        self._tick(mock_time)
+        metrics = Instrumentation()
+
+        with metrics.phase('outer'):
+            with metrics.phase('inner', latency=True):
+                pass
+
+        # Each clock reading advances the clock, inner: wall 3 => 5, outer: wall 1 => 7 minus inner 2
+        self.assertEqual({'wall': 2, 'cpu': 2, 'calls': 1}, metrics.phases['inner'])
+        self.assertEqual({'wall': 4, 'cpu': 4, 'calls': 1}, metrics.phases['outer'])
+        self.assertEqual({'inner': [2]}, metrics.latencies)
+
+    def test_count(self, mock_time):
+        metrics = Instrumentation()
+        metrics.count('queries')
+        metrics.count('queries', 2)
+        self.assertEqual({'queries': 3}, metrics.counters)
+
+    def test_iterate(self, mock_time):
+        self._tick(mock_time)
+        metrics = Instrumentation()
+
+        self.assertEqual([{'a': 'ab'}, {'a': 'cde'}], list(metrics.iterate('source', [{'a': 'ab'}, {'a': 'cde'}])))
+        self.assertEqual({'rows': 2}, metrics.counters)
+        # Including the final StopIteration
+        self.assertEqual(3, metrics.phases['source']['calls'])
+
+        # Bytes are only counted if enabled
+        metrics = Instrumentation(count_bytes=True)
+        list(metrics.iterate('source', [{'a': 'ab'}, {'a': 'cde'}]))
+        self.assertEqual({'rows': 2, 'bytes_fetched': 5}, metrics.counters)
+
+    def test_summary(self, mock_time):
+        metrics = Instrumentation()
+        self.assertIsNone(metrics.summary()['rows_per_second'])
+
+        metrics.wall_time = 2
+        metrics.cpu_time = 1
+        metrics.counters = {'rows': 10}
+        metrics.phases = {'source': {'wall': 1.23456, 'cpu': 0.5, 'calls': 10.0}}
+        metrics.latencies = {'gob_lookup': [0.1, 0.2, 0.3]}
+
+        self.assertEqual({
+            'wall_time': 2,
+            'cpu_time': 1,
+            'rows_per_second': 5,
+            'phases': {'source': {'wall': 1.235, 'cpu': 0.5, 'calls': 10}},
+            'counters': {'rows': 10},
+            'latencies': {'gob_lookup': {'p50': 0.2, 'p95': 0.3, 'p99': 0.3}},
+        }, metrics.summary())
+
+    def test_to_prometheus(self, mock_time):
+        metrics = Instrumentation()
+        metrics.wall_time = 2
+        metrics.counters = {'rows': 10}
+        metrics.phases = {'source': {'wall': 1, 'cpu': 0.5, 'calls': 10}}
+        metrics.latencies = {'gob_lookup': [0.1]}
+
+        result = metrics.to_prometheus({'catalogue': 'cat "a"'})
+
+        self.assertIn('# TYPE gobtest_data_consistency_wall_seconds gauge\n', result)
+        self.assertIn('gobtest_data_consistency_wall_seconds{catalogue="cat \\"a\\""} 2\n', result)
+        self.assertIn('gobtest_data_consistency_rows_per_second{catalogue="cat \\"a\\""} 5.0\n', result)
+        self.assertIn('gobtest_data_consistency_phase_wall_seconds{catalogue="cat \\"a\\"",phase="source"} 1\n',
+                      result)
+        self.assertIn('gobtest_data_consistency_rows{catalogue="cat \\"a\\""} 10\n', result)
+        self.assertIn('# TYPE gobtest_data_consistency_gob_lookup_latency_seconds summary\n', result)
+        self.assertIn('gobtest_data_consistency_gob_lookup_latency_seconds{catalogue="cat \\"a\\"",quantile="0.95"} '
+                      '0.1\n', result)
+
+    @patch("gobtest.data_consistency.instrumentation.os.replace")
+    def test_write_prometheus(self, mock_replace, mock_time):
+        metrics = Instrumentation()
+        metrics.to_prometheus = MagicMock(return_value='metrics')
+
+        with patch("builtins.open", mock_open()) as mocked_open:
+            metrics.write_prometheus('/dir/file.prom', {'label': 'value'})
+
+        mocked_open.assert_called_with('/dir/file.prom.tmp', 'w')
+        mocked_open.return_value.write.assert_called_with('metrics')
+        metrics.to_prometheus.assert_called_with({'label': 'value'})
+        mock_replace.assert_called_with('/dir/file.prom.tmp', '/dir/file.prom')
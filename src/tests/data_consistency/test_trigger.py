@@ -0,0 +1,168 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from gobtest.data_consistency import trigger as trigger_module
+from gobtest.data_consistency.trigger import (
+    TriggerCoalescer, trigger_key, coalescer, _start_data_consistency_test, DATA_CONSISTENCY_TEST
+)
+from gobtest.workers import WorkerPool, PROCESS, consumer_context
+
+
+def _running(msg):
+    header = msg['header']
+    return trigger_module.coalescer.running(trigger_key(header['catalogue'], header['collection'], header['application']))
+
+
+@consumer_context(_running)
+def _handler(msg):
+    with _running(msg):
+        return os.getpid()
+
+
+class TestTriggerCoalescer(TestCase):
+
+    def setUp(self):
+        self.args = {'catalogue': 'cat', 'collection': 'col', 'application': 'app', 'process_id': 'p1'}
+
+    def test_trigger_key(self):
+        self.assertEqual(('cat', 'col', None), trigger_key('cat', 'col'))
+        self.assertEqual(('cat', 'col', None), trigger_key('cat', 'col', ''))
+        self.assertEqual(('cat', 'col', 'app'), trigger_key('cat', 'col', 'app'))
+
+    @patch("gobtest.data_consistency.trigger.logger")
+    def test_trigger_no_window(self, mock_logger):
+        mock_start = MagicMock()
+        coalescer = TriggerCoalescer(mock_start, 0, 100, 10)
+
+        self.assertTrue(coalescer.trigger(self.args))
+        mock_start.assert_called_once_with(self.args)
+
+        # Test has been started, subsequent triggers are skipped
+        self.assertFalse(coalescer.trigger(self.args))
+        mock_start.assert_called_once()
+        mock_logger.info.assert_called_once_with(
+            "Data consistency test ('cat', 'col', 'app') is already running, skip trigger"
+        )
+
+        # Other keys are not affected
+        self.assertTrue(coalescer.trigger({**self.args, 'application': 'other app'}))
+        self.assertEqual(2, mock_start.call_count)
+
+    @patch("gobtest.data_consistency.trigger.logger")
+    @patch("gobtest.data_consistency.trigger.threading.Timer")
+    def test_trigger_window(self, mock_timer, mock_logger):
+        mock_start = MagicMock()
+        coalescer = TriggerCoalescer(mock_start, 60, 100, 10)
+
+        self.assertTrue(coalescer.trigger(self.args))
+        mock_timer.assert_called_once_with(60, coalescer._fire, args=(('cat', 'col', 'app'),))
+        mock_timer.return_value.start.assert_called_once()
+        mock_start.assert_not_called()
+
+        # Coalesce triggers within the window, the latest arguments are used
+        latest = {**self.args, 'process_id': 'p2'}
+        self.assertFalse(coalescer.trigger(latest))
+        mock_timer.assert_called_once()
+        mock_logger.info.assert_called_once_with(
+            "Data consistency test ('cat', 'col', 'app') is already pending, coalesce trigger"
+        )
+
+        coalescer._fire(('cat', 'col', 'app'))
+        mock_start.assert_called_once_with(latest)
+
+        # Running test, skip triggers
+        self.assertFalse(coalescer.trigger(self.args))
+
+    @patch("gobtest.data_consistency.trigger.time.monotonic")
+    def test_trigger_max_active_age(self, mock_monotonic):
+        mock_start = MagicMock()
+        coalescer = TriggerCoalescer(mock_start, 0, 100, 10)
+
+        mock_monotonic.return_value = 0
+        with coalescer.running(('cat', 'col', 'app')):
+            mock_monotonic.return_value = 100
+            self.assertFalse(coalescer.trigger(self.args))
+
+            # Running test is considered to be lost
+            mock_monotonic.return_value = 101
+            self.assertTrue(coalescer.trigger(self.args))
+            mock_start.assert_called_once()
+
+    @patch("gobtest.data_consistency.trigger.time.monotonic")
+    def test_trigger_start_timeout(self, mock_monotonic):
+        mock_start = MagicMock()
+        coalescer = TriggerCoalescer(mock_start, 0, 100, 10)
+
+        mock_monotonic.return_value = 0
+        self.assertTrue(coalescer.trigger(self.args))
+
+        mock_monotonic.return_value = 10
+        self.assertFalse(coalescer.trigger(self.args))
+
+        # Started test that does not run in this process, eg run by another service instance
+        mock_monotonic.return_value = 11
+        self.assertTrue(coalescer.trigger(self.args))
+        self.assertEqual(2, mock_start.call_count)
+
+        # Once the test runs in this process the max active age applies
+        with coalescer.running(('cat', 'col', 'app')):
+            mock_monotonic.return_value = 100
+            self.assertFalse(coalescer.trigger(self.args))
+
+    def test_trigger_start_fails(self):
+        mock_start = MagicMock(side_effect=ValueError)
+        coalescer = TriggerCoalescer(mock_start, 0, 100, 10)
+
+        with self.assertRaises(ValueError):
+            coalescer.trigger(self.args)
+
+        # Failed start does not block new triggers
+        mock_start.side_effect = None
+        self.assertTrue(coalescer.trigger(self.args))
+
+    def test_running(self):
+        mock_start = MagicMock()
+        coalescer = TriggerCoalescer(mock_start, 0, 100, 10)
+
+        with coalescer.running(('cat', 'col', 'app')):
+            self.assertFalse(coalescer.trigger(self.args))
+
+        self.assertTrue(coalescer.trigger(self.args))
+
+        # Also released on failure
+        with self.assertRaises(ValueError):
+            with coalescer.running(('cat', 'col', None)):
+                raise ValueError
+        self.assertTrue(coalescer.trigger({**self.args, 'application': None}))
+
+    @patch("gobtest.data_consistency.trigger.start_workflow")
+    def test_start_data_consistency_test(self, mock_start_workflow):
+        _start_data_consistency_test(self.args)
+        mock_start_workflow.assert_called_with({'workflow_name': DATA_CONSISTENCY_TEST}, self.args)
+
+    def test_coalescer(self):
+        self.assertIsInstance(coalescer, TriggerCoalescer)
+
+
+class TestTriggerProcessWorkers(TestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool('data_consistency_test', 1, PROCESS)
+        self.args = {'catalogue': 'cat', 'collection': 'col', 'application': 'app'}
+
+    def tearDown(self):
+        self.pool._processes._idle.get().stop()
+
+    def test_handler_in_worker_process(self):
+        mock_start = MagicMock()
+        with patch.object(trigger_module, 'coalescer', TriggerCoalescer(mock_start, 0, 100, 100)):
+            self.assertTrue(trigger_module.coalescer.trigger(self.args))
+
+            # The handler runs in a worker process, the test is registered as running in this process
+            handler = self.pool.wrap(_handler)
+            self.assertNotEqual(os.getpid(), handler({'header': self.args}))
+
+            # The test has ended, a new trigger starts a new test
+            self.assertTrue(trigger_module.coalescer.trigger(self.args))
+            self.assertEqual(2, mock_start.call_count)
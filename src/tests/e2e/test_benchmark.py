@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.benchmark import (
+    benchmark_options, confidence_interval, statistics, aggregate, summary, benchmark_result, write_result
+)
+
+
+class TestBenchmark(TestCase):
+
+    @patch("gobtest.e2e.benchmark.E2E_BENCHMARK_ROUNDS", 5)
+    def test_benchmark_options(self):
+        self.assertEqual((5, None), benchmark_options(True))
+        self.assertEqual((10, None), benchmark_options(10))
+        self.assertEqual((3, 'gob-2.3'), benchmark_options({'rounds': 3, 'label': 'gob-2.3'}))
+        self.assertEqual((5, 'gob-2.3'), benchmark_options({'label': 'gob-2.3'}))
+
+        with self.assertRaisesRegex(ValueError, 'Unknown benchmark options: any'):
+            benchmark_options({'any': 1})
+
+        with self.assertRaisesRegex(ValueError, 'Invalid benchmark options: 0 rounds'):
+            benchmark_options(0)
+
+    def test_confidence_interval(self):
+        values = [10, 11, 12, 13, 14, 15, 16, 17, 18, 30]
+        low, high = confidence_interval(values, 50)
+        self.assertTrue(10 <= low <= 14 <= high <= 18)
+        # The interval is reproducible
+        self.assertEqual((low, high), confidence_interval(values, 50))
+
+        # No spread
+        self.assertEqual((5, 5), confidence_interval([5, 5, 5], 90))
+
+    def test_statistics(self):
+        result = statistics([1, 2, 3, 4])
+        self.assertEqual({'n': 4, 'mean': 2.5, 'min': 1, 'max': 4, 'p50': 2, 'p90': 4, 'p99': 4},
+                         {key: value for key, value in result.items() if not key.endswith('_ci')})
+        self.assertEqual(['p50_ci', 'p90_ci', 'p99_ci'], [key for key in result if key.endswith('_ci')])
+
+    def test_aggregate(self):
+        result = aggregate([{'a': 1, 'b': 10}, {'a': 3}, {'a': 2, 'b': 20}])
+        self.assertEqual(['a', 'b'], list(result))
+        self.assertEqual((3, 2), (result['a']['n'], result['a']['p50']))
+        self.assertEqual((2, 15), (result['b']['n'], result['b']['mean']))
+
+    def test_summary(self):
+        steps = {'relate: total': {'n': 3, 'p50': 10, 'p50_ci': [9, 11], 'p90': 12, 'p90_ci': [11, 13.04],
+                                   'p99': 12, 'p99_ci': [11, 13]}}
+        self.assertEqual(['relate: total: p50 10.0s [9.0-11.0], p90 12.0s [11.0-13.0], p99 12.0s [11.0-13.0] (n=3)'],
+                         summary(steps))
+
+    def test_write_result(self):
+        result = benchmark_result('1.e2e_test', 'gob-2.3', ['relate'], [{'a': 1}, {'a': 2}])
+        self.assertEqual(2, result['rounds'])
+        self.assertEqual(2, result['steps']['a']['n'])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = write_result(result, os.path.join(tmpdir, 'benchmark'))
+            self.assertEqual(os.path.join(tmpdir, 'benchmark', 'gob-2.3.1.e2e_test.json'), path)
+            with open(path) as f:
+                self.assertEqual(result, json.load(f))
+
+            path = write_result({**result, 'label': None}, tmpdir)
+            self.assertEqual(os.path.join(tmpdir, '1.e2e_test.json'), path)
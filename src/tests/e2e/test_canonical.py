@@ -0,0 +1,43 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.canonical import canonical_line, canonical_lines, canonical_value, _dumps
+
+
+class TestCanonical(TestCase):
+
+    def test_canonical_value(self):
+        self.assertEqual({
+            'a': 1,
+            'b': [{'c': 1.2}, 0.3, 'x', None, True],
+        }, canonical_value({
+            'b': [{'c': 1.20, '_links': {'self': 'any'}}, 0.1 + 0.2, 'x', None, True],
+            'a': 1.0,
+            '_links': {'self': 'any'},
+        }))
+        self.assertEqual(2.5e20, canonical_value(2.5e20))
+        self.assertIsInstance(canonical_value(2.5e20), float)
+
+    def test_canonical_line(self):
+        # Key order and number formatting do not matter
+        self.assertEqual(canonical_line('{"a": 1.2, "b": {"d": 1, "c": 2}}'),
+                         canonical_line('{"b": {"c": 2, "d": 1}, "a": 1.20}'))
+        self.assertEqual('{"a":1.2,"b":"é"}', canonical_line('{"b": "\\u00e9", "a": 1.20}'))
+
+        # Not parsed
+        self.assertEqual('{"a": ', canonical_line('{"a": '))
+
+        # Not parsed by orjson
+        self.assertEqual('{"a":null}', canonical_line('{"a": NaN}'))
+
+    @patch("gobtest.e2e.canonical.orjson", None)
+    def test_canonical_line_json(self):
+        self.assertEqual('{"a":1.2,"b":"é"}', canonical_line('{"b": "\\u00e9", "a": 1.20}'))
+        self.assertEqual('{"a":123456789012345678901234567890}', canonical_line('{"a": 123456789012345678901234567890}'))
+
+    def test_dumps_big_integer(self):
+        # Integers that do not fit in 64 bits are serialised by the json module
+        self.assertEqual('{"a":1000000000000000000000000000000}', _dumps({'a': 10 ** 30}))
+
+    def test_canonical_lines(self):
+        self.assertEqual(['{"a":1}', '{"b":2}'], list(canonical_lines(['{"a": 1}', '', '{"b": 2.0}'])))
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from gobtest.e2e.compare import compare_lines, count_lines, line_hash
+
+
+class TestCompare(TestCase):
+
+    def test_line_hash(self):
+        self.assertEqual(line_hash('a'), line_hash('a'))
+        self.assertNotEqual(line_hash('a'), line_hash('b'))
+
+    def test_count_lines(self):
+        counts, header = count_lines(['', 'h', 'a', '', 'a'])
+        self.assertEqual('h', header)
+        self.assertEqual({line_hash('h'): 1, line_hash('a'): 2}, counts)
+        self.assertEqual(({}, None), count_lines([]))
+
+    def test_compare_lines(self):
+        comparison = compare_lines(lambda: ['b', 'a', 'a', '', ''], iter(['a', 'b', 'a', '']))
+        self.assertTrue(comparison.matches)
+        self.assertEqual(('b', 'a'), (comparison.expected_header, comparison.received_header))
+
+        comparison = compare_lines(lambda: ['b', 'a', 'a', 'c'], iter(['a', 'b', 'd', 'e']))
+        self.assertFalse(comparison.matches)
+        self.assertEqual((2, ['a', 'c']), (comparison.missing_count, comparison.missing))
+        self.assertEqual((2, ['d', 'e']), (comparison.unexpected_count, comparison.unexpected))
+
+        comparison = compare_lines(lambda: [], iter([]))
+        self.assertTrue(comparison.matches)
+        self.assertEqual((None, None), (comparison.expected_header, comparison.received_header))
+
+    def test_compare_lines_max_lines(self):
+        comparison = compare_lines(lambda: [str(i) for i in range(100)], iter(['x', 'y', 'z']), max_lines=2)
+        self.assertEqual((100, ['0', '1']), (comparison.missing_count, comparison.missing))
+        self.assertEqual((3, ['x', 'y']), (comparison.unexpected_count, comparison.unexpected))
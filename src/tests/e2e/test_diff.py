@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from gobtest.e2e.compare import compare_lines
+from gobtest.e2e.diff import describe, parse_record, record_key, field_differences
+
+
+class TestDiff(TestCase):
+
+    def test_parse_record(self):
+        self.assertEqual({'a': 1}, parse_record('{"a": 1}', None))
+        self.assertEqual({'a': '1', 'b': 'x;y'}, parse_record('1;"x;y"', '"a";"b"'))
+        self.assertEqual({'line': '{"a": '}, parse_record('{"a": ', None))
+        self.assertEqual({'line': 'any'}, parse_record('any', '{"a": 1}'))
+        self.assertEqual({'line': 'any'}, parse_record('any', None))
+
+    def test_record_key(self):
+        self.assertEqual(('src_id=1', 'dst_id=2'), record_key({'src_id': 1, 'dst_id': 2, 'any': 3}))
+        self.assertEqual(('identificatie=1', 'volgnummer=2'), record_key({'identificatie': 1, 'volgnummer': 2}))
+        self.assertEqual(('string=s',), record_key({'string': 's'}))
+        self.assertEqual(('{"a": 1}',), record_key({'a': 1}))
+
+    def test_field_differences(self):
+        self.assertEqual([], field_differences({'a': 1}, {'a': 1}))
+        self.assertEqual([
+            'a: expected 1, received 2',
+            'b: expected null, received "x"',
+            'c: expected ' + 'x' * 80 + '..., received null',
+        ], field_differences({'a': 1, 'c': 'x' * 100}, {'a': 2, 'b': '"x"'}))
+
+    def test_describe_ndjson(self):
+        expected = [
+            '{"identificatie": "1", "naam": "a"}',
+            '{"identificatie": "2", "naam": "b"}',
+            '{"identificatie": "3", "naam": "c"}',
+        ]
+        received = [
+            '{"identificatie": "1", "naam": "a"}',
+            '{"identificatie": "2", "naam": "x"}',
+            '{"identificatie": "4", "naam": "d"}',
+        ]
+        self.assertEqual([
+            '2 expected lines have not been received, 2 received lines have not been expected',
+            '1 missing records',
+            'Missing identificatie=3',
+            '1 extra records',
+            'Extra identificatie=4',
+            '1 changed records',
+            'Changed identificatie=2: naam: expected b, received x',
+        ], describe(compare_lines(lambda: expected, received)))
+
+    def test_describe_csv(self):
+        expected = ['"src_id";"dst_id";"x"', '1;2;a', '1;2;b', '3;4;c', '5;6;e']
+        received = ['"src_id";"dst_id";"x"', '1;2;a', '3;4;d', '5;6;e', '5;6;f']
+        self.assertEqual([
+            '2 expected lines have not been received, 2 received lines have not been expected',
+            '1 missing records',
+            'Missing src_id=1, dst_id=2',
+            '1 extra records',
+            'Extra src_id=5, dst_id=6',
+            '1 changed records',
+            'Changed src_id=3, dst_id=4: x: expected c, received d',
+        ], describe(compare_lines(lambda: expected, received)))
+
+    def test_describe_bounded(self):
+        expected = [f'{{"identificatie": {i}}}' for i in range(5)]
+        received = [f'{{"identificatie": {i}, "x": 1}}' for i in range(5)] + ['{"a": 1}']
+        comparison = compare_lines(lambda: expected, received, max_lines=3)
+        self.assertEqual([
+            '5 expected lines have not been received, 6 received lines have not been expected',
+            'Only the first 3 lines are compared',
+            '3 changed records, first 2 shown',
+            'Changed identificatie=0: x: expected null, received 1',
+            'Changed identificatie=1: x: expected null, received 1',
+        ], describe(comparison, max_records=2))
+
+    def test_describe_duplicate_keys(self):
+        expected = ['{"identificatie": "1", "naam": "a"}']
+        received = ['{"identificatie": "1", "naam": "b"}', '{"identificatie": "1", "naam": "c"}']
+        self.assertEqual([
+            '1 expected lines have not been received, 2 received lines have not been expected',
+            '1 changed records',
+            'Changed identificatie=1: expected 1 records, received 2',
+        ], describe(compare_lines(lambda: expected, received)))
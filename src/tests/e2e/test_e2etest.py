@@ -1,12 +1,19 @@
+import os
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch, MagicMock, call
 
-import os
-import math
-from gobtest.e2e.e2etest import E2ETest, IMPORT, RELATE, END_TO_END_CHECK, END_TO_END_EXECUTE, END_TO_END_WAIT
+from gobtest.e2e.e2etest import E2ETest, IMPORT, RELATE, END_TO_END_CHECK, END_TO_END_EXECUTE, END_TO_END_WAIT, \
+    concurrent_waits
+from gobtest.e2e.expectations import ExpectationIndex
+from gobtest.e2e.poller import ProcessStatePoller
+from gobtest.e2e.responses import ResponseCache
+from gobtest.e2e.runs import RunRegistry
 
 
 @patch("gobtest.e2e.e2etest.logger", MagicMock())
+@patch("gobtest.e2e.e2etest.response_cache", ResponseCache(0))
+@patch("gobtest.e2e.e2etest.SERVICE_WORKERS", "e2e_test_wait=8")
 class TestE2Test(TestCase):
 
     def test_init(self):
@@ -17,62 +24,126 @@ class TestE2Test(TestCase):
         with self.assertRaises(TypeError):
             E2ETest()
 
-    def test_remove_last_event(self):
-        e2e = E2ETest('process_id')
-        inp = "a;b;c\n1;2;3\n4;5;6\n"
-        self.assertEqual(inp, e2e._remove_last_event(inp))
-
-        inp = '"a";"b";"c";"_last_event"\n1;2;3;4\n5;6;7;8\n'
-        self.assertEqual('"a";"b";"c";"_last_event"\n1;2;3;\n5;6;7;\n', e2e._remove_last_event(inp))
-
-    @patch("gobtest.e2e.e2etest.requests.get")
+    def _mock_response(self, mock_get, status_code, text):
+        response = mock_get.return_value.__enter__.return_value
+        response.status_code = status_code
+        response.encoding = None
+        response.headers = {}
+        response.iter_content = lambda chunk_size: iter([text.encode()])
+        return response
+
+    def _mock_expectation(self, name, text):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        with open(os.path.join(tmpdir.name, f"expect.{name}.ndjson"), "w") as f:
+            f.write(text)
+        patcher = patch("gobtest.e2e.e2etest.expectation_index", ExpectationIndex(tmpdir.name))
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    @patch("gobtest.e2e.e2etest.session.get")
     def test_check_api_output(self, mock_get):
-        api_result = "A\nB\nC"
-        expected_result = "B\nA\nC"
-
-        mock_get.return_value = type('MockResponse', (object,), {'status_code': 200, 'text': api_result})
+        self._mock_response(mock_get, 200, "A\nB\nC")
         e2e = E2ETest('process_id')
-        e2e._load_testfile = MagicMock(return_value=expected_result)
-        e2e._remove_last_event = MagicMock(side_effect=lambda x: x)
+        self._mock_expectation('some testfile', "B\nA\nC\n\n")
+        e2e._log_info = MagicMock()
         e2e.api_base = 'API_BASE'
 
         e2e._check_api_output('/some/endpoint', 'some testfile', 'Test API Output')
-        e2e._remove_last_event.assert_called_with(mock_get.return_value.text)
+        e2e._log_info.assert_called_with('Test API Output: OK')
 
-        mock_get.assert_called_with('API_BASE/some/endpoint')
+        mock_get.assert_called_with('API_BASE/some/endpoint', stream=True, headers={})
 
-    @patch("gobtest.e2e.e2etest.requests.get")
+    @patch("gobtest.e2e.e2etest.session.get")
     def test_check_api_output_error_status_code(self, mock_get):
-        api_result = "A\nB\nC"
-        expected_result = "B\nA\nC"
-
-        mock_get.return_value = type('MockResponse', (object,), {'status_code': 500, 'text': api_result})
+        self._mock_response(mock_get, 500, "A\nB\nC")
         e2e = E2ETest('process_id')
-        e2e._load_testfile = MagicMock(return_value=expected_result)
-        e2e._remove_last_event = MagicMock(side_effect=lambda x: x)
+        self._mock_expectation('some testfile', "B\nA\nC")
+        e2e._log_error = MagicMock()
 
         e2e._check_api_output('/some/endpoint', 'some testfile', 'Test API Output')
+        e2e._log_error.assert_called_with('Test API Output: Error requesting /some/endpoint')
 
-    @patch("gobtest.e2e.e2etest.requests.get")
+    @patch("gobtest.e2e.e2etest.session.get")
     def test_check_api_output_mismatch_result(self, mock_get):
-        api_result = "A\nB\nC"
-        expected_result = "B\nA\nD"
-
-        mock_get.return_value = type('MockResponse', (object,), {'status_code': 200, 'text': api_result})
+        self._mock_response(mock_get, 200, "A\nB\nC")
         e2e = E2ETest('process_id')
-        e2e._load_testfile = MagicMock(return_value=expected_result)
-        e2e._remove_last_event = MagicMock(side_effect=lambda x: x)
+        self._mock_expectation('some testfile', "B\nA\nD")
+        e2e._log_error = MagicMock()
 
         e2e._check_api_output('/some/endpoint', 'some testfile', 'Test API Output')
-
-    @patch("builtins.open")
-    def test_load_testfile(self, mock_open):
+        e2e._log_error.assert_has_calls([
+            call('Test API Output: ERROR checking expect.some testfile.ndjson with /some/endpoint'),
+            call('Test API Output: 1 expected lines have not been received, 1 received lines have not been expected'),
+            call('Test API Output: 1 missing records'),
+            call('Test API Output: Missing {"B": "D"}'),
+            call('Test API Output: 1 extra records'),
+            call('Test API Output: Extra {"A": "C"}'),
+        ])
+
+    @patch("gobtest.e2e.e2etest.session.get")
+    def test_compare_api_output(self, mock_get):
+        response = self._mock_response(mock_get, 200, '"a";"_last_event"\nA;1\nB;2')
         e2e = E2ETest('process_id')
+        self._mock_expectation('exp', '"a";"_last_event"\nB;\nA;')
 
-        self.assertEqual(mock_open.return_value.__enter__.return_value.read.return_value,
-                         e2e._load_testfile('filename'))
+        # Last events are ignored
+        self.assertEqual((True, []), e2e._compare_api_output('/some/endpoint', 'exp'))
 
-        self.assertTrue(mock_open.call_args[0][0].endswith(os.path.join('expect', 'filename')))
+        self._mock_expectation('exp', '"a";"_last_event"\nB;\nC;')
+        matches, differences = e2e._compare_api_output('/some/endpoint', 'exp')
+        self.assertFalse(matches)
+        self.assertEqual([
+            'ERROR checking expect.exp.ndjson with /some/endpoint',
+            '1 expected lines have not been received, 1 received lines have not been expected',
+            '1 missing records',
+            'Missing {"_last_event": "", "a": "C"}',
+            '1 extra records',
+            'Extra {"_last_event": "", "a": "A"}',
+        ], differences)
+
+        response.status_code = 500
+        self.assertEqual((False, ['Error requesting /some/endpoint']), e2e._compare_api_output('/some/endpoint', 'exp'))
+
+    @patch("gobtest.e2e.e2etest.describe")
+    @patch("gobtest.e2e.e2etest.session.get")
+    def test_compare_api_output_cached(self, mock_get, mock_describe):
+        patcher = patch("gobtest.e2e.e2etest.response_cache", ResponseCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_describe.return_value = ['any difference']
+        response = self._mock_response(mock_get, 200, '"a"\nA')
+        response.headers = {'ETag': '"v1"'}
+        e2e = E2ETest('process_id')
+        self._mock_expectation('exp', '"a"\nB')
+
+        expected = (False, ['ERROR checking expect.exp.ndjson with /some/endpoint', 'any difference'])
+        self.assertEqual(expected, e2e._compare_api_output('/some/endpoint', 'exp'))
+        self.assertEqual({}, mock_get.call_args[1]['headers'])
+
+        # Not modified, the output is not compared again
+        response.status_code = 304
+        self.assertEqual(expected, e2e._compare_api_output('/some/endpoint', 'exp'))
+        self.assertEqual({'If-None-Match': '"v1"'}, mock_get.call_args[1]['headers'])
+        self.assertEqual(1, mock_describe.call_count)
+
+        # Same output, the output is not compared again
+        response.status_code = 200
+        response.headers = {}
+        self.assertEqual(expected, e2e._compare_api_output('/some/endpoint', 'exp'))
+        self.assertEqual(1, mock_describe.call_count)
+
+        # Other output, or another version of the expected output, is compared
+        self._mock_response(mock_get, 200, '"a"\nB')
+        self.assertEqual((True, []), e2e._compare_api_output('/some/endpoint', 'exp'))
+        self._mock_expectation('exp', '"a"\nC')
+        self.assertEqual(expected, e2e._compare_api_output('/some/endpoint', 'exp'))
+        self.assertEqual(2, mock_describe.call_count)
+
+        # Not modified without a cached comparison
+        response.status_code = 304
+        self.assertEqual((False, ['Error requesting /other/endpoint']),
+                         e2e._compare_api_output('/other/endpoint', 'exp'))
 
     def test_import_workflow_definition(self):
         self.assertEqual({
@@ -116,6 +187,23 @@ class TestE2Test(TestCase):
             }
         }, E2ETest('process_id')._execute_start_workflow_definition(['the', 'workflow'], 'the process id'))
 
+    def test_converge_workflow_steps(self):
+        e2e = E2ETest('process_id')
+        execute = e2e._execute_start_workflow_definition(['wf'], 'p1')
+        wait = e2e._wait_step_workflow_definition('p1', 10)
+        check_a = e2e._check_workflow_step_definition('endp a', 'exp a', 'desc a')
+        check_b = e2e._check_workflow_step_definition('endp b', 'exp b', 'desc b')
+        other = 'import'
+
+        converge = {'wait_for_process_id': 'p1', 'seconds': 10}
+        self.assertEqual([
+            execute,
+            {**check_a, 'header': {**check_a['header'], **converge}},
+            {**check_b, 'header': {**check_b['header'], **converge}},
+            other,
+            check_a,
+        ], e2e._converge_workflow_steps([execute, wait, check_a, check_b, other, check_a]))
+
     def test_relate_workflow_definition(self):
         self.assertEqual({
             'type': 'workflow',
@@ -265,7 +353,7 @@ class TestE2Test(TestCase):
         # Test only for length. Is a long test.
         self.assertEqual(36, len(e2e._build_relate_multiple_allowed_test_workflow()))
 
-    def test_build_e2e_workflow(self):
+    def test_build_suites(self):
         e2e = E2ETest('process_id')
         e2e._build_autoid_test_workflow = MagicMock(return_value=['0', '1'])
         e2e._build_autoid_states_test_workflow = MagicMock(return_value=['2', '3'])
@@ -273,15 +361,319 @@ class TestE2Test(TestCase):
         e2e._build_relate_test_workflow = MagicMock(return_value=['c', 'd'])
         e2e._build_relate_multiple_allowed_test_workflow = MagicMock(return_value=['e', 'f'])
         e2e._build_relate_collapsed_states_test_workflow = MagicMock(return_value=['g', 'h'])
-        self.assertEqual(['0', '1', '2', '3', 'a', 'b', 'c', 'd', 'g', 'h', 'e', 'f'], e2e._build_e2e_workflow())
+        self.assertEqual({
+            'autoid': ['0', '1'],
+            'autoid_states': ['2', '3'],
+            'import': ['a', 'b'],
+            'relate': ['c', 'd'],
+            'relate_collapsed_states': ['g', 'h'],
+            'relate_multiple_allowed': ['e', 'f'],
+        }, e2e._build_suites())
+
+    def test_build_e2e_workflow(self):
+        e2e = E2ETest('process_id')
+        e2e._build_suites = MagicMock(return_value={'suite a': ['0', '1'], 'suite b': ['2']})
+        e2e._execute_start_workflow_definition = lambda workflow, process_id: (workflow, process_id)
+        e2e._wait_step_workflow_definition = lambda process_id, seconds=10: f"wait {seconds} for {process_id}"
+
+        # All suites are started in parallel, then joined
+        self.assertEqual([
+            (['0', '1'], 'process_id.suite.suite a'),
+            (['2'], 'process_id.suite.suite b'),
+            'wait 3600 for process_id.suite.suite a',
+            'wait 3600 for process_id.suite.suite b',
+        ], e2e._build_e2e_workflow())
+
+    def test_build_e2e_workflow_sequential(self):
+        e2e = E2ETest('process_id')
+        e2e._build_suites = MagicMock(return_value={'suite a': ['0', '1'], 'suite b': ['2']})
+
+        with patch("gobtest.e2e.e2etest.SERVICE_WORKERS", "e2e_test_wait=2"):
+            # Too few wait consumers for the suites and the join to wait at the same time
+            self.assertEqual(['0', '1', '2'], e2e._build_e2e_workflow())
+
+            # Unless the waits are rescheduled
+            with patch("gobtest.e2e.e2etest.E2E_WAIT_MODE", "reschedule"):
+                self.assertEqual(4, len(e2e._build_e2e_workflow()))
+
+        # Just enough wait consumers
+        with patch("gobtest.e2e.e2etest.SERVICE_WORKERS", "e2e_test_wait=3"):
+            self.assertEqual(4, len(e2e._build_e2e_workflow()))
+
+    def test_concurrent_waits(self):
+        self.assertEqual(8, concurrent_waits())
+        with patch("gobtest.e2e.e2etest.SERVICE_WORKERS", ""):
+            self.assertEqual(1, concurrent_waits())
+        with patch("gobtest.e2e.e2etest.SERVICE_WORKERS", "e2e_test_check=8,e2e_test_wait=2:thread:3"):
+            self.assertEqual(3, concurrent_waits())
+        with patch("gobtest.e2e.e2etest.E2E_WAIT_MODE", "reschedule"):
+            self.assertEqual(float('inf'), concurrent_waits())
+
+    @patch("gobtest.e2e.e2etest.E2E_CHECK_MODE", "converge")
+    def test_build_e2e_workflow_converge(self):
+        e2e = E2ETest('process_id')
+        e2e._build_suites = MagicMock(return_value={'suite a': ['0', '1']})
+        e2e._converge_workflow_steps = lambda workflow: ['converged'] + workflow
+        e2e._execute_start_workflow_definition = lambda workflow, process_id: (workflow, process_id)
+        e2e._wait_step_workflow_definition = lambda process_id, seconds=10: f"wait {seconds} for {process_id}"
+
+        self.assertEqual([
+            (['converged', '0', '1'], 'process_id.suite.suite a'),
+            'wait 3600 for process_id.suite.suite a',
+        ], e2e._build_e2e_workflow())
+
+    def test_build_e2e_workflow_selection(self):
+        e2e = E2ETest('process_id')
+        e2e._build_suites = MagicMock(return_value={'suite a': ['0', '1'], 'suite b': ['2']})
+        e2e._parse_suite_selection = MagicMock(return_value={'suite b': ['2']})
+        e2e._execute_start_workflow_definition = lambda workflow, process_id: (workflow, process_id)
+        e2e._wait_step_workflow_definition = lambda process_id, seconds=10: f"wait {seconds} for {process_id}"
+
+        self.assertEqual([
+            (['2'], 'process_id.suite.suite b'),
+            'wait 3600 for process_id.suite.suite b',
+        ], e2e._build_e2e_workflow(['suite b']))
+        e2e._parse_suite_selection.assert_called_with(['suite b'], e2e._build_suites.return_value)
+
+    def _suite_workflow(self, e2e):
+        return [
+            e2e._import_workflow_definition('cat', 'coll', 'setup'),
+            *[
+                step
+                for i in range(1, 4)
+                for step in [
+                    e2e._execute_start_workflow_definition([f'import {i}'], f'p{i}'),
+                    e2e._wait_step_workflow_definition(f'p{i}'),
+                    e2e._check_workflow_step_definition('endpoint', f'expect {i}', f'check {i}'),
+                ]
+            ]
+        ]
+
+    def test_select_steps(self):
+        e2e = E2ETest('process_id')
+        workflow = self._suite_workflow(e2e)
+
+        self.assertEqual(4, len(e2e._split_stages(workflow)))
+        self.assertEqual(workflow, e2e._select_steps(workflow, 1, 3))
+        self.assertEqual(workflow[:4], e2e._select_steps(workflow, 1, 1))
+
+        # Previous steps are executed as setup, without checks
+        self.assertEqual(workflow[:3] + workflow[4:6] + workflow[7:], e2e._select_steps(workflow, 3, 3))
+
+    def test_parse_suite_selection(self):
+        e2e = E2ETest('process_id')
+        workflow = self._suite_workflow(e2e)
+        suites = {'a': workflow, 'b': ['any']}
+
+        self.assertEqual({'a': workflow}, e2e._parse_suite_selection(['a'], suites))
+        self.assertEqual({'a': workflow[:7]}, e2e._parse_suite_selection(['a:1-2'], suites))
+        self.assertEqual({'a': workflow[:3] + workflow[4:6] + workflow[7:], 'b': ['any']},
+                         e2e._parse_suite_selection(['a:3', 'b'], suites))
+
+        with self.assertRaisesRegex(ValueError, "Unknown E2E suite 'c', expected one of a, b"):
+            e2e._parse_suite_selection(['c'], suites)
+
+        for spec in ['a:0', 'a:4', 'a:2-1', 'a:x', 'a:1-2-3', 'b:1']:
+            with self.assertRaisesRegex(ValueError, 'Invalid E2E steps'):
+                e2e._parse_suite_selection([spec], suites)
 
     def test_get_workflow(self):
         e2e = E2ETest('process_id')
         e2e._build_e2e_workflow = MagicMock()
         self.assertEqual(e2e._build_e2e_workflow.return_value, e2e.get_workflow())
+        e2e._build_e2e_workflow.assert_called_with(None, None)
+
+        e2e.get_workflow(['relate'])
+        e2e._build_e2e_workflow.assert_called_with(['relate'], None)
+
+        e2e.get_workflow(load={'test_entity': 10})
+        e2e._build_e2e_workflow.assert_called_with(None, {'test_entity': 10})
+
+    def test_get_workflow_stress(self):
+        e2e = E2ETest('process_id')
+        e2e._build_e2e_workflow = MagicMock()
+        self.assertEqual([{
+            'type': 'workflow_step',
+            'step_name': END_TO_END_EXECUTE,
+            'header': {'stress': {'workflows': 3}},
+        }], e2e.get_workflow(['relate'], stress={'workflows': 3}))
+        e2e._build_e2e_workflow.assert_not_called()
+
+        with self.assertRaisesRegex(ValueError, 'Unknown stress options: any'):
+            e2e.get_workflow(stress={'any': 1})
+
+    def test_get_workflow_benchmark(self):
+        e2e = E2ETest('process_id')
+        e2e._build_benchmark_workflow = MagicMock()
+        self.assertEqual(e2e._build_benchmark_workflow.return_value,
+                         e2e.get_workflow(['relate'], benchmark={'rounds': 3, 'label': 'x'}))
+        e2e._build_benchmark_workflow.assert_called_with(['relate'], 3, 'x')
+
+    def test_build_benchmark_workflow(self):
+        e2e = E2ETest('process_id')
+        workflow = e2e._build_benchmark_workflow(['relate', 'relate_multiple_allowed:1-3'], 2, 'x')
+
+        # Every round is executed after clearing the tests and waited for, then the result is reported
+        self.assertEqual(5, len(workflow))
+        self.assertEqual({
+            'execute': E2ETest('process_id.round.1')._build_e2e_workflow(['relate', 'relate_multiple_allowed:1-3']),
+            'execute_process_id': 'process_id.round.1',
+            'cleartests': True,
+        }, workflow[0]['header'])
+        self.assertEqual('process_id.round.1', workflow[1]['header']['wait_for_process_id'])
+        self.assertEqual('process_id.round.2', workflow[2]['header']['execute_process_id'])
+        self.assertEqual({
+            'type': 'workflow_step',
+            'step_name': END_TO_END_EXECUTE,
+            'header': {'benchmark_report': {
+                'rounds': 2, 'label': 'x', 'suites': ['relate', 'relate_multiple_allowed']
+            }},
+        }, workflow[-1])
+
+        # All suites
+        workflow = e2e._build_benchmark_workflow(None, 1, None)
+        self.assertEqual(list(e2e._build_suites()), workflow[-1]['header']['benchmark_report']['suites'])
+
+        with patch("gobtest.e2e.e2etest.SERVICE_WORKERS", "e2e_test_wait=3"):
+            with self.assertRaisesRegex(ValueError, 'The benchmark of 2 suites requires 4 e2e_test_wait consumers'):
+                e2e._build_benchmark_workflow(['relate', 'relate_multiple_allowed:1-3'], 2, 'x')
+
+    @patch("gobtest.e2e.e2etest.write_result", lambda result: '/path/result.json')
+    def test_benchmark_report(self):
+        e2e = E2ETest('main')
+        e2e._log_info = MagicMock()
+        e2e._round_durations = MagicMock(side_effect=[{'relate: total': 10}, {'relate: total': 12}])
+
+        e2e.benchmark_report({'rounds': 2, 'label': 'x', 'suites': ['relate']})
+        e2e._round_durations.assert_has_calls([call(1, ['relate']), call(2, ['relate'])])
+        e2e._log_info.assert_has_calls([
+            call('relate: total: p50 10.0s [10.0-12.0], p90 12.0s [10.0-12.0], p99 12.0s [10.0-12.0] (n=2)'),
+            call('Benchmark result written to /path/result.json'),
+        ])
+
+    def test_round_durations(self):
+        run_registry = RunRegistry()
+        e2e = E2ETest('main')
+        run_registry.record('main.round.1', 'wait main.round.1.suite.relate', 0, 30)
+        run_registry.record('main.round.1.suite.relate', 'wait main.round.1.relate.p1', 0, 20)
+        run_registry.record('main.round.1.suite.relate', 'check Relation x', 20, 1)
+        run_registry.record('main.round.1.suite.autoid', 'wait main.round.1.autoid.0', 0, 20)
+        run_registry.fail('main.round.1.suite.autoid', 'any reason')
+
+        with patch("gobtest.e2e.e2etest.run_registry", run_registry):
+            self.assertEqual({
+                'relate: total': 30,
+                'relate: wait relate.p1': 20,
+                'relate: check Relation x': 1,
+            }, e2e._round_durations(1, ['relate', 'autoid']))
+
+    def test_build_stress_workflows(self):
+        e2e = E2ETest('process_id')
+        workflows = e2e._build_stress_workflows(8)
+        self.assertEqual([
+            'process_id.stress.0.test_entity',
+            'process_id.stress.1.test_entity_autoid_states',
+            'process_id.stress.2.rel_test_entity_a',
+            'process_id.stress.3.rel_test_entity_b',
+            'process_id.stress.4.rel_test_entity_c',
+            'process_id.stress.5.rel_test_entity_d',
+            'process_id.stress.6.test_entity',
+            'process_id.stress.7.test_entity_autoid_states',
+        ], list(workflows))
+        self.assertEqual([
+            e2e._import_workflow_definition('test_catalogue', 'test_entity', 'LOAD')
+        ], workflows['process_id.stress.0.test_entity'])
+
+        # Import and relate
+        workflow = workflows['process_id.stress.2.rel_test_entity_a']
+        self.assertEqual(5, len(workflow))
+        self.assertEqual(e2e._relate_workflow_definition('test_catalogue', 'rel_test_entity_a', 'ref_to_c'), workflow[1])
+
+    @patch("gobtest.e2e.e2etest.StressTest")
+    @patch("gobtest.e2e.e2etest.generate")
+    @patch("gobtest.e2e.e2etest.stress_options", lambda spec: (2, 30, {'sizes': spec}))
+    def test_stress(self, mock_generate, mock_stress_test):
+        e2e = E2ETest('process_id')
+        e2e._log_info = MagicMock()
+        e2e._log_error = MagicMock()
+        mock_stress_test.return_value.run.return_value = ['report']
+        mock_stress_test.return_value.errors.return_value = ['error']
+
+        e2e.stress(True)
+        mock_generate.assert_called_with({'sizes': True})
+        mock_stress_test.assert_called_with(e2e, e2e._build_stress_workflows(2), 30, 3600)
+        e2e._log_info.assert_called_with('report')
+        e2e._log_error.assert_called_with('error')
+
+    @patch("gobtest.e2e.e2etest.load_sizes", lambda load: {'sizes': load})
+    def test_build_e2e_workflow_load(self):
+        e2e = E2ETest('process_id')
+        e2e._build_suites = MagicMock()
+        e2e._build_load_workflow = MagicMock(return_value=['0'])
+        e2e._execute_start_workflow_definition = lambda workflow, process_id: (workflow, process_id)
+        e2e._wait_step_workflow_definition = lambda process_id, seconds=10: f"wait {seconds} for {process_id}"
+
+        self.assertEqual([
+            (['0'], 'process_id.suite.load'),
+            'wait 43200 for process_id.suite.load',
+        ], e2e._build_e2e_workflow(['any suite'], True))
+        e2e._build_load_workflow.assert_called_with({'sizes': True})
+        e2e._build_suites.assert_not_called()
+
+    @patch("gobtest.e2e.e2etest.generate")
+    def test_build_load_workflow(self, mock_generate):
+        e2e = E2ETest('process_id')
+        e2e._log_info = MagicMock()
+        workflow = e2e._build_load_workflow({'test_entity': 10})
+        mock_generate.assert_called_with({'test_entity': 10})
+
+        # 6 imports and 8 relates, each executed, waited for and checked
+        self.assertEqual(3 * (6 + 8), len(workflow))
+        self.assertEqual({
+            'type': 'workflow_step',
+            'step_name': END_TO_END_EXECUTE,
+            'header': {
+                'execute': [e2e._import_workflow_definition('test_catalogue', 'test_entity', 'LOAD')],
+                'execute_process_id': 'process_id.load.import.test_entity',
+            },
+        }, workflow[0])
+        self.assertEqual(43200, workflow[1]['header']['seconds'])
+        self.assertEqual({
+            'endpoint': '/test_catalogue/test_entity/?ndjson=true',
+            'expect': 'load:test_entity',
+            'description': 'Load test_entity',
+        }, workflow[2]['header'])
+        self.assertEqual({
+            'endpoint': '/dump/rel/tst_rtb_tst_rtd_manyref_to_d/?format=csv',
+            'expect': 'load:tst_rtb_tst_rtd_manyref_to_d',
+            'description': 'Load tst_rtb_tst_rtd_manyref_to_d',
+        }, workflow[-1]['header'])
+        self.assertEqual('process_id.load.relate.rel_test_entity_b.manyref_to_d',
+                         workflow[-3]['header']['execute_process_id'])
+
+    @patch("gobtest.e2e.e2etest.compare_load_output")
+    @patch("gobtest.e2e.e2etest.session.get")
+    def test_compare_api_output_load(self, mock_get, mock_compare):
+        self._mock_response(mock_get, 200, 'A\nB')
+        e2e = E2ETest('process_id')
+
+        received = []
+        mock_compare.side_effect = lambda lines, name: received.extend(lines) or []
+        self.assertEqual((True, []), e2e._compare_api_output('/some/endpoint', 'load:test_entity'))
+        self.assertEqual(['A\n', 'B'], received)
+        self.assertEqual('test_entity', mock_compare.call_args[0][1])
+
+        mock_compare.side_effect = None
+
+        mock_compare.return_value = ['Expected 2 records, received 1']
+        self.assertEqual((False, [
+            'ERROR checking load manifest test_entity with /some/endpoint',
+            'Expected 2 records, received 1',
+        ]), e2e._compare_api_output('/some/endpoint', 'load:test_entity'))
 
     @patch("gobtest.e2e.e2etest.start_workflow")
-    def test_execute_workflow(self, mock_start_workflow):
+    @patch("gobtest.e2e.e2etest.run_registry")
+    def test_execute_workflow(self, mock_registry, mock_start_workflow):
         e2e = E2ETest('process_id')
 
         e2e.execute_workflow(['some', 'workflow'], 'some process id')
@@ -293,15 +685,79 @@ class TestE2Test(TestCase):
                 'process_id': 'some process id',
             }}
         )
+        # The start of the process is registered
+        mock_registry.start.assert_called_with('some process id')
+        # And the timing of the execute step
+        self.assertEqual(('process_id', 'execute some process id'), mock_registry.record.call_args[0][:2])
 
-    def test_check(self):
+    @patch("gobtest.e2e.e2etest.run_registry")
+    def test_check(self, mock_registry):
         e2e = E2ETest('process_id')
         e2e._check_api_output = MagicMock()
         e2e.check('a', 'b', 'c')
 
         e2e._check_api_output.assert_called_with('a', 'b', 'c')
-
-    @patch("gobtest.e2e.e2etest.requests.get")
+        self.assertEqual(('process_id', 'check c'), mock_registry.record.call_args[0][:2])
+
+        # Also the timing of a failing step
+        mock_registry.record.reset_mock()
+        e2e._check_api_output.side_effect = Exception('any error')
+        with self.assertRaisesRegex(Exception, 'any error'):
+            e2e.check('a', 'b', 'd')
+        self.assertEqual(('process_id', 'check d'), mock_registry.record.call_args[0][:2])
+
+    @patch("gobtest.e2e.e2etest.process_notifications")
+    @patch("gobtest.e2e.e2etest.time.monotonic")
+    def test_converge(self, mock_monotonic, mock_notifications):
+        e2e = E2ETest('process_id')
+        e2e._log_info = MagicMock()
+        e2e._log_error = MagicMock()
+        e2e.pending_jobs = MagicMock()
+        e2e.fail_on_failed_jobs = MagicMock(return_value=False)
+        e2e._compare_api_output = MagicMock()
+        mock_monotonic.return_value = 0
+
+        # Output is compared once the process has no unfinished jobs, succeeds on the first match
+        e2e.pending_jobs.side_effect = [-1, 2, 0, 0]
+        e2e._compare_api_output.side_effect = [(False, ['diff 1']), (True, [])]
+        self.assertTrue(e2e.converge('endp', 'exp', 'desc', 'p1', 60))
+        self.assertEqual(2, e2e._compare_api_output.call_count)
+        e2e._compare_api_output.assert_called_with('endp', 'exp')
+        e2e._log_info.assert_called_with('desc: OK')
+        e2e._log_error.assert_not_called()
+        mock_notifications.watch.assert_called_with('p1')
+
+        # Exponential backoff
+        self.assertEqual([1, 2, 4], [c[0][2] for c in mock_notifications.wait.call_args_list])
+
+        # The last difference is reported after the timeout, the first and last time are for the step timing
+        mock_monotonic.side_effect = [0, 0, 30, 61, 61]
+        e2e.pending_jobs.side_effect = None
+        e2e.pending_jobs.return_value = 0
+        e2e._compare_api_output.side_effect = [(False, ['diff 1']), (False, ['diff 2'])]
+        self.assertFalse(e2e.converge('endp', 'exp', 'desc', 'p1', 60))
+        e2e._log_error.assert_has_calls([call('desc: No match within 60 seconds'), call('desc: diff 2')])
+
+        # Not even started
+        e2e._log_error.reset_mock()
+        mock_monotonic.side_effect = [0, 0, 61, 61]
+        e2e.pending_jobs.return_value = -1
+        self.assertFalse(e2e.converge('endp', 'exp', 'desc', 'p1', 60))
+        e2e._log_error.assert_called_with('desc: Process p1 has not completed')
+
+        # Fails immediately when the process has failed jobs
+        e2e._log_error.reset_mock()
+        e2e._compare_api_output.reset_mock()
+        mock_monotonic.side_effect = None
+        e2e.pending_jobs.return_value = 0
+        e2e.fail_on_failed_jobs.return_value = True
+        self.assertFalse(e2e.converge('endp', 'exp', 'desc', 'p1', 60))
+        e2e.fail_on_failed_jobs.assert_called_with('p1')
+        e2e._compare_api_output.assert_not_called()
+        e2e._log_error.assert_called_with('desc: Not checked')
+
+    @patch("gobtest.e2e.e2etest.process_state_poller", ProcessStatePoller(ttl=0))
+    @patch("gobtest.e2e.e2etest.session.get")
     def test_pending_messages(self, mock_get):
         e2e = E2ETest('process_id')
         mock_get.return_value.ok = True
@@ -316,7 +772,8 @@ class TestE2Test(TestCase):
         pending = e2e.pending_messages()
         self.assertEqual(pending, 1 + 3 + 5 + 7 + 11)
 
-    @patch("gobtest.e2e.e2etest.requests.get")
+    @patch("gobtest.e2e.e2etest.process_state_poller", ProcessStatePoller(ttl=0))
+    @patch("gobtest.e2e.e2etest.session.get")
     def test_pending_jobs(self, mock_get):
         e2e = E2ETest('process_id')
         mock_get.return_value.ok = True
@@ -331,57 +788,160 @@ class TestE2Test(TestCase):
                     {'jobid': 1, 'processId': 'p1', 'status': 'ended'},
                     {'jobid': 1, 'processId': 'p1', 'status': 'rejected'},
                     {'jobid': 1, 'processId': 'p1', 'status': 'started'},
-                    {'jobid': 1, 'processId': 'p1', 'status': 'scheduled'}
+                    {'jobid': 1, 'processId': 'p1', 'status': 'scheduled'},
+                    {'jobid': 1, 'processId': 'p1', 'status': 'failed'}
                 ]
         # A job is pending when it has not started of was rejected
         pending = e2e.pending_jobs('p1')
         self.assertEqual(pending, 4)
 
-    @patch("gobtest.e2e.e2etest.time.sleep")
-    def test_wait(self, mock_sleep):
-        e2e = E2ETest('process_id')
-        mock_pending_messages = MagicMock()
-        mock_pending_jobs = MagicMock()
-
-        e2e.pending_messages = mock_pending_messages
-        e2e.pending_jobs = mock_pending_jobs
-
-        max_seconds_to_try = 99
-
-        # No pending jobs and messages, process has finished
-        mock_pending_jobs.return_value = 0
-        mock_pending_messages.return_value = 0
-        result = e2e.wait('any process id', max_seconds_to_try)
-        self.assertEqual(result, True)
-        self.assertEqual(mock_sleep.call_count, 1)  # 1 confirmation
-
-        # No pending jobs and pending messages, process has finished
-        mock_sleep.reset_mock()
-        mock_pending_jobs.return_value = 0
-        mock_pending_messages.return_value = 1
-        result = e2e.wait('any process id', max_seconds_to_try)
-        self.assertEqual(result, True)
-        self.assertEqual(mock_sleep.call_count, 2)  # 1 extra confirmation for pending messages
-
-        # pending jobs and pending messages, process has not finished
-        mock_sleep.reset_mock()
-        mock_pending_jobs.return_value = 1
-        mock_pending_messages.return_value = 1
-        result = e2e.wait('any process id', max_seconds_to_try)
-        self.assertEqual(result, False)
-        self.assertEqual(mock_sleep.call_count,
-                         math.ceil(max_seconds_to_try/e2e.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH))
-
-        # pending jobs and no pending messages, process has not finished
-        mock_sleep.reset_mock()
-        mock_pending_jobs.return_value = 1
-        mock_pending_messages.return_value = 0
-        result = e2e.wait('any process id', max_seconds_to_try)
-        self.assertEqual(result, False)
-        self.assertEqual(mock_sleep.call_count,
-                         math.ceil(max_seconds_to_try/e2e.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH))
-
-    @patch("gobtest.e2e.e2etest.requests.delete")
+    def test_failed_jobs(self):
+        e2e = E2ETest('process_id')
+        e2e.process_jobs = MagicMock(return_value=[
+            {'id': 1, 'status': 'ended'},
+            {'id': 2, 'status': 'rejected'},
+            {'id': 3, 'status': 'started'},
+            {'id': 4, 'status': 'failed'},
+        ])
+        self.assertEqual([{'id': 2, 'status': 'rejected'}, {'id': 4, 'status': 'failed'}], e2e.failed_jobs('p1'))
+        e2e.process_jobs.assert_called_with('p1')
+
+    @patch("gobtest.e2e.e2etest.run_registry")
+    def test_fail_on_failed_jobs(self, mock_registry):
+        e2e = E2ETest('process_id')
+        e2e._log_error = MagicMock()
+        e2e.failed_jobs = MagicMock(return_value=[])
+
+        self.assertFalse(e2e.fail_on_failed_jobs('p1'))
+        mock_registry.fail.assert_not_called()
+
+        e2e.failed_jobs.return_value = [{'id': 2, 'status': 'rejected'}, {'id': 4, 'status': 'failed'}]
+        self.assertTrue(e2e.fail_on_failed_jobs('p1'))
+        reason = 'Process p1 has 2 failed jobs: 2 (rejected), 4 (failed)'
+        mock_registry.fail.assert_called_with('process_id', reason)
+        e2e._log_error.assert_called_with(f'{reason}, the remaining steps are skipped')
+
+    @patch("gobtest.e2e.e2etest.process_notifications")
+    @patch("gobtest.e2e.e2etest.ProcessWait")
+    def test_wait(self, mock_process_wait, mock_notifications):
+        e2e = E2ETest('process_id')
+        e2e.log_wait_result = MagicMock()
+        process_wait = mock_process_wait.return_value
+
+        # Checked until done, wait for notifications between the checks
+        process_wait.check.side_effect = [None, None, True]
+        self.assertTrue(e2e.wait('any process id', 99))
+        mock_process_wait.assert_called_with(e2e, 'any process id', 99)
+        mock_notifications.watch.assert_called_with('any process id')
+        self.assertEqual(2, mock_notifications.wait.call_count)
+        mock_notifications.wait.assert_called_with('any process id', process_wait.notifications, process_wait.interval)
+        e2e.log_wait_result.assert_called_with('any process id', True)
+
+        mock_notifications.wait.reset_mock()
+        process_wait.check.side_effect = [False]
+        self.assertFalse(e2e.wait('any process id', 99))
+        mock_notifications.wait.assert_not_called()
+        e2e.log_wait_result.assert_called_with('any process id', False)
+
+    @patch("gobtest.e2e.e2etest.wait_scheduler")
+    @patch("gobtest.e2e.e2etest.ProcessWait")
+    def test_schedule_wait(self, mock_process_wait, mock_scheduler):
+        e2e = E2ETest('process_id')
+        on_done = MagicMock()
+        e2e.schedule_wait('any process id', 99, on_done)
+        mock_process_wait.assert_called_with(e2e, 'any process id', 99)
+        mock_scheduler.schedule.assert_called_with(mock_process_wait.return_value, on_done)
+
+    def test_log_wait_result(self):
+        e2e = E2ETest('process_id')
+        e2e._log_info = MagicMock()
+        e2e._log_warning = MagicMock()
+        e2e.fail = MagicMock()
+        e2e.fail_on_failed_jobs = MagicMock(return_value=False)
+
+        e2e.log_wait_result('any process id', True)
+        e2e._log_info.assert_called_with('Process any process id has completed')
+        e2e._log_warning.assert_not_called()
+
+        with patch("gobtest.e2e.e2etest.run_registry.duration", lambda process_id: 12.345):
+            e2e.log_wait_result('any process id', True)
+            e2e._log_info.assert_called_with('Process any process id has completed in 12.3 seconds')
+        e2e.fail_on_failed_jobs.assert_called_with('any process id')
+        e2e.fail.assert_not_called()
+
+        e2e.log_wait_result('any process id', False)
+        e2e._log_warning.assert_called_with('Max wait time for process any process id to complete exceeded.')
+        e2e.fail.assert_called_with('Process any process id has not completed')
+
+        # The run has failed on the failed jobs of the process
+        e2e._log_info.reset_mock()
+        e2e.fail_on_failed_jobs.return_value = True
+        e2e.log_wait_result('any process id', True)
+        e2e._log_info.assert_not_called()
+
+    @patch("gobtest.e2e.e2etest.time.time", lambda: 1000)
+    @patch("gobtest.e2e.e2etest.run_registry")
+    def test_log_wait_result_timings(self, mock_registry):
+        e2e = E2ETest('process_id')
+        e2e._log_info = MagicMock()
+        e2e.fail_on_failed_jobs = MagicMock(return_value=False)
+        e2e._report_timings = MagicMock()
+        mock_registry.duration.return_value = 12.5
+
+        # The duration of the process is registered as wait step of the run
+        e2e.log_wait_result('any process id', True)
+        mock_registry.record.assert_called_with('process_id', 'wait any process id', 987.5, 12.5)
+        e2e._report_timings.assert_called_with('any process id')
+
+    @patch("gobtest.e2e.e2etest.compare_baseline")
+    @patch("gobtest.e2e.e2etest.run_registry")
+    def test_report_timings(self, mock_registry, mock_compare_baseline):
+        e2e = E2ETest('main')
+        e2e._log_info = MagicMock()
+        e2e._log_warning = MagicMock()
+
+        # No timings, eg a test process
+        mock_registry.timings.return_value = []
+        e2e._report_timings('main.relate.p1')
+        e2e._log_info.assert_not_called()
+        mock_compare_baseline.assert_not_called()
+
+        # Only suites are reported, eg not the rounds of a benchmark
+        mock_registry.timings.return_value = [('wait main.round.1.suite.relate', 100, 30)]
+        e2e._report_timings('main.round.1')
+        e2e._log_info.assert_not_called()
+
+        mock_registry.timings.return_value = [
+            ('execute main.relate.p1', 100, 0.1),
+            ('wait main.relate.p1', 100, 30),
+            ('check Relation x', 130, 1),
+        ]
+        mock_registry.failure.return_value = None
+        mock_compare_baseline.return_value = ({'wait relate.p1': 10}, ['wait relate.p1 took 30.0 seconds'])
+        e2e._report_timings('main.suite.relate')
+        mock_compare_baseline.assert_called_with(
+            'suite.relate', {'execute relate.p1': 0.1, 'wait relate.p1': 30, 'check Relation x': 1}, True)
+        e2e._log_info.assert_has_calls([
+            call('Step durations of suite.relate'),
+            call('execute relate.p1      0.1s'),
+            call('wait relate.p1        30.0s (baseline 10.0s)'),
+            call('check Relation x       1.0s'),
+        ])
+        e2e._log_warning.assert_called_with('Performance regression in suite.relate: wait relate.p1 took 30.0 seconds')
+
+        # The durations of a failed run are not stored as baseline
+        mock_registry.failure.return_value = 'any failure'
+        e2e._report_timings('main.suite.relate')
+        self.assertFalse(mock_compare_baseline.call_args[0][2])
+
+        # Baseline not available
+        e2e._log_warning.reset_mock()
+        mock_compare_baseline.side_effect = OSError('any error')
+        e2e._report_timings('main.suite.relate')
+        e2e._log_warning.assert_called_with('Baseline of suite.relate is not available: any error')
+        e2e._log_info.assert_called_with('check Relation x       1.0s')
+
+    @patch("gobtest.e2e.e2etest.session.delete")
     def test_cleartests(self, mock_delete):
         mock_delete.return_value.status_code = 200
         e2e = E2ETest('process_id')
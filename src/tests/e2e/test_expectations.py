@@ -0,0 +1,110 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.expectations import ExpectationIndex, ExpectationError, EXPECT_DIR
+
+
+class TestExpectationIndex(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.index = ExpectationIndex(self.tmpdir.name)
+
+    def _write(self, filename, text, mtime=None):
+        path = os.path.join(self.tmpdir.name, filename)
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    @patch("gobtest.e2e.expectations.logger")
+    def test_load(self, mock_logger):
+        self._write('expect.A.ndjson', '{"a": 1}\n{"a": 2}\n\n')
+        self._write('expect.B.ndjson', '"b";"_last_event"\n1;2\n1;3\n')
+        self._write('other.txt', 'any')
+        self.index.load()
+
+        expectation = self.index.get('A')
+        self.assertEqual(('A', 'expect.A.ndjson'), (expectation.name, expectation.filename))
+        self.assertEqual(['{"a":1}', '{"a":2}'], expectation.lines)
+        self.assertEqual(['"b";"_last_event"', '1;', '1;'], self.index.get('B').lines)
+        self.assertEqual(5, self.index.size())
+        mock_logger.info.assert_called_with('Loaded 2 expectations, 5 lines')
+
+        self.assertTrue(expectation.compare(iter(['{"a": 2}', '{"a": 1}'])).matches)
+        # The precomputed counts are not consumed by a comparison
+        self.assertTrue(expectation.compare(iter(['{"a": 2}', '{"a": 1}'])).matches)
+        comparison = expectation.compare(iter(['{"a": 2}']))
+        self.assertEqual((['{"a":1}'], '{"a":1}'), (comparison.missing, comparison.expected_header))
+
+    def test_compare_quoting(self):
+        self._write('expect.A.ndjson', '"a";"_last_event"\n"";1\n"multi\nline";2\n')
+        expectation = self.index.get('A')
+        self.assertEqual(['"a";"_last_event"', '"";', '"multi\nline";'], expectation.lines)
+        self.assertTrue(expectation.compare(iter(['"a";"_last_event"\r\n', '"";3\r\n', '"multi\n', 'line";4'])).matches)
+        # An empty value is not an empty string, a line break is not removed
+        self.assertFalse(expectation.compare(iter(['"a";"_last_event"', ';3', '"multi\nline";4'])).matches)
+        self.assertFalse(expectation.compare(iter(['"a";"_last_event"', '"";3', '"multiline";4'])).matches)
+
+    def test_load_malformed(self):
+        self._write('expect.A.ndjson', '{"a": 1}\n{"a": \n')
+        with self.assertRaisesRegex(ExpectationError, r'expect.A.ndjson, line 2'):
+            self.index.load()
+
+        self._write('expect.A.ndjson', '"a";"b"\n1;2\n1;2;3\n')
+        with self.assertRaisesRegex(ExpectationError, r'expect.A.ndjson, line 3: expected 2 columns'):
+            self.index.load()
+
+        # A quoted value that spans lines is part of a single row, the line number is that of the end of the row
+        self._write('expect.A.ndjson', '"a";"b"\n"multi\nline";2\n"multi\nline"\n')
+        with self.assertRaisesRegex(ExpectationError, r'expect.A.ndjson, line 5: expected 2 columns'):
+            self.index.load()
+
+    @patch("gobtest.e2e.expectations.logger")
+    def test_load_multi_line_value(self, mock_logger):
+        self._write('expect.A.ndjson', '"a";"b"\n"multi\nline";2\n\n3;"x;y"\n')
+        self.index.load()
+        self.assertEqual(['"a";"b"', '"multi\nline";2', '3;"x;y"'], self.index.get('A').lines)
+
+    def test_normalisation_specs(self):
+        self._write('expect.A.ndjson', '"a";"b";"_last_event"\n1;2;3\n')
+        self._write('expect.B.ndjson', '"a";"b";"_last_event"\n1;2;3\n')
+        self._write('normalise.json', '{"*": {"drop": ["b"]}, "B": {"columns": ["b", "a"]}}')
+        self.index.load()
+        self.assertEqual(['"a";"_last_event"', '1;3'], self.index.get('A').lines)
+        self.assertEqual(['"b";"a"', '2;1'], self.index.get('B').lines)
+        self.assertTrue(self.index.get('B').compare(iter(['"_last_event";"b";"a"', '4;2;1'])).matches)
+
+        self._write('normalise.json', '{"A": {"ignore": ["b"]}}')
+        with self.assertRaisesRegex(ExpectationError, 'Invalid normalisation spec of expect.A.ndjson: Unknown'):
+            self.index.load()
+
+        self._write('normalise.json', '{"A": ')
+        with self.assertRaisesRegex(ExpectationError, 'Invalid normalisation spec of expect.A.ndjson'):
+            self.index.load()
+
+    def test_get(self):
+        self._write('expect.A.ndjson', '{"a": 1}\n', mtime=1_000_000_000)
+        self.index.load()
+        expectation = self.index.get('A')
+        self.assertIs(expectation, self.index.get('A'))
+
+        # Recompiled when the file has changed
+        self._write('expect.A.ndjson', '{"a": 2}\n', mtime=2_000_000_000)
+        self.assertEqual(['{"a":2}'], self.index.get('A').lines)
+
+        # Compiled when not yet loaded
+        self._write('expect.B.ndjson', '{"b": 1}\n')
+        self.assertEqual(['{"b":1}'], self.index.get('B').lines)
+
+        with self.assertRaisesRegex(ExpectationError, 'Missing expect file expect.C.ndjson'):
+            self.index.get('C')
+
+    def test_expect_files(self):
+        # All expect files of the end-to-end tests are valid
+        index = ExpectationIndex(EXPECT_DIR)
+        index.load()
+        self.assertTrue(index.get('ADD').lines)
@@ -2,8 +2,10 @@ from unittest import TestCase
 from unittest.mock import patch, MagicMock
 
 from gobtest.e2e.handler import (
-    end_to_end_test_handler, end_to_end_check_handler, end_to_end_execute_workflow_handler, end_to_end_wait_handler
+    end_to_end_test_handler, end_to_end_check_handler, end_to_end_execute_workflow_handler, end_to_end_wait_handler,
+    end_to_end_notification_handler, _publish_wait_result, WORKFLOW_EXCHANGE, END_TO_END_WAIT_RESULT_KEY
 )
+from gobtest.e2e.runs import RunRegistry
 
 
 @patch("gobtest.e2e.handler.logger")
@@ -25,6 +27,23 @@ class TestHandler(TestCase):
         # Existing process id should be used
         res = end_to_end_test_handler({'header': {'process_id': 'existing'}})
         self.assertEqual('existing', res['header']['process_id'])
+        mock_e2etest.return_value.get_workflow.assert_called_with(None, None, None, None)
+
+        # Selected suites
+        end_to_end_test_handler({'header': {'suites': ['relate', 'relate_multiple_allowed:1-3']}})
+        mock_e2etest.return_value.get_workflow.assert_called_with(['relate', 'relate_multiple_allowed:1-3'], None, None, None)
+
+        # Load test
+        end_to_end_test_handler({'header': {'load': {'test_entity': 1000}}})
+        mock_e2etest.return_value.get_workflow.assert_called_with(None, {'test_entity': 1000}, None, None)
+
+        # Stress test
+        end_to_end_test_handler({'header': {'stress': {'workflows': 24}}})
+        mock_e2etest.return_value.get_workflow.assert_called_with(None, None, {'workflows': 24}, None)
+
+        # Benchmark
+        end_to_end_test_handler({'header': {'suites': ['relate'], 'benchmark': 10}})
+        mock_e2etest.return_value.get_workflow.assert_called_with(['relate'], None, None, 10)
 
     @patch("gobtest.e2e.handler.E2ETest")
     def test_end_to_end_execute_workflow_handler(self, mock_e2etest, mock_logger):
@@ -46,6 +65,37 @@ class TestHandler(TestCase):
         }, end_to_end_execute_workflow_handler(msg))
 
         mock_e2etest().execute_workflow.assert_called_with(['some', 'workflow'], 'process id to assign')
+        mock_e2etest().cleartests.assert_not_called()
+
+        # Clear the tests before the workflow is started
+        end_to_end_execute_workflow_handler({'header': {**msg['header'], 'cleartests': True}})
+        mock_e2etest().cleartests.assert_called_once()
+
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_end_to_end_execute_workflow_handler_benchmark_report(self, mock_e2etest, mock_logger):
+        msg = {'header': {'benchmark_report': {'rounds': 2}, 'process_id': 'this process id'}}
+
+        self.assertEqual({
+            'header': {'benchmark_report': {'rounds': 2}, 'process_id': 'this process id'},
+            'summary': mock_logger.get_summary(),
+        }, end_to_end_execute_workflow_handler(msg))
+
+        mock_e2etest.assert_called_with('this process id')
+        mock_e2etest().benchmark_report.assert_called_with({'rounds': 2})
+        mock_e2etest().execute_workflow.assert_not_called()
+
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_end_to_end_execute_workflow_handler_stress(self, mock_e2etest, mock_logger):
+        msg = {'header': {'stress': {'workflows': 24}, 'process_id': 'this process id'}}
+
+        self.assertEqual({
+            'header': {'stress': {'workflows': 24}, 'process_id': 'this process id'},
+            'summary': mock_logger.get_summary(),
+        }, end_to_end_execute_workflow_handler(msg))
+
+        mock_e2etest.assert_called_with('this process id')
+        mock_e2etest().stress.assert_called_with({'workflows': 24})
+        mock_e2etest().execute_workflow.assert_not_called()
 
     @patch("gobtest.e2e.handler.E2ETest")
     def test_end_to_en_wait_handler(self, mock_e2etest, mock_logger):
@@ -89,8 +139,118 @@ class TestHandler(TestCase):
             }
         }))
         mock_e2etest.return_value.check.assert_called_with('endp', 'exp', 'desc')
+        mock_e2etest.return_value.converge.assert_not_called()
+
+        # Converging check
+        end_to_end_check_handler({
+            'header': {
+                'endpoint': 'endp',
+                'expect': 'exp',
+                'description': 'desc',
+                'process_id': 'the process id',
+                'wait_for_process_id': 'process to wait for',
+                'seconds': 60,
+            }
+        })
+        mock_e2etest.return_value.converge.assert_called_with('endp', 'exp', 'desc', 'process to wait for', 60)
 
         with self.assertRaises(AssertionError):
             end_to_end_check_handler(({
                 'header': {}
             }))
+
+    @patch("gobtest.e2e.handler.process_notifications")
+    @patch("gobtest.e2e.handler.get_notification")
+    def test_end_to_end_notification_handler(self, mock_get_notification, mock_notifications, mock_logger):
+        mock_get_notification.return_value.header = {'process_id': 'the process id'}
+        end_to_end_notification_handler({'any': 'msg'})
+        mock_get_notification.assert_called_with({'any': 'msg'})
+        mock_notifications.notify.assert_called_with('the process id')
+
+    @patch("gobtest.e2e.handler._publish_wait_result")
+    @patch("gobtest.e2e.handler.E2E_WAIT_MODE", "reschedule")
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_end_to_end_wait_handler_reschedule(self, mock_e2etest, mock_publish_wait_result, mock_logger):
+        msg = {
+            'header': {
+                'process_id': 'the process id',
+                'wait_for_process_id': 'process to wait for',
+                'seconds': 14904
+            }
+        }
+
+        # No result, the wait is scheduled
+        self.assertIsNone(end_to_end_wait_handler(msg))
+        mock_e2etest.return_value.wait.assert_not_called()
+        mock_e2etest.assert_called_with('the process id')
+        process_id, seconds, on_done = mock_e2etest.return_value.schedule_wait.call_args[0]
+        self.assertEqual(('process to wait for', 14904), (process_id, seconds))
+
+        on_done(True)
+        mock_publish_wait_result.assert_called_with(msg, True)
+
+    @patch("gobtest.e2e.handler.publish")
+    @patch("gobtest.e2e.handler.run_registry", RunRegistry())
+    @patch("gobtest.e2e.handler.E2E_WAIT_MODE", "reschedule")
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_end_to_end_wait_handler_reschedule_skipped(self, mock_e2etest, mock_publish, mock_logger):
+        from gobtest.e2e.handler import run_registry
+        run_registry.fail('failed run', 'any failure')
+        msg = {'header': {'process_id': 'failed run'}}
+
+        # The wait service has no report, the result of a skipped step is published by the handler
+        self.assertIsNone(end_to_end_wait_handler(msg))
+        mock_e2etest.return_value.schedule_wait.assert_not_called()
+        mock_publish.assert_called_with(WORKFLOW_EXCHANGE, END_TO_END_WAIT_RESULT_KEY, {
+            'header': msg['header'],
+            'summary': mock_logger.get_summary.return_value,
+        })
+
+    @patch("gobtest.e2e.handler.publish")
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_publish_wait_result(self, mock_e2etest, mock_publish, mock_logger):
+        msg = {
+            'header': {
+                'process_id': 'the process id',
+                'wait_for_process_id': 'process to wait for',
+                'seconds': 14904
+            }
+        }
+        _publish_wait_result(msg, False)
+
+        mock_logger.configure.assert_called_with(msg, 'E2E_TEST_WAIT')
+        mock_e2etest.return_value.log_wait_result.assert_called_with('process to wait for', False)
+        mock_publish.assert_called_with(WORKFLOW_EXCHANGE, END_TO_END_WAIT_RESULT_KEY, {
+            'header': msg['header'],
+            'summary': mock_logger.get_summary.return_value,
+        })
+
+    @patch("gobtest.e2e.handler.run_registry", RunRegistry())
+    @patch("gobtest.e2e.handler.E2ETest")
+    def test_skip_failed_run(self, mock_e2etest, mock_logger):
+        from gobtest.e2e.handler import run_registry
+        run_registry.fail('failed run', 'Process p1 has 1 failed jobs: 1 (rejected)')
+        msg = {
+            'header': {
+                'process_id': 'failed run',
+                'execute': 'any workflow',
+                'execute_process_id': 'any process id',
+                'wait_for_process_id': 'process to wait for',
+                'seconds': 14904,
+                'endpoint': 'any endpoint',
+                'expect': 'any expect',
+                'description': 'any description',
+            }
+        }
+        for handler in [end_to_end_execute_workflow_handler, end_to_end_wait_handler, end_to_end_check_handler]:
+            self.assertEqual({
+                'header': msg['header'],
+                'summary': mock_logger.get_summary.return_value,
+            }, handler(msg))
+        mock_logger.warning.assert_called_with('Step skipped, Process p1 has 1 failed jobs: 1 (rejected)')
+        self.assertEqual([], mock_e2etest.mock_calls)
+
+        # Other runs continue
+        msg['header']['process_id'] = 'other run'
+        end_to_end_check_handler(msg)
+        mock_e2etest.assert_called_with('other run')
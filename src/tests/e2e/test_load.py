@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.load import (
+    load_sizes, checksum, generate, read_manifest, manifest_version, compare_load_output, relation_name,
+    LOAD_ENTITIES, MANIFEST
+)
+
+
+class TestLoad(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    @patch("gobtest.e2e.load.E2E_LOAD_SIZE", 5)
+    def test_load_sizes(self):
+        self.assertEqual({entity: 5 for entity in LOAD_ENTITIES}, load_sizes(True))
+        self.assertEqual(7, load_sizes({'test_entity': 7})['test_entity'])
+        self.assertEqual(5, load_sizes({'test_entity': 7})['rel_test_entity_a'])
+        self.assertEqual(3, load_sizes({'test_entity': 7}, 3)['rel_test_entity_a'])
+
+        with self.assertRaisesRegex(ValueError, 'Unknown load entities: any'):
+            load_sizes({'any': 1})
+
+    def test_checksum(self):
+        self.assertEqual(checksum(['a', 'b']), checksum(['b', 'a']))
+        self.assertNotEqual(checksum(['a', 'b'])[1], checksum(['a', 'c'])[1])
+        self.assertNotEqual(checksum(['a'])[1], checksum(['a', 'a'])[1])
+        self.assertEqual((0, '0' * 32), checksum([]))
+
+    def test_relation_name(self):
+        self.assertEqual('tst_rta_tst_rtc_ref_to_c', relation_name('rel_test_entity_a', 'ref_to_c'))
+        self.assertEqual('tst_rtb_tst_rtd_manyref_to_d', relation_name('rel_test_entity_b', 'manyref_to_d'))
+
+    def test_manifest_version(self):
+        self.assertIsNone(manifest_version(self.tmpdir.name))
+
+    def test_generate(self):
+        sizes = {**{entity: 4 for entity in LOAD_ENTITIES}, 'rel_test_entity_c': 3}
+        manifest = generate(sizes, self.tmpdir.name)
+        self.assertEqual(manifest, read_manifest(self.tmpdir.name))
+        self.assertEqual(os.stat(os.path.join(self.tmpdir.name, MANIFEST)).st_mtime_ns,
+                         manifest_version(self.tmpdir.name))
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, MANIFEST)))
+
+        with open(manifest['rel_test_entity_a']['file']) as f:
+            lines = f.read().splitlines()
+        self.assertEqual([
+            'identificatie;volgnummer;begin_geldigheid;ref_to_c;manyref_to_c;ref_to_d;manyref_to_d',
+            'A0;1;2000-01-01;C0;C0,C1;D0;D0,D1',
+            'A1;1;2000-01-01;C1;C1,C2;D1;D1,D2',
+            'A2;1;2000-01-01;C2;C2,C0;D2;D2,D3',
+            'A3;1;2000-01-01;C0;C0,C1;D3;D3,D0',
+        ], lines)
+
+        self.assertEqual(4, manifest['test_entity']['rows'])
+        self.assertEqual(4, manifest['tst_rta_tst_rtc_ref_to_c']['rows'])
+        self.assertEqual(8, manifest['tst_rtb_tst_rtd_manyref_to_d']['rows'])
+
+        # An entity without rows
+        manifest = generate({**sizes, 'test_entity': 0}, self.tmpdir.name)
+        self.assertEqual(0, manifest['test_entity']['rows'])
+
+    def test_compare_load_output(self):
+        manifest = generate({entity: 2 for entity in LOAD_ENTITIES}, self.tmpdir.name)
+
+        ndjson = [json.dumps({'string': 'load 1', 'x': 1}), json.dumps({'string': 'load 0'}), '']
+        self.assertEqual([], compare_load_output(ndjson, 'test_entity', manifest))
+        self.assertEqual([
+            'Expected 2 records, received 1',
+            'Checksum of string does not match',
+        ], compare_load_output(ndjson[:1], 'test_entity', manifest))
+        self.assertEqual(['Checksum of string does not match'],
+                         compare_load_output([json.dumps({'string': 'load 1'})] * 2, 'test_entity', manifest))
+
+        csv = ['"src_id";"dst_id";"x"', 'A0;C0;1', 'A0;C1;', 'A1;C1;', 'A1;C0;']
+        self.assertEqual([], compare_load_output(csv, 'tst_rta_tst_rtc_manyref_to_c', manifest))
+        self.assertEqual(['Expected 4 records, received 0', 'Checksum of src_id, dst_id does not match'],
+                         compare_load_output([], 'tst_rta_tst_rtc_manyref_to_c', manifest))
+
+        # The manifest is read from the load directory by default
+        with patch("gobtest.e2e.load.read_manifest", lambda: manifest):
+            self.assertEqual([], compare_load_output(csv, 'tst_rta_tst_rtc_manyref_to_c'))
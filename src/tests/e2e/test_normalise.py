@@ -0,0 +1,84 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from gobtest.e2e.normalise import Normaliser, normaliser, read_specs, spec_for, DEFAULT_SPEC
+
+
+class TestNormalise(TestCase):
+
+    def test_mask(self):
+        normalise = Normaliser(mask=['_last_event', '_expiration_date'])
+        lines = ['"a";"_last_event";"b"', '"x;y";1;"z"', '', '2;3;"multi', 'line"']
+        self.assertEqual([
+            '"a";"_last_event";"b"',
+            '"x;y";;"z"',
+            # A quoted value that spans lines is a single row, a line without its terminator is joined by a newline
+            '2;;"multi\nline"',
+        ], list(normalise(lines)))
+
+    def test_mask_keeps_quoting(self):
+        # The unmasked fields are kept as received, an empty string or a quoted number is not an empty value or a number
+        normalise = Normaliser(mask=['_last_event'])
+        self.assertEqual(['a;_last_event', '"";', '"1";'], list(normalise(['a;_last_event', '"";1', '"1";2'])))
+        self.assertEqual(['a;_last_event', ';', '1;'], list(normalise(['a;_last_event', ';1', '1;2'])))
+
+    def test_mask_multi_line_value(self):
+        # The lines keep their terminators, the line breaks in a quoted value are kept
+        normalise = Normaliser(mask=['_last_event'])
+        lines = ['"a";"_last_event"\r\n', '"multi\n', 'line";1\n', '"multi\r\n', '""line"";";2\r\n', '3;4']
+        self.assertEqual([
+            '"a";"_last_event"',
+            '"multi\nline";',
+            '"multi\r\n""line"";";',
+            '3;',
+        ], list(normalise(lines)))
+
+        # Unterminated quoted value
+        self.assertEqual(['a;b', '"multi\nline'], list(normalise(['a;b\n', '"multi\n', 'line\n'])))
+
+    def test_drop_and_columns(self):
+        lines = ['"a";"b";"c"', '1;2;3']
+        self.assertEqual(['"a";"c"', '1;3'], list(Normaliser(drop=['b'])(lines)))
+        self.assertEqual(['"c";"a"', '3;1'], list(Normaliser(columns=['c', 'a', 'missing'])(lines)))
+        self.assertEqual(['"c"', '3'], list(Normaliser(columns=['c', 'a'], drop=['a'])(lines)))
+
+    def test_unchanged(self):
+        # Nothing to normalise
+        lines = ['"a";"b"', '1;2', '']
+        self.assertEqual(lines, list(Normaliser(mask=['_last_event'])(lines)))
+        self.assertEqual(lines, list(Normaliser()(lines)))
+        self.assertEqual(lines, list(Normaliser()([line + '\n' for line in lines])))
+
+        # NDJSON is brought into its canonical form instead
+        lines = ['{"_last_event": 1, "a": 1.50}\r\n', '\n', '{"_last_event": 2}']
+        self.assertEqual(['{"_last_event":1,"a":1.5}', '{"_last_event":2}'],
+                         list(Normaliser(mask=['_last_event'], columns=['a'])(lines)))
+
+        self.assertEqual([], list(Normaliser(mask=['_last_event'])([])))
+
+    def test_malformed_row(self):
+        lines = ['"a";"_last_event"', '1;2;3', '4;5']
+        self.assertEqual(['"a";"_last_event"', '1;2;3', '4;'], list(Normaliser(mask=['_last_event'])(lines)))
+
+    def test_normaliser(self):
+        normalise = normaliser({'mask': ['a'], 'drop': ['b'], 'columns': ['a', 'b']})
+        self.assertEqual(({'a'}, {'b'}, ['a', 'b']), (normalise.mask, normalise.drop, normalise.columns))
+
+        with self.assertRaisesRegex(ValueError, 'Unknown normalisation options: ignore'):
+            normaliser({'ignore': ['a']})
+
+        with self.assertRaisesRegex(ValueError, 'Invalid normalisation option mask'):
+            normaliser({'mask': 'a'})
+
+    def test_specs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertEqual({'*': DEFAULT_SPEC}, read_specs(tmpdir))
+
+            with open(os.path.join(tmpdir, 'normalise.json'), 'w') as f:
+                f.write('{"A": {"drop": ["b"]}}')
+            specs = read_specs(tmpdir)
+
+        self.assertEqual({'drop': ['b']}, spec_for(specs, 'A'))
+        self.assertEqual({}, spec_for(specs, 'B'))
+        self.assertEqual(DEFAULT_SPEC, spec_for({'*': DEFAULT_SPEC}, 'B'))
@@ -0,0 +1,54 @@
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from gobtest.e2e.notifications import ProcessNotifications
+
+
+class TestProcessNotifications(TestCase):
+
+    def test_notify_unwatched(self):
+        notifications = ProcessNotifications()
+        notifications.notify('p1')
+        notifications.notify(None)
+        self.assertEqual(0, notifications.received('p1'))
+        self.assertEqual({}, notifications._received)
+
+    def test_watch(self):
+        notifications = ProcessNotifications()
+        with notifications.watch('p1'):
+            with notifications.watch('p1'):
+                notifications.notify('p1')
+                notifications.notify('p2')
+                self.assertEqual(1, notifications.received('p1'))
+            # Still watched by the outer watcher
+            notifications.notify('p1')
+            self.assertEqual(2, notifications.received('p1'))
+
+        self.assertEqual({}, notifications._received)
+        self.assertEqual({}, notifications._watchers)
+
+    def test_wait(self):
+        notifications = ProcessNotifications()
+        with notifications.watch('p1'):
+            since = notifications.received('p1')
+            self.assertFalse(notifications.wait('p1', since, 0.01))
+
+            # A notification that is received before the wait is not missed
+            notifications.notify('p1')
+            self.assertTrue(notifications.wait('p1', since, 0.01))
+
+            since = notifications.received('p1')
+            timer = threading.Timer(0.01, notifications.notify, args=('p1',))
+            timer.start()
+            self.assertTrue(notifications.wait('p1', since, 5))
+            timer.join()
+
+    def test_listeners(self):
+        notifications = ProcessNotifications()
+        listener = MagicMock()
+        notifications.add_listener(listener)
+
+        # Listeners are called for every notification
+        notifications.notify('p1')
+        listener.assert_called_with('p1')
@@ -0,0 +1,86 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from gobtest.e2e.poller import ProcessStatePoller, WORKFLOW_STATE, process_state, process_state_poller
+
+
+class TestProcessStatePoller(TestCase):
+
+    @patch("gobtest.e2e.poller.time.monotonic")
+    def test_get(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        poller = ProcessStatePoller(ttl=1)
+        request = MagicMock(side_effect=[1, 2, 3])
+
+        # Shared within the ttl
+        self.assertEqual(1, poller.get('key', request))
+        mock_monotonic.return_value = 100.5
+        self.assertEqual(1, poller.get('key', request))
+        self.assertEqual(1, request.call_count)
+
+        # Requested again after the ttl
+        mock_monotonic.return_value = 101
+        self.assertEqual(2, poller.get('key', request))
+
+        # Other states are requested separately
+        self.assertEqual(7, poller.get('other', lambda: 7))
+
+        # Expired states are dropped
+        mock_monotonic.return_value = 110
+        self.assertEqual(3, poller.get('key', request))
+        self.assertEqual(['key'], list(poller._states))
+
+    def test_get_error(self):
+        poller = ProcessStatePoller(ttl=60)
+        request = MagicMock(side_effect=[ValueError('any error'), 5])
+
+        with self.assertRaisesRegex(ValueError, 'any error'):
+            poller.get('key', request)
+        # A failure is not shared
+        self.assertEqual(5, poller.get('key', request))
+
+    def test_get_concurrent(self):
+        poller = ProcessStatePoller(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def request():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return len(calls)
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(poller.get('key', request)))
+        first.start()
+        started.wait(5)
+        # Concurrent gets wait for the pending request
+        others = [threading.Thread(target=lambda: results.append(poller.get('key', request))) for _ in range(3)]
+        for thread in others:
+            thread.start()
+        release.set()
+        for thread in [first, *others]:
+            thread.join(5)
+
+        self.assertEqual([1, 1, 1, 1], results)
+        self.assertEqual(1, len(calls))
+
+    def test_invalidate(self):
+        poller = ProcessStatePoller(ttl=60)
+        poller.get(WORKFLOW_STATE, lambda: 1)
+        poller.get(process_state('p1'), lambda: 1)
+        poller.get(process_state('p2'), lambda: 1)
+
+        poller.invalidate('p1')
+        self.assertEqual([process_state('p2')], list(poller._states))
+
+        poller.invalidate(None)
+        self.assertEqual([process_state('p2')], list(poller._states))
+
+    def test_notifications(self):
+        from gobtest.e2e.notifications import process_notifications
+        process_state_poller.get(process_state('any process'), lambda: 1)
+        process_notifications.notify('any process')
+        self.assertNotIn(process_state('any process'), process_state_poller._states)
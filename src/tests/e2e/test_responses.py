@@ -0,0 +1,82 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from gobtest.e2e.responses import CachedComparison, ResponseCache, compare_response, conditional_headers
+
+
+class TestResponses(TestCase):
+
+    def _response(self, status_code, chunks, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.encoding = None
+        response.headers = headers or {}
+        response.iter_content.return_value = iter(chunks)
+        return response
+
+    def test_conditional_headers(self):
+        self.assertEqual({}, conditional_headers(None))
+        self.assertEqual({}, conditional_headers(CachedComparison(None, None, b'', ('src', []))))
+        self.assertEqual({
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'
+        }, conditional_headers(CachedComparison('"v1"', 'Wed, 21 Oct 2015 07:28:00 GMT', b'', ('src', []))))
+
+    def test_compare_response(self):
+        received = []
+
+        def compare(lines):
+            received.extend(lines)
+            return 'src', []
+
+        response = self._response(200, [b'A\r\nB', b'\n\xc3\xa9\n'], {'ETag': '"v1"'})
+        comparison = compare_response(response, None, compare)
+        self.assertEqual(['A\r\n', 'B\n', 'é\n'], received)
+        self.assertEqual('"v1"', comparison.etag)
+        self.assertIsNone(comparison.last_modified)
+        self.assertEqual(('src', []), comparison.result)
+
+        # Not modified
+        compare = MagicMock()
+        self.assertEqual(comparison, compare_response(self._response(304, []), comparison, compare))
+
+        # Same content in other chunks, the validators of the response are kept
+        response = self._response(200, [b'A\r\n', b'B\n\xc3\xa9\n'], {'Last-Modified': 'any date'})
+        cached = compare_response(response, comparison, compare)
+        self.assertEqual((None, 'any date', comparison.digest, ('src', [])), cached)
+        compare.assert_not_called()
+
+        # Other content
+        compare.return_value = 'src', ['any difference']
+        cached = compare_response(self._response(200, [b'A\n']), comparison, compare)
+        self.assertEqual(('src', ['any difference']), cached.result)
+        self.assertNotEqual(comparison.digest, cached.digest)
+
+    def test_response_cache(self):
+        cache = ResponseCache(max_size=2)
+        comparison = CachedComparison(None, None, b'digest', ('src', []))
+
+        self.assertIsNone(cache.get('/endpoint', 'exp', 1))
+        cache.put('/endpoint', 'exp', 1, comparison)
+        self.assertEqual(comparison, cache.get('/endpoint', 'exp', 1))
+        self.assertIsNone(cache.get('/endpoint', 'exp', 2))
+        self.assertIsNone(cache.get('/endpoint', 'other', 1))
+
+        # Least recently used first
+        cache.put('/other', 'exp', 1, comparison)
+        cache.get('/endpoint', 'exp', 1)
+        cache.put('/third', 'exp', 1, comparison)
+        self.assertIsNone(cache.get('/other', 'exp', 1))
+        self.assertEqual(comparison, cache.get('/endpoint', 'exp', 1))
+
+        # Unknown version
+        cache.put('/unknown', 'exp', None, comparison)
+        self.assertIsNone(cache.get('/unknown', 'exp', None))
+
+        cache.clear()
+        self.assertIsNone(cache.get('/endpoint', 'exp', 1))
+
+    def test_response_cache_disabled(self):
+        cache = ResponseCache(max_size=0)
+        cache.put('/endpoint', 'exp', 1, CachedComparison(None, None, b'digest', ('src', [])))
+        self.assertIsNone(cache.get('/endpoint', 'exp', 1))
@@ -0,0 +1,43 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.runs import RunRegistry
+
+
+class TestRunRegistry(TestCase):
+
+    def test_fail(self):
+        registry = RunRegistry()
+        self.assertIsNone(registry.failure('run'))
+        self.assertIsNone(registry.failure(None))
+
+        registry.fail('run', 'first reason')
+        registry.fail('run', 'second reason')
+        self.assertEqual('first reason', registry.failure('run'))
+        self.assertIsNone(registry.failure('other run'))
+
+    def test_max_runs(self):
+        registry = RunRegistry()
+        registry.MAX_RUNS = 2
+        for run in ['a', 'b', 'c']:
+            registry.fail(run, f'reason {run}')
+        self.assertEqual([None, 'reason b', 'reason c'], [registry.failure(run) for run in ['a', 'b', 'c']])
+
+    @patch("gobtest.e2e.runs.time.monotonic")
+    def test_duration(self, mock_monotonic):
+        registry = RunRegistry()
+        self.assertIsNone(registry.duration('p1'))
+
+        mock_monotonic.return_value = 100
+        registry.start('p1')
+        mock_monotonic.return_value = 112.5
+        self.assertEqual(12.5, registry.duration('p1'))
+
+    def test_timings(self):
+        registry = RunRegistry()
+        self.assertEqual([], registry.timings('run'))
+
+        registry.record('run', 'execute p1', 100, 0.1)
+        registry.record('run', 'wait p1', 100, 12.5)
+        self.assertEqual([('execute p1', 100, 0.1), ('wait p1', 100, 12.5)], registry.timings('run'))
+        self.assertEqual([], registry.timings('other run'))
@@ -0,0 +1,34 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.session import create_session, session, RETRY_STATUS_CODES
+
+
+class TestSession(TestCase):
+
+    def test_create_session(self):
+        s = create_session(timeout=5, retries=2, pool_size=4)
+        self.assertEqual('gzip', s.headers['Accept-Encoding'])
+
+        for prefix in ['http://', 'https://']:
+            adapter = s.get_adapter(f'{prefix}any')
+            self.assertEqual(4, adapter._pool_maxsize)
+            self.assertEqual(2, adapter.max_retries.total)
+            self.assertEqual(RETRY_STATUS_CODES, adapter.max_retries.status_forcelist)
+            self.assertFalse(adapter.max_retries.raise_on_status)
+
+        # Connections are pooled per session
+        self.assertIs(s.get_adapter('http://a'), s.get_adapter('http://b'))
+
+    @patch("gobtest.e2e.session.requests.Session.request")
+    def test_timeout(self, mock_request):
+        s = create_session(timeout=5)
+        s.delete('http://any')
+        mock_request.assert_called_with('DELETE', 'http://any', timeout=5)
+
+        s.delete('http://any', timeout=1)
+        mock_request.assert_called_with('DELETE', 'http://any', timeout=1)
+
+    def test_shared_session(self):
+        from gobtest.e2e import e2etest
+        self.assertIs(session, e2etest.session)
@@ -0,0 +1,106 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.stress import StressTest, stress_options
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeTarget:
+    """Every workflow runs 2 jobs for the given number of seconds."""
+
+    def __init__(self, clock, durations, failed=None):
+        self.clock = clock
+        self.durations = durations
+        self.failed = failed or []
+        self.starts = {}
+
+    def execute_workflow(self, workflow, process_id):
+        self.starts[process_id] = self.clock.now
+
+    def _running(self, process_id):
+        return self.clock.now - self.starts[process_id] < self.durations[process_id]
+
+    def pending_jobs(self, process_id):
+        return 2 if self._running(process_id) else 0
+
+    def pending_messages(self):
+        return 50 * sum(self._running(process_id) for process_id in self.starts)
+
+    def process_jobs(self, process_id):
+        return [{'id': 1, 'status': 'ended'}, {'id': 2, 'status': 'ended'}]
+
+    def failed_jobs(self, process_id):
+        return [{'id': 2, 'status': 'failed'}] if process_id in self.failed else []
+
+
+class TestStress(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for target in ["gobtest.e2e.stress.time", "gobtest.e2e.wait.time"]:
+            patcher = patch(target, self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch("gobtest.e2e.stress.E2E_STRESS_WORKFLOWS", 6)
+    @patch("gobtest.e2e.stress.E2E_STRESS_RAMP", 30)
+    @patch("gobtest.e2e.stress.E2E_STRESS_SIZE", 5)
+    def test_stress_options(self):
+        workflows, ramp, sizes = stress_options(True)
+        self.assertEqual((6, 30), (workflows, ramp))
+        self.assertEqual(5, sizes['test_entity'])
+
+        workflows, ramp, sizes = stress_options({'workflows': 24, 'ramp': 0, 'sizes': {'test_entity': 7}})
+        self.assertEqual((24, 0), (workflows, ramp))
+        self.assertEqual((7, 5), (sizes['test_entity'], sizes['rel_test_entity_a']))
+
+        with self.assertRaisesRegex(ValueError, 'Unknown stress options: any'):
+            stress_options({'any': 1})
+
+        with self.assertRaisesRegex(ValueError, 'Invalid stress options: 0 workflows'):
+            stress_options({'workflows': 0})
+
+    def test_run(self):
+        target = FakeTarget(self.clock, {'p0': 3, 'p1': 4, 'p2': 20}, failed=['p1'])
+        stress_test = StressTest(target, {'p0': ['w0'], 'p1': ['w1'], 'p2': ['w2']}, 10, 60, backlog=100)
+
+        report = stress_test.run()
+
+        # The workflows are started on the ramp
+        self.assertEqual({'p0': 0, 'p1': 5, 'p2': 10}, target.starts)
+        self.assertEqual([
+            'Stress test of 3 workflows, ramped up in 10 seconds: 3 finished in 35.0 seconds',
+            'Completion time in seconds: p50 9.0, p90 25.0, p99 25.0, max 25.0',
+            'Throughput: 6 jobs in 0.6 minutes, 10.3 jobs/min',
+            'Queues did not back up, max 50 pending messages at 1 concurrent workflows',
+        ], report)
+        self.assertEqual(['Process p1 has 1 failed jobs'], stress_test.errors())
+
+    def test_run_backlog(self):
+        target = FakeTarget(self.clock, {'p0': 30, 'p1': 30, 'p2': 30})
+        stress_test = StressTest(target, {'p0': ['w0'], 'p1': ['w1'], 'p2': ['w2']}, 10, 60, backlog=100)
+
+        report = stress_test.run()
+        self.assertEqual(
+            'Queues backed up at 2 concurrent workflows after 5.0 seconds, 100 pending messages', report[-1])
+        self.assertEqual([], stress_test.errors())
+
+    def test_run_timeout(self):
+        target = FakeTarget(self.clock, {'p0': 3, 'p1': 1000})
+        stress_test = StressTest(target, {'p0': ['w0'], 'p1': ['w1']}, 0, 60)
+
+        report = stress_test.run()
+        self.assertEqual('Stress test of 2 workflows, ramped up in 0 seconds: 1 finished in 60.0 seconds', report[0])
+        self.assertEqual('Completion time in seconds: p50 13.0, p90 13.0, p99 13.0, max 13.0', report[1])
+        self.assertEqual(['Process p1 has not completed'], stress_test.errors())
@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.e2e.timings import (
+    step_durations, read_baselines, write_baselines, regressions, duration_table, compare_baseline, locked_baselines
+)
+
+
+class TestTimings(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'baseline', 'e2e_baseline.json')
+
+    def test_step_durations(self):
+        self.assertEqual({
+            'execute p1': 0.1,
+            'wait p1': 10,
+            'check Import ADD': 1,
+            'check Import ADD (2)': 2,
+            'check Import ADD (3)': 3,
+        }, step_durations([
+            ('execute p1', 0, 0.1),
+            ('wait p1', 0, 10),
+            ('check Import ADD', 10, 1),
+            ('check Import ADD', 11, 2),
+            ('check Import ADD', 13, 3),
+        ]))
+
+    def test_step_durations_prefix(self):
+        self.assertEqual({'execute relate.p1': 0.1, 'check Relation x': 1}, step_durations([
+            ('execute main.relate.p1', 0, 0.1),
+            ('check Relation x', 10, 1),
+        ], 'main.'))
+
+    def test_read_write_baselines(self):
+        self.assertEqual({}, read_baselines(self.path))
+
+        write_baselines({'suite.relate': {'wait p1': 10}}, self.path)
+        self.assertEqual({'suite.relate': {'wait p1': 10}}, read_baselines(self.path))
+        # No temporary files are left behind
+        self.assertEqual(['e2e_baseline.json'], os.listdir(os.path.dirname(self.path)))
+
+        # Also not when the baselines cannot be written
+        with self.assertRaises(TypeError):
+            write_baselines({'suite.relate': {'wait p1': object()}}, self.path)
+        self.assertEqual(['e2e_baseline.json'], os.listdir(os.path.dirname(self.path)))
+        self.assertEqual({'suite.relate': {'wait p1': 10}}, read_baselines(self.path))
+
+    def test_regressions(self):
+        baseline = {'wait p1': 10, 'wait p2': 1, 'wait p3': 10}
+        durations = {'wait p1': 30, 'wait p2': 3, 'wait p3': 14, 'wait p4': 100}
+        # p2 is 3x slower but only 2 seconds, p3 is not slower than the threshold, p4 has no baseline
+        self.assertEqual(['wait p1 took 30.0 seconds, baseline 10.0 seconds'], regressions(durations, baseline, 1.5, 5))
+        self.assertEqual([
+            'wait p1 took 30.0 seconds, baseline 10.0 seconds',
+            'wait p2 took 3.0 seconds, baseline 1.0 seconds',
+            'wait p3 took 14.0 seconds, baseline 10.0 seconds',
+        ], regressions(durations, baseline, 1.2, 0))
+
+    def test_duration_table(self):
+        self.assertEqual([
+            'wait p1          12.3s (baseline 10.0s)',
+            'check Import      0.5s',
+        ], duration_table({'wait p1': 12.34, 'check Import': 0.5}, {'wait p1': 10}))
+        self.assertEqual([], duration_table({}))
+
+    def test_compare_baseline(self):
+        # No baseline, not stored
+        self.assertEqual((None, []), compare_baseline('suite.relate', {'wait p1': 10}, False, self.path))
+        self.assertEqual({}, read_baselines(self.path))
+
+        # No baseline, stored
+        self.assertEqual((None, []), compare_baseline('suite.relate', {'wait p1': 10}, True, self.path))
+        self.assertEqual({'suite.relate': {'wait p1': 10}}, read_baselines(self.path))
+
+        # Compared with the baseline, the baseline is kept
+        self.assertEqual(
+            ({'wait p1': 10}, ['wait p1 took 30.0 seconds, baseline 10.0 seconds']),
+            compare_baseline('suite.relate', {'wait p1': 30}, True, self.path))
+        with open(self.path) as f:
+            self.assertEqual({'suite.relate': {'wait p1': 10}}, json.load(f))
+
+        # Other suites are kept
+        compare_baseline('suite.autoid', {'wait p2': 5}, True, self.path)
+        self.assertEqual({'suite.relate', 'suite.autoid'}, set(read_baselines(self.path)))
+
+    def test_compare_baseline_concurrent(self):
+        suites = [f'suite.{n}' for n in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda suite: compare_baseline(suite, {'wait p1': 10}, True, self.path), suites))
+
+        # No baseline has been lost
+        self.assertEqual(set(suites), set(read_baselines(self.path)))
+
+    def test_compare_baseline_stored_meanwhile(self):
+        # Another run stores the baseline of the suite while this run waits for the lock
+        def store_meanwhile(path):
+            write_baselines({'suite.relate': {'wait p1': 10}}, path)
+            return locked_baselines(path)
+
+        with patch("gobtest.e2e.timings.locked_baselines", side_effect=store_meanwhile):
+            self.assertEqual(
+                ({'wait p1': 10}, ['wait p1 took 30.0 seconds, baseline 10.0 seconds']),
+                compare_baseline('suite.relate', {'wait p1': 30}, True, self.path))
+        self.assertEqual({'suite.relate': {'wait p1': 10}}, read_baselines(self.path))
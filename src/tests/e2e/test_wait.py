@@ -0,0 +1,187 @@
+import itertools
+import math
+import threading
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from gobtest.e2e.wait import ProcessWait, WaitScheduler
+
+
+class TestProcessWait(TestCase):
+
+    def _run(self, state, max_seconds_to_try):
+        """Run the wait in a loop, return the result and the number of intervals that have been waited."""
+        process_wait = ProcessWait(state, 'any process id', max_seconds_to_try)
+        intervals = 0
+        while (result := process_wait.check()) is None:
+            intervals += 1
+        return result, intervals
+
+    @patch("gobtest.e2e.wait.time.monotonic")
+    def test_check(self, mock_monotonic):
+        state = MagicMock()
+        max_seconds_to_try = 99
+        interval = ProcessWait.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH
+
+        # Every interval takes the full polling interval
+        mock_monotonic.side_effect = itertools.chain([0, 0], itertools.count(interval, interval))
+
+        # No pending jobs and messages, process has finished
+        state.pending_jobs.return_value = 0
+        state.pending_messages.return_value = 0
+        self.assertEqual((True, 1), self._run(state, max_seconds_to_try))  # 1 confirmation
+        state.pending_jobs.assert_called_with('any process id')
+
+        # No pending jobs and pending messages, process has finished
+        mock_monotonic.side_effect = itertools.chain([0, 0], itertools.count(interval, interval))
+        state.pending_messages.return_value = 1
+        self.assertEqual((True, 2), self._run(state, max_seconds_to_try))  # 1 extra confirmation
+
+        # pending jobs and pending messages, process has not finished
+        mock_monotonic.side_effect = itertools.chain([0, 0], itertools.count(interval, interval))
+        state.pending_jobs.return_value = 1
+        self.assertEqual((False, math.ceil(max_seconds_to_try / interval)), self._run(state, max_seconds_to_try))
+
+        # pending jobs and no pending messages, process has not finished
+        mock_monotonic.side_effect = itertools.chain([0, 0], itertools.count(interval, interval))
+        state.pending_messages.return_value = 0
+        self.assertEqual((False, math.ceil(max_seconds_to_try / interval)), self._run(state, max_seconds_to_try))
+
+    @patch("gobtest.e2e.wait.time.monotonic")
+    def test_check_interval(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        state = MagicMock()
+        process_wait = ProcessWait(state, 'any process id', 99)
+
+        state.pending_jobs.return_value = 1
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH, process_wait.interval)
+
+        # A finished process is confirmed after the confirmation interval
+        state.pending_jobs.return_value = 0
+        state.pending_messages.return_value = 0
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CONFIRM_AFTER_N_SECONDS, process_wait.interval)
+
+        # Not before the interval has passed, eg when woken up by a notification
+        mock_monotonic.return_value = 1
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CONFIRM_AFTER_N_SECONDS - 1, process_wait.interval)
+
+        mock_monotonic.return_value = ProcessWait.CONFIRM_AFTER_N_SECONDS
+        self.assertTrue(process_wait.check())
+
+    @patch("gobtest.e2e.wait.process_notifications")
+    @patch("gobtest.e2e.wait.time.monotonic")
+    def test_check_notified(self, mock_monotonic, mock_notifications):
+        mock_monotonic.return_value = 0
+        mock_notifications.received.return_value = 0
+        state = MagicMock()
+        state.pending_messages.return_value = 0
+        process_wait = ProcessWait(state, 'any process id', 99)
+
+        # A notification while the process has pending jobs does not change the polling interval
+        state.pending_jobs.return_value = 1
+        mock_notifications.received.return_value = 1
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH, process_wait.interval)
+
+        # No pending jobs after the notification of the last job, confirmed after the shorter interval
+        mock_monotonic.return_value = 2
+        state.pending_jobs.return_value = 0
+        mock_notifications.received.return_value = 2
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CONFIRM_AFTER_NOTIFICATION_SECONDS, process_wait.interval)
+
+        mock_monotonic.return_value = 2 + ProcessWait.CONFIRM_AFTER_NOTIFICATION_SECONDS
+        self.assertTrue(process_wait.check())
+
+        # Pending messages, eg the start of the next job, require another confirmation after the full interval
+        process_wait = ProcessWait(state, 'any process id', 99)
+        state.pending_messages.return_value = 1
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CONFIRM_AFTER_NOTIFICATION_SECONDS, process_wait.interval)
+        mock_monotonic.return_value = 10
+        self.assertIsNone(process_wait.check())
+        self.assertEqual(ProcessWait.CONFIRM_AFTER_N_SECONDS, process_wait.interval)
+
+    def test_confirm_interval(self):
+        # The confirmation interval guards against the race in which the next job of the process is not yet created
+        self.assertEqual(5, ProcessWait.CONFIRM_AFTER_N_SECONDS)
+        self.assertEqual(1, ProcessWait.CONFIRM_AFTER_NOTIFICATION_SECONDS)
+
+    @patch("gobtest.e2e.wait.time.monotonic")
+    def test_check_expanding(self, mock_monotonic):
+        mock_monotonic.side_effect = [0, 0, 50, 100, 150, 250]
+        state = MagicMock()
+        process_wait = ProcessWait(state, 'any process id', 99)
+
+        # The max wait time is reset as long as the process expands
+        state.pending_jobs.side_effect = [1, 2, 3, 4]
+        for _ in range(4):
+            self.assertIsNone(process_wait.check())
+        self.assertFalse(process_wait.check())
+
+
+class TestWaitScheduler(TestCase):
+
+    @patch("gobtest.e2e.wait.logger")
+    def test_schedule(self, mock_logger):
+        scheduler = WaitScheduler()
+        done = threading.Event()
+        results = []
+
+        def on_done(result):
+            results.append(result)
+            done.set()
+
+        process_wait = MagicMock()
+        process_wait.interval = 0
+        process_wait.check.side_effect = [None, Exception('API unavailable'), True]
+        process_wait.CHECK_EVERY_N_SECONDS_FOR_PROCESS_TO_FINISH = 0
+
+        scheduler.schedule(process_wait, on_done)
+        self.assertTrue(done.wait(5))
+        self.assertEqual([True], results)
+        self.assertEqual(3, process_wait.check.call_count)
+        self.assertEqual(0, scheduler.pending())
+        mock_logger.warning.assert_called_once()
+        self.assertIn('API unavailable', mock_logger.warning.call_args[0][0])
+
+    @patch("gobtest.e2e.wait.logger")
+    def test_step(self, mock_logger):
+        scheduler = WaitScheduler()
+        on_done = MagicMock()
+        process_wait = MagicMock()
+        process_wait.interval = 60
+
+        # Not done, reschedule after the interval
+        process_wait.check.return_value = None
+        with patch.object(scheduler, '_next', return_value=(process_wait, on_done)):
+            scheduler._step()
+        self.assertEqual(1, scheduler.pending())
+        on_done.assert_not_called()
+
+        # Reporting failures do not stop the scheduler
+        process_wait.check.return_value = False
+        on_done.side_effect = Exception('any error')
+        with patch.object(scheduler, '_next', return_value=(process_wait, on_done)):
+            scheduler._step()
+        on_done.assert_called_with(False)
+        self.assertIn('failed to report: any error', mock_logger.error.call_args[0][0])
+
+    def test_wake(self):
+        scheduler = WaitScheduler()
+        wait_1 = MagicMock(process_id='p1')
+        wait_2 = MagicMock(process_id='p2')
+        with scheduler._condition:
+            scheduler._push(1e12, wait_1, MagicMock())
+            scheduler._push(2e12, wait_2, MagicMock())
+
+        scheduler.wake('p3')
+        self.assertEqual(wait_1, scheduler._scheduled[0][2])
+
+        # The wait for p2 is due now
+        scheduler.wake('p2')
+        self.assertEqual(wait_2, scheduler._scheduled[0][2])
+        self.assertLess(scheduler._scheduled[0][0], 1e12)
@@ -1,21 +1,24 @@
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
-from gobtest.__main__ import SERVICEDEFINITION, DATA_CONSISTENCY_TEST, on_events_listener
+from gobtest.__main__ import SERVICEDEFINITION, on_events_listener, wait_service
 
 
 class TestMain(TestCase):
 
+    @patch("gobtest.__main__.SERVICE_WORKERS", "")
+    @patch("gobtest.__main__.expectation_index")
     @patch("gobtest.__main__.messagedriven_service")
-    def test_main_entry(self, mock_messagedriven_service):
+    def test_main_entry(self, mock_messagedriven_service, mock_expectation_index):
         from gobtest import __main__ as module
         with patch.object(module, "__name__", "__main__"):
             module.init()
+            mock_expectation_index.load.assert_called_once()
             mock_messagedriven_service.assert_called_with(SERVICEDEFINITION, "Test", {"thread_per_service": True})
 
-    @patch("gobtest.__main__.start_workflow")
+    @patch("gobtest.__main__.coalescer")
     @patch("gobtest.__main__.can_handle")
-    def test_on_events_listener(self, mock_can_handle, mock_start_workflow):
+    def test_on_events_listener(self, mock_can_handle, mock_coalescer):
         msg = {
             'type': 'events',
             'contents': {'applied': 'any applied', 'last_event': 'any last_event'},
@@ -30,7 +33,7 @@ class TestMain(TestCase):
         mock_can_handle.return_value = False
         on_events_listener(msg)
 
-        mock_start_workflow.assert_not_called()
+        mock_coalescer.trigger.assert_not_called()
 
         mock_can_handle.return_value = True
         on_events_listener(msg)
@@ -41,9 +44,30 @@ class TestMain(TestCase):
             'application': 'SOME APP',
         })
 
-        mock_start_workflow.assert_called_with({'workflow_name': DATA_CONSISTENCY_TEST}, {
+        mock_coalescer.trigger.assert_called_with({
             'catalogue': 'SOME CAT',
             'collection': 'SOME COLL',
             'application': 'SOME APP',
             'process_id': 'PROCESS ID',
         })
+
+    @patch("gobtest.__main__.SERVICE_WORKERS", "data_consistency_test=2")
+    @patch("gobtest.__main__.expectation_index", MagicMock())
+    @patch("gobtest.__main__.messagedriven_service")
+    def test_main_entry_workers(self, mock_messagedriven_service):
+        from gobtest import __main__ as module
+        with patch.object(module, "__name__", "__main__"):
+            module.init()
+            definition = mock_messagedriven_service.call_args[0][0]
+            self.assertEqual(len(SERVICEDEFINITION) + 1, len(definition))
+            self.assertEqual(definition["data_consistency_test"]["queue"],
+                             definition["data_consistency_test_1"]["queue"])
+
+    def test_wait_service(self):
+        self.assertIn('report', wait_service('blocking'))
+        self.assertIn('report', SERVICEDEFINITION['e2e_test_wait'])
+
+        # In reschedule wait mode the handler publishes the results itself
+        service = wait_service('reschedule')
+        self.assertNotIn('report', service)
+        self.assertEqual(SERVICEDEFINITION['e2e_test_wait']['handler'], service['handler'])
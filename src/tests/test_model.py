@@ -0,0 +1,63 @@
+import importlib
+import sys
+import threading
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from gobtest.model import LazyGOBModel, gob_model
+
+
+@patch("gobcore.model.GOBModel")
+class TestLazyGOBModel(TestCase):
+
+    def test_load(self, mock_gob_model):
+        model = LazyGOBModel()
+        self.assertFalse(model.loaded)
+        mock_gob_model.assert_not_called()
+
+        self.assertEqual(mock_gob_model.return_value, model.load())
+        self.assertTrue(model.loaded)
+        self.assertEqual(mock_gob_model.return_value, model.load())
+        mock_gob_model.assert_called_once()
+
+    def test_load_threads(self, mock_gob_model):
+        model = LazyGOBModel()
+        threads = [threading.Thread(target=model.load) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        mock_gob_model.assert_called_once()
+
+    def test_proxy(self, mock_gob_model):
+        mock_gob_model.return_value = MagicMock()
+        mock_gob_model.return_value.__getitem__.return_value = 'any catalog'
+        mock_gob_model.return_value.__contains__.return_value = True
+        mock_gob_model.return_value.__iter__.return_value = iter(['cat'])
+        model = LazyGOBModel()
+
+        self.assertEqual('any catalog', model['cat'])
+        mock_gob_model.return_value.__getitem__.assert_called_with('cat')
+        self.assertIn('cat', model)
+        self.assertEqual(['cat'], list(model))
+        self.assertEqual(mock_gob_model.return_value.get_catalog_names.return_value, model.get_catalog_names())
+
+    def test_private_attributes(self, mock_gob_model):
+        model = LazyGOBModel()
+        with self.assertRaises(AttributeError):
+            model._any_private_attribute
+        self.assertFalse(model.loaded)
+
+
+class TestPreload(TestCase):
+
+    @patch("gobcore.model.GOBModel")
+    def test_preload(self, mock_gob_model):
+        # The fork server imports the preload module, which loads the model once for all worker processes
+        with patch.object(gob_model, "_model", None), patch.dict(sys.modules):
+            sys.modules.pop("gobtest.preload", None)
+            importlib.import_module("gobtest.preload")
+
+            mock_gob_model.assert_called_once()
+            self.assertTrue(gob_model.loaded)
+        self.assertFalse(gob_model.loaded)
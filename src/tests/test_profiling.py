@@ -0,0 +1,65 @@
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+
+from gobtest.profiling import StartupProfiler
+
+
+class TestStartupProfiler(TestCase):
+
+    def test_install(self):
+        profiler = StartupProfiler(enabled=False)
+        profiler.install()
+        self.assertIsNone(profiler._finder)
+
+        profiler = StartupProfiler(enabled=True)
+        profiler.install()
+        self.addCleanup(profiler.uninstall)
+        self.assertIs(profiler._finder, sys.meta_path[0])
+        profiler.install()
+        self.assertEqual(1, sys.meta_path.count(profiler._finder))
+
+        # A module that is imported after the profiler has been installed is timed
+        sys.modules.pop('colorsys', None)
+        import colorsys
+        self.assertIn('colorsys', profiler.imports)
+        self.assertTrue(colorsys.rgb_to_hsv)
+        # The other loader attributes are those of the wrapped loader
+        loader = colorsys.__spec__.loader
+        self.assertEqual(loader._loader.get_filename('colorsys'), loader.get_filename('colorsys'))
+        self.assertIsNone(profiler._finder.find_spec('no_such_module', None))
+
+        profiler.uninstall()
+        self.assertNotIn(profiler._finder, sys.meta_path)
+        profiler.uninstall()
+
+    def test_timed_import(self):
+        profiler = StartupProfiler(enabled=True)
+        with patch("gobtest.profiling.time.perf_counter", side_effect=[0, 1, 3, 10]):
+            with profiler.timed_import('outer'):
+                with profiler.timed_import('inner'):
+                    pass
+        self.assertEqual({'inner': (2, 2), 'outer': (10, 8)}, profiler.imports)
+        self.assertEqual([
+            'outer: 10.000 seconds (8.000 seconds self)',
+            'inner: 2.000 seconds (2.000 seconds self)',
+        ], profiler.report())
+        self.assertEqual(['outer: 10.000 seconds (8.000 seconds self)'], profiler.report(limit=1))
+
+    @patch("gobcore.logging.logger.logger")
+    def test_step(self, mock_logger):
+        profiler = StartupProfiler(enabled=False)
+        with profiler.step('any step'):
+            pass
+        profiler.log_report()
+        mock_logger.info.assert_not_called()
+
+        profiler = StartupProfiler(enabled=True)
+        with patch("gobtest.profiling.time.perf_counter", side_effect=[0, 1.5]):
+            with profiler.step('any step'):
+                pass
+        mock_logger.info.assert_called_with('Startup profile: any step took 1.500 seconds')
+
+        profiler.imports = {'any module': (1, 0.5)}
+        profiler.log_report()
+        mock_logger.info.assert_called_with('Startup profile: any module: 1.000 seconds (0.500 seconds self)')
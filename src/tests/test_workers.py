@@ -0,0 +1,194 @@
+import os
+from multiprocessing import get_context
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from gobtest.workers import WorkerPool, WorkerProcess, WorkerProcessError, ProcessPool, parse_worker_config, \
+    apply_worker_config, service_consumers, _run_in_process, consumer_context, starts_processes, THREAD, PROCESS
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+def _exit():
+    os._exit(3)
+
+
+class TestWorkerProcess(TestCase):
+
+    def setUp(self):
+        self.context = get_context("forkserver")
+
+    def test_run(self):
+        worker = WorkerProcess(self.context)
+        try:
+            self.assertEqual(3, worker.run(max, 1, 3, 2))
+            with self.assertRaisesRegex(ValueError, 'any error'):
+                worker.run(_fail, 'any error')
+            # The process survives an exception
+            self.assertEqual(2, worker.runs)
+            self.assertEqual(worker.run(os.getpid), worker.run(os.getpid))
+        finally:
+            worker.stop()
+
+    def test_run_crash(self):
+        worker = WorkerProcess(self.context)
+        try:
+            pid = worker.run(os.getpid)
+            with self.assertRaisesRegex(WorkerProcessError, 'exit code 3'):
+                worker.run(_exit)
+            # A new process is started for the next run
+            self.assertNotEqual(pid, worker.run(os.getpid))
+        finally:
+            worker.stop()
+
+    def test_recycle(self):
+        worker = WorkerProcess(self.context, max_runs=2)
+        try:
+            pids = [worker.run(os.getpid) for _ in range(4)]
+            self.assertEqual(pids[0], pids[1])
+            self.assertNotEqual(pids[1], pids[2])
+            self.assertEqual(pids[2], pids[3])
+        finally:
+            worker.stop()
+
+        worker = WorkerProcess(self.context, max_rss_mb=1)
+        try:
+            self.assertNotEqual(worker.run(os.getpid), worker.run(os.getpid))
+        finally:
+            worker.stop()
+
+    def test_pool(self):
+        pool = ProcessPool(2)
+        workers = [pool._idle.get() for _ in range(2)]
+        for worker in workers:
+            pool._idle.put(worker)
+
+        try:
+            self.assertEqual('result', pool.run(str, 'result'))
+            with self.assertRaises(ValueError):
+                pool.run(_fail, 'any error')
+            # Workers are returned to the pool after failure
+            self.assertEqual(2, pool._idle.qsize())
+        finally:
+            for worker in workers:
+                worker.stop()
+
+
+class TestWorkerPool(TestCase):
+
+    def test_init(self):
+        pool = WorkerPool('any', 2)
+        self.assertEqual(THREAD, pool.mode)
+        self.assertEqual(2, pool.prefetch)
+
+        pool = WorkerPool('any', 2, PROCESS, 4)
+        self.assertEqual(PROCESS, pool.mode)
+        self.assertEqual(4, pool.prefetch)
+
+        for args in [('any', 0), ('any', 2, 'fork'), ('any', 2, THREAD, 1)]:
+            with self.assertRaises(ValueError):
+                WorkerPool(*args)
+
+    def test_wrap_thread(self):
+        pool = WorkerPool('any', 1)
+        handler = MagicMock(return_value='result')
+        wrapped = pool.wrap(handler)
+
+        self.assertEqual('result', wrapped({'msg': 1}))
+        handler.assert_called_with({'msg': 1})
+
+        # The semaphore is released after the handler has finished or failed
+        handler.side_effect = Exception
+        with self.assertRaises(Exception):
+            wrapped({'msg': 2})
+        self.assertTrue(pool._semaphore.acquire(blocking=False))
+
+    @patch("gobtest.workers.ProcessPool")
+    def test_wrap_process(self, mock_pool):
+        pool = WorkerPool('any', 2, PROCESS)
+        mock_pool.assert_called_with(2)
+        handler = starts_processes(False)(MagicMock())
+        wrapped = pool.wrap(handler)
+
+        mock_pool.return_value.run.return_value = 'result'
+        self.assertEqual('result', wrapped({'msg': 1}))
+        mock_pool.return_value.run.assert_called_with(_run_in_process, handler, 'any', {'msg': 1})
+
+    @patch("gobtest.workers.ProcessPool")
+    def test_wrap_process_consumer_context(self, mock_pool):
+        pool = WorkerPool('any', 1, PROCESS)
+        context = MagicMock()
+        handler = starts_processes(False)(consumer_context(context)(MagicMock()))
+        self.assertEqual(context, handler.consumer_context)
+
+        # The context is entered in this process around the run in the worker process
+        context.return_value.__enter__.side_effect = lambda: mock_pool.return_value.run.assert_not_called()
+        context.return_value.__exit__.side_effect = lambda *args: mock_pool.return_value.run.assert_called_once()
+        pool.wrap(handler)({'msg': 1})
+        context.assert_called_with({'msg': 1})
+        context.return_value.__exit__.assert_called_once()
+
+    @patch("gobtest.workers.ProcessPool", MagicMock())
+    def test_wrap_starts_processes(self):
+        # A daemonic worker process cannot start processes
+        handler = starts_processes(True)(MagicMock())
+        self.assertTrue(handler.starts_processes)
+        with self.assertRaisesRegex(ValueError, 'Service any starts processes of its own'):
+            WorkerPool('any', 1, PROCESS).wrap(handler)
+
+        # In thread mode the handler runs in the service process
+        handler.return_value = 'result'
+        self.assertEqual('result', WorkerPool('any', 1, THREAD).wrap(handler)({'msg': 1}))
+
+    @patch("gobtest.workers.logger")
+    def test_run_in_process(self, mock_logger):
+        handler = MagicMock(return_value='result')
+        self.assertEqual('result', _run_in_process(handler, 'any_service', {'msg': 1}))
+        mock_logger.configure.assert_called_with({'msg': 1}, 'ANY_SERVICE')
+        handler.assert_called_with({'msg': 1})
+
+
+class TestWorkerConfig(TestCase):
+
+    def test_parse_worker_config(self):
+        self.assertEqual({}, parse_worker_config(''))
+
+        pools = parse_worker_config('a=2, b=3:process, c=1:thread:4')
+        self.assertEqual(['a', 'b', 'c'], list(pools))
+        self.assertEqual((2, THREAD, 2), (pools['a'].workers, pools['a'].mode, pools['a'].prefetch))
+        self.assertEqual((3, PROCESS, 3), (pools['b'].workers, pools['b'].mode, pools['b'].prefetch))
+        self.assertEqual((1, THREAD, 4), (pools['c'].workers, pools['c'].mode, pools['c'].prefetch))
+
+        for spec in ['a', 'a=x', 'a=2:fork', 'a=2:thread:1']:
+            with self.assertRaisesRegex(ValueError, 'Invalid worker configuration'):
+                parse_worker_config(spec)
+
+    def test_service_consumers(self):
+        self.assertEqual(1, service_consumers('', 'a'))
+        self.assertEqual(1, service_consumers('b=4', 'a'))
+        self.assertEqual(4, service_consumers('a=4', 'a'))
+        self.assertEqual(6, service_consumers('a=4:thread:6', 'a'))
+
+    def test_apply_worker_config(self):
+        definition = {
+            'a': {'queue': 'qa', 'handler': MagicMock(), 'report': {'key': 'a'}},
+            'b': {'queue': 'qb', 'handler': MagicMock()},
+        }
+        self.assertEqual(definition, apply_worker_config(definition, {}))
+
+        result = apply_worker_config(definition, parse_worker_config('a=1:thread:3'))
+        self.assertEqual(['a', 'a_1', 'a_2', 'b'], list(result))
+        self.assertEqual(definition['b'], result['b'])
+        for name in ['a', 'a_1', 'a_2']:
+            self.assertEqual('qa', result[name]['queue'])
+            self.assertEqual({'key': 'a'}, result[name]['report'])
+            self.assertIsNot(definition['a']['handler'], result[name]['handler'])
+
+        with self.assertRaisesRegex(ValueError, 'unknown services: c'):
+            apply_worker_config(definition, parse_worker_config('c=2'))
+
+        definition['a']['handler'] = starts_processes(True)(MagicMock())
+        with self.assertRaisesRegex(ValueError, 'Service a starts processes of its own'):
+            apply_worker_config(definition, parse_worker_config('a=2:process'))